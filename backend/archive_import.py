@@ -0,0 +1,493 @@
+"""Resumable import of the legacy courrier/DRI archive into documents.
+
+Used by import_archive.py; the web server does not load this module.
+"""
+import asyncio
+import csv
+import hashlib
+import itertools
+import json
+import mimetypes
+import os
+import re
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from server import (
+    REFERENCE_PREFIXES, UPLOAD_CHUNK_SIZE, UPLOADS_DIR, Document, DocumentStatus, DocumentType,
+    allocate_counter_block, commit_blob, db, logger, release_stored_file, search_words, to_utc_naive
+)
+
+# Courrier départ/arrivée and DRI records exported from the old PHP system are
+# streamed from CSV or JSON lines, mapped onto the same document shapes the
+# forms create, and inserted with unordered bulk_write upserts keyed by
+# (document_type, metadata.legacy_id), so replaying a batch never duplicates it.
+# Legacy references in the PREFIX-YYYY-NNN format are kept and the counters are
+# raised past them before anything is allocated; other records get a reference
+# from the counter of their own year. A kept reference that another document
+# already uses is rejected into the report rather than duplicated. Numbers a
+# server has leased in memory (REFERENCE_BLOCK_SIZE > 1) are invisible to that
+# check, so such servers must be stopped while an export with kept references
+# is imported. Attachments are hashed and copied into the
+# blob store on a thread pool. Progress is checkpointed in import_checkpoints
+# after every batch, so an interrupted import resumes where it stopped.
+#
+# Each attachment reference is journalled in import_attachments under
+# (type, legacy id, position) until the document holding it is written, so a
+# replayed batch reuses the reference an interrupted or concurrent run already
+# took instead of taking a second one.
+ARCHIVE_IMPORT_BATCH_SIZE = int(os.environ.get("ARCHIVE_IMPORT_BATCH_SIZE", "1000"))
+ARCHIVE_IMPORT_COPY_WORKERS = max(1, int(os.environ.get("ARCHIVE_IMPORT_COPY_WORKERS", "8")))
+ARCHIVE_IMPORT_MAX_REJECTIONS = 100  # rejected rows listed in the checkpoint
+ARCHIVE_TYPE_ALIASES = {
+    "depart": DocumentType.OUTGOING_MAIL,
+    "courrier_depart": DocumentType.OUTGOING_MAIL,
+    "outgoing_mail": DocumentType.OUTGOING_MAIL,
+    "arrivee": DocumentType.INCOMING_MAIL,
+    "courrier_arrivee": DocumentType.INCOMING_MAIL,
+    "incoming_mail": DocumentType.INCOMING_MAIL,
+    "dri": DocumentType.DRI_DEPORT,
+    "dri_depart": DocumentType.DRI_DEPORT,
+    "dri_deport": DocumentType.DRI_DEPORT
+}
+ARCHIVE_WORKING_FIELDS = ("line", "legacy_reference", "attachments", "attachment_keys")  # importer state, not stored
+ARCHIVE_DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y", "%d/%m/%y")
+ARCHIVE_STATUSES = {status.value for status in DocumentStatus}
+ARCHIVE_RECORD_FIELDS = {
+    "legacy_id", "type", "reference", "objet", "expediteur", "destinataire", "date",
+    "reference_expediteur", "date_courrier", "status", "created_at", "attachments"
+}
+
+def parse_archive_date(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return to_utc_naive(datetime.fromisoformat(value))
+    except ValueError:
+        pass
+    for date_format in ARCHIVE_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognized date {value!r}")
+
+def iter_archive_export(path: Path):
+    """Yield (line number, raw record) from a CSV or JSON-lines export"""
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError as e:
+                    record = {"_error": f"invalid JSON: {e.msg}"}
+                yield line, record
+    elif path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                attachments = record.get("attachments") or ""
+                record["attachments"] = [name for name in attachments.split("|") if name.strip()]
+                yield reader.line_num, record
+    else:
+        raise ValueError("Unsupported export type, expected .csv or .jsonl")
+
+def archive_document(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a legacy record onto the document the matching form would have created"""
+    if "_error" in record:
+        raise ValueError(record["_error"])
+    legacy_id = str(record.get("legacy_id") or "").strip()
+    if not legacy_id:
+        raise ValueError("legacy_id: required")
+    document_type = ARCHIVE_TYPE_ALIASES.get("_".join(search_words(str(record.get("type") or ""))))
+    if document_type is None:
+        raise ValueError(f"type: unknown document type {record.get('type')!r}")
+    objet = str(record.get("objet") or "").strip()
+    if not objet:
+        raise ValueError("objet: required")
+    
+    def text(field: str) -> str:
+        return str(record.get(field) or "").strip()
+    
+    expediteur, destinataire = text("expediteur"), text("destinataire")
+    date = parse_archive_date(record.get("date"))
+    created_at = parse_archive_date(record.get("created_at")) or date or datetime.utcnow()
+    day = (date or created_at).strftime("%Y-%m-%d")
+    status = text("status").lower()
+    
+    if document_type == DocumentType.OUTGOING_MAIL:
+        title = objet
+        description = f"Courrier départ - De: {expediteur} - À: {destinataire}"
+        metadata = {"date_depart": day, "expediteur": expediteur, "destinataire": destinataire, "objet": objet}
+    elif document_type == DocumentType.INCOMING_MAIL:
+        title = objet
+        description = f"Courrier arrivé - De: {expediteur} - À: {destinataire}"
+        metadata = {
+            "date_reception": day,
+            "expediteur": expediteur,
+            "reference_expediteur": text("reference_expediteur"),
+            "date_courrier": text("date_courrier"),
+            "destinataire": destinataire,
+            "objet": objet
+        }
+    else:
+        title = f"DRI Départ - {objet[:50]}"
+        description = f"Courrier DRI départ de {expediteur} vers {destinataire}"
+        metadata = {
+            "date": day,
+            "expediteur": expediteur,
+            "expediteur_reference": text("reference_expediteur"),
+            "expediteur_date": text("date_courrier"),
+            "destinataire": destinataire,
+            "objet": objet
+        }
+    
+    # Columns the forms have no field for are kept as they were
+    metadata.update({key: value for key, value in record.items() if key not in ARCHIVE_RECORD_FIELDS and value not in (None, "")})
+    metadata["legacy_id"] = legacy_id
+    return {
+        "document_type": document_type.value,
+        "title": title,
+        "description": description,
+        "status": status if status in ARCHIVE_STATUSES else DocumentStatus.COMPLETED.value,
+        "metadata": metadata,
+        "created_at": created_at,
+        "legacy_reference": text("reference"),
+        "attachments": [str(name).strip() for name in record.get("attachments") or []]
+    }
+
+def split_archive_reference(document_type: str, reference: str) -> Optional[tuple]:
+    """(year, number) of a reference in this repo's own format, None otherwise"""
+    match = re.fullmatch(rf"{REFERENCE_PREFIXES[document_type]}-(\d{{4}})-(\d+)", reference.upper())
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def _copy_hashing(source: Path, target: Path) -> Dict[str, Any]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        while True:
+            chunk = src.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+    return {"file_size": size, "checksum": digest.hexdigest()}
+
+class ArchiveImporter:
+    """Resumable import of a legacy courrier export into documents"""
+    
+    def __init__(self, export_path: Path, attachments_dir: Optional[Path], owner_id: str, name: Optional[str] = None):
+        self.export_path = export_path
+        self.attachments_dir = attachments_dir
+        self.owner_id = owner_id
+        self.name = name or export_path.stem
+        self.run_id = str(uuid.uuid4())  # owner of this run's import_attachments entries
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._copy_slots: Optional[asyncio.Semaphore] = None
+    
+    async def checkpoint(self) -> Optional[Dict[str, Any]]:
+        return await db.import_checkpoints.find_one({"id": self.name}, {"_id": 0})
+    
+    async def reset(self):
+        await db.import_checkpoints.delete_one({"id": self.name})
+    
+    async def run(self, progress=None) -> Dict[str, Any]:
+        """Import from the last checkpoint to the end of the export and return the checkpoint"""
+        state = await self.checkpoint()
+        if state is None:
+            state = {
+                "id": self.name,
+                "source": str(self.export_path),
+                "phase": "counters",
+                "rows": 0,
+                "imported": 0,
+                "skipped": 0,
+                "rejected": 0,
+                "references_preserved": 0,
+                "references_allocated": 0,
+                "attachments_copied": 0,
+                "attachments_missing": 0,
+                "rejections": [],
+                "started_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+                "completed_at": None
+            }
+            await db.import_checkpoints.insert_one(dict(state))
+        if state["phase"] == "done":
+            return state
+        
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=ARCHIVE_IMPORT_COPY_WORKERS, thread_name_prefix="archive")
+        self._copy_slots = asyncio.Semaphore(ARCHIVE_IMPORT_COPY_WORKERS)
+        try:
+            if state["phase"] == "counters":
+                await self._reserve_preserved_references(loop)
+                state["phase"] = "records"
+                await self._save(state, {"phase": "records"})
+            
+            records = iter_archive_export(self.export_path)
+            # Rows before the checkpoint were fully written; skip them without touching the database
+            await loop.run_in_executor(self._executor, lambda: sum(1 for _ in itertools.islice(records, state["rows"])))
+            while True:
+                chunk = await loop.run_in_executor(self._executor, lambda: list(itertools.islice(records, ARCHIVE_IMPORT_BATCH_SIZE)))
+                if not chunk:
+                    break
+                counts, rejections = await self._import_batch(chunk)
+                state["rows"] += len(chunk)
+                for key, value in counts.items():
+                    state[key] += value
+                room = ARCHIVE_IMPORT_MAX_REJECTIONS - len(state["rejections"])
+                state["rejections"].extend(rejections[:max(0, room)])
+                await self._save(state, {"rows": state["rows"], "rejections": state["rejections"], **{key: state[key] for key in counts}})
+                if progress:
+                    progress(state)
+            
+            state["phase"] = "done"
+            state["completed_at"] = datetime.utcnow()
+            await self._save(state, {"phase": "done", "completed_at": state["completed_at"]})
+            return state
+        finally:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    async def _save(self, state: Dict[str, Any], fields: Dict[str, Any]):
+        state["updated_at"] = datetime.utcnow()
+        await db.import_checkpoints.update_one({"id": self.name}, {"$set": {**fields, "updated_at": state["updated_at"]}})
+    
+    async def _reserve_preserved_references(self, loop):
+        """Raise every (type, year) counter to the highest legacy reference in the export"""
+        def scan() -> Dict[tuple, int]:
+            highest = {}
+            for _, record in iter_archive_export(self.export_path):
+                try:
+                    document = archive_document(record)
+                except ValueError:
+                    continue
+                parts = split_archive_reference(document["document_type"], document["legacy_reference"])
+                if parts:
+                    key = (document["document_type"], parts[0])
+                    highest[key] = max(highest.get(key, 0), parts[1])
+            return highest
+        
+        highest = await loop.run_in_executor(self._executor, scan)
+        for (document_type, year), number in highest.items():
+            await db.document_counters.update_one(
+                {"document_type": document_type, "year": year},
+                {"$max": {"counter": number}, "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+    
+    async def _import_batch(self, chunk: List[tuple]) -> tuple:
+        counts = Counter()
+        rejections = []
+        documents = []
+        for line, record in chunk:
+            try:
+                documents.append({**archive_document(record), "line": line})
+            except ValueError as e:
+                counts["rejected"] += 1
+                rejections.append({"line": line, "legacy_id": str(record.get("legacy_id") or ""), "error": str(e)})
+        
+        # Records written before an interruption (after the last checkpoint) are not imported twice
+        keys = {(document["document_type"], document["metadata"]["legacy_id"]) for document in documents}
+        existing = set()
+        async for found in db.documents.find(
+            {"metadata.legacy_id": {"$in": list({legacy_id for _, legacy_id in keys})}},
+            {"_id": 0, "document_type": 1, "metadata.legacy_id": 1}
+        ):
+            existing.add((found["document_type"], found["metadata"]["legacy_id"]))
+        fresh, seen, written = [], set(), []
+        for document in documents:
+            key = (document["document_type"], document["metadata"]["legacy_id"])
+            if key in existing:
+                counts["skipped"] += 1
+                written.append(document)
+            elif key in seen:
+                counts["skipped"] += 1
+            else:
+                seen.add(key)
+                fresh.append(document)
+        # Journal entries left by a run interrupted right after writing these documents
+        await self._settle_attachments(written, [])
+        if not fresh:
+            return counts, rejections
+        
+        fresh = await self._assign_references(fresh, counts, rejections)
+        if not fresh:
+            return counts, rejections
+        await asyncio.gather(*(self._store_attachments(document, counts) for document in fresh))
+        
+        operations = []
+        for document in fresh:
+            attachments = document["attachments"]
+            stored = Document(
+                **{key: value for key, value in document.items() if key not in ARCHIVE_WORKING_FIELDS},
+                created_by=self.owner_id,
+                updated_at=datetime.utcnow()
+            ).dict()
+            if attachments:
+                first = attachments[0]
+                stored.update({
+                    "file_path": first["file_path"],
+                    "file_name": first["original_name"],
+                    "file_size": first["file_size"],
+                    "mime_type": first["mime_type"]
+                })
+                files_key = "files" if document["document_type"] == DocumentType.DRI_DEPORT else "uploaded_files"
+                stored["metadata"][files_key] = attachments
+            operations.append(UpdateOne(
+                {"document_type": stored["document_type"], "metadata.legacy_id": stored["metadata"]["legacy_id"]},
+                {"$setOnInsert": stored},
+                upsert=True
+            ))
+        result = await db.documents.bulk_write(operations, ordered=False)
+        counts["imported"] += result.upserted_count
+        counts["skipped"] += len(operations) - result.upserted_count
+        
+        # Records another run inserted first keep that run's references, not ours
+        upserted = set(result.upserted_ids)
+        await self._settle_attachments(
+            [document for position, document in enumerate(fresh) if position in upserted],
+            [document for position, document in enumerate(fresh) if position not in upserted]
+        )
+        return counts, rejections
+    
+    @staticmethod
+    def attachment_key(document: Dict[str, Any], position: int) -> str:
+        return f"{document['document_type']}:{document['metadata']['legacy_id']}:{position}"
+    
+    async def _settle_attachments(self, written: List[Dict[str, Any]], lost: List[Dict[str, Any]]):
+        """Hand journalled references over to written documents; release this run's for lost ones"""
+        keys = []
+        for document in written:
+            if "attachment_keys" in document:
+                keys.extend(document["attachment_keys"])
+            else:
+                keys.extend(self.attachment_key(document, position) for position in range(len(document["attachments"])))
+        if keys:
+            await db.import_attachments.delete_many({"_id": {"$in": keys}})
+        for document in lost:
+            for key, entry in zip(document["attachment_keys"], document["attachments"]):
+                # Only the run that journalled a reference may drop it
+                result = await db.import_attachments.delete_one({"_id": key, "owner": self.run_id})
+                if result.deleted_count:
+                    await release_stored_file(entry["file_path"], entry["checksum"])
+    
+    async def _assign_references(self, documents: List[Dict[str, Any]], counts: Counter, rejections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep references in this repo's format, allocate one block per (type, year) for the rest.
+        Returns the documents to write, without those whose kept reference is already used."""
+        preserved = [
+            document["legacy_reference"].upper() for document in documents
+            if split_archive_reference(document["document_type"], document["legacy_reference"])
+        ]
+        owners: Dict[str, set] = {}
+        if preserved:
+            async for found in db.documents.find(
+                {"reference": {"$in": preserved}},
+                {"_id": 0, "reference": 1, "document_type": 1, "metadata.legacy_id": 1}
+            ):
+                owners.setdefault(found["reference"], set()).add(
+                    (found["document_type"], found.get("metadata", {}).get("legacy_id"))
+                )
+        kept = []
+        pending: Dict[tuple, List[Dict[str, Any]]] = {}
+        for document in documents:
+            legacy_reference = document["legacy_reference"]
+            if split_archive_reference(document["document_type"], legacy_reference):
+                reference = legacy_reference.upper()
+                # A document with the same legacy id is this record, written by a concurrent run
+                key = (document["document_type"], document["metadata"]["legacy_id"])
+                if owners.get(reference, set()) - {key}:
+                    counts["rejected"] += 1
+                    rejections.append({
+                        "line": document["line"],
+                        "legacy_id": document["metadata"]["legacy_id"],
+                        "error": f"reference: {reference} is already used by another document"
+                    })
+                    continue
+                owners.setdefault(reference, set()).add(key)
+                document["reference"] = reference
+                counts["references_preserved"] += 1
+                kept.append(document)
+                continue
+            if legacy_reference:
+                document["metadata"]["legacy_reference"] = legacy_reference
+            pending.setdefault((document["document_type"], document["created_at"].year), []).append(document)
+            kept.append(document)
+        
+        for (document_type, year), group in pending.items():
+            last = await allocate_counter_block(document_type, year, len(group))
+            prefix = REFERENCE_PREFIXES[document_type]
+            for number, document in enumerate(group, start=last - len(group) + 1):
+                document["reference"] = f"{prefix}-{year}-{number:03d}"
+            counts["references_allocated"] += len(group)
+        return kept
+    
+    async def _store_attachments(self, document: Dict[str, Any], counts: Counter):
+        names = document["attachments"]
+        keys = [self.attachment_key(document, position) for position in range(len(names))]
+        stored = await asyncio.gather(*(self._store_attachment(key, name) for key, name in zip(keys, names)))
+        missing = [name for name, entry in zip(names, stored) if entry is None]
+        if missing:
+            document["metadata"]["missing_attachments"] = missing
+        counts["attachments_copied"] += len(names) - len(missing)
+        counts["attachments_missing"] += len(missing)
+        document["attachment_keys"] = [key for key, entry in zip(keys, stored) if entry]
+        document["attachments"] = [entry for entry in stored if entry]
+    
+    async def _store_attachment(self, key: str, name: str) -> Optional[Dict[str, Any]]:
+        entry = await self._copy_attachment(name)
+        if entry is None:
+            return None
+        try:
+            await db.import_attachments.insert_one({
+                "_id": key,
+                "owner": self.run_id,
+                "entry": entry,
+                "created_at": datetime.utcnow()
+            })
+            return entry
+        except DuplicateKeyError:
+            # An interrupted or concurrent run already holds a reference for this attachment
+            await release_stored_file(entry["file_path"], entry["checksum"])
+            journalled = await db.import_attachments.find_one({"_id": key})
+            return journalled["entry"] if journalled else entry
+    
+    async def _copy_attachment(self, name: str) -> Optional[Dict[str, Any]]:
+        if self.attachments_dir is None:
+            return None
+        source = (self.attachments_dir / name).resolve()
+        if self.attachments_dir.resolve() not in source.parents or not source.is_file():
+            return None
+        
+        staging = UPLOADS_DIR / "imports"
+        staging.mkdir(exist_ok=True)
+        temp_path = staging / f".{uuid.uuid4().hex}.part"
+        async with self._copy_slots:
+            try:
+                saved = await asyncio.get_running_loop().run_in_executor(self._executor, _copy_hashing, source, temp_path)
+            except OSError as e:
+                logger.warning(f"Could not copy attachment {source}: {e}")
+                if temp_path.exists():
+                    temp_path.unlink()
+                return None
+        stored = await commit_blob(temp_path, saved["checksum"], saved["file_size"])
+        return {
+            "original_name": Path(name).name,
+            "stored_name": stored["stored_name"],
+            "file_path": stored["file_path"],
+            "file_size": stored["file_size"],
+            "checksum": stored["checksum"],
+            "mime_type": mimetypes.guess_type(name)[0] or "application/octet-stream"
+        }
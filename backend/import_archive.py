@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from archive_import import ArchiveImporter
+from server import client, db, ensure_indexes
+
+def print_progress(state):
+    print(
+        f"  {state['rows']} rows: {state['imported']} imported, {state['skipped']} skipped, "
+        f"{state['rejected']} rejected, {state['attachments_copied']} attachments",
+        flush=True
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Import the legacy courrier/DRI archive; interrupted runs resume from their checkpoint",
+        epilog="Legacy references are kept when they use this system's format. Stop servers running with "
+               "REFERENCE_BLOCK_SIZE > 1 during such an import: references they have leased in memory "
+               "cannot be checked for collisions."
+    )
+    parser.add_argument("export", type=Path, help="CSV or JSON-lines export of the legacy records")
+    parser.add_argument("--attachments", type=Path, help="directory the records' attachment paths are relative to")
+    parser.add_argument("--owner", required=True, help="username recorded as creator of the imported documents")
+    parser.add_argument("--name", help="checkpoint name (default: the export file name)")
+    parser.add_argument("--restart", action="store_true", help="discard the checkpoint and start over")
+    parser.add_argument("--json", action="store_true", help="print the final checkpoint as JSON")
+    args = parser.parse_args()
+
+    try:
+        owner = await db.users.find_one({"username": args.owner})
+        if not owner:
+            parser.exit(1, f"Unknown user: {args.owner}\n")
+
+        # The resume check looks records up by legacy id
+        await ensure_indexes()
+        importer = ArchiveImporter(args.export, args.attachments, owner["id"], name=args.name)
+        if args.restart:
+            await importer.reset()
+        previous = await importer.checkpoint()
+        if previous and previous["phase"] != "done":
+            print(f"Resuming {importer.name} after {previous['rows']} rows")
+
+        try:
+            state = await importer.run(progress=None if args.json else print_progress)
+        except ValueError as e:
+            parser.exit(1, f"{args.export}: {e}\n")
+    finally:
+        client.close()
+
+    if args.json:
+        print(json.dumps(state, default=str, indent=2))
+        return
+    print(
+        f"Done: {state['imported']} imported, {state['skipped']} skipped, {state['rejected']} rejected; "
+        f"references {state['references_preserved']} kept, {state['references_allocated']} allocated; "
+        f"attachments {state['attachments_copied']} copied, {state['attachments_missing']} missing"
+    )
+    for rejection in state["rejections"]:
+        print(f"  line {rejection['line']} ({rejection['legacy_id'] or '-'}): {rejection['error']}")
+    print("Run POST /api/search/reindex to index the imported attachments.")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to resume from the last checkpoint")
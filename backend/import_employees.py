@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from server import ROOT_DIR, client, import_employees
+
+async def main():
+    parser = argparse.ArgumentParser(description="Import the EPSys employee roster from an HR CSV/XLSX export")
+    parser.add_argument(
+        "path",
+        nargs="?",
+        type=Path,
+        default=ROOT_DIR / "data" / "employees.csv",
+        help="CSV or XLSX export (default: the seed roster in data/employees.csv)"
+    )
+    parser.add_argument("--prune", action="store_true", help="delete employees missing from the export")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = await import_employees(args.path, prune=args.prune)
+    except ValueError as e:
+        parser.exit(1, f"{args.path}: {e}\n")
+    finally:
+        client.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{report['rows']} rows: {report['inserted']} inserted, {report['updated']} updated, "
+        f"{report['unchanged']} unchanged, {report['duplicates']} duplicates, "
+        f"{report['rejected']} rejected, {report['pruned']} pruned"
+    )
+    for rejection in report["rejections"]:
+        print(f"  line {rejection['line']}: {'; '.join(rejection['errors'])}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
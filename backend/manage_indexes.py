@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+import json
+
+from server import client, ensure_indexes, index_report, run_migrations
+
+async def report():
+    results = await index_report()
+    for collection_name, info in results.items():
+        print(f"{collection_name}:")
+        print(f"  missing:      {', '.join(info['missing']) or '-'}")
+        print(f"  unregistered: {', '.join(info['unregistered']) or '-'}")
+        print(f"  unused:       {', '.join(info['unused']) or '-'}")
+        for name, usage in sorted(info["usage"].items()):
+            print(f"    {name}: {usage['ops']} ops since {usage['since']:%Y-%m-%d %H:%M}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Manage EPSys MongoDB indexes and migrations")
+    parser.add_argument(
+        "command",
+        choices=["report", "apply", "migrate"],
+        help="report: missing/unregistered/unused indexes; apply: create missing indexes; migrate: run pending migrations"
+    )
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "report":
+            if args.json:
+                print(json.dumps(await index_report(), default=str, indent=2))
+            else:
+                await report()
+        elif args.command == "apply":
+            created = await ensure_indexes()
+            print(f"Created indexes: {created or 'none'}")
+        else:
+            applied = await run_migrations()
+            print(f"Applied migrations: {applied or 'none'}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
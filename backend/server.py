@@ -1,25 +1,67 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
+import asyncio
 import logging
 import math
+import json
+import base64
+import codecs
+import csv
+import re
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import mimetypes
+import urllib.parse
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, EmailStr, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timedelta
+import hashlib
+import heapq
+import itertools
+import html
+import unicodedata
+import zipfile
+from datetime import datetime, timedelta, timezone
 import bcrypt
 import jwt
-from passlib.context import CryptContext
 import aiofiles
+import aiofiles.os
+import weakref
 from enum import Enum
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF text extraction is skipped without pypdf
+    PdfReader = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # No thumbnails without Pillow
+    Image = ImageOps = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # No PDF thumbnails without pypdfium2
+    pdfium = None
+
+try:
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+except ImportError:  # Employee imports accept CSV only without openpyxl
+    load_workbook = None
+    InvalidFileException = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -66,6 +108,11 @@ class DocumentType(str, Enum):
     DRI_DEPORT = "dri_deport"
     GENERAL = "general"
 
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
 # Models
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -137,6 +184,7 @@ class Message(BaseModel):
     sender_id: str
     recipient_id: str
     document_id: Optional[str] = None
+    conversation_id: Optional[str] = None  # Same for every message between two users about one document
     is_read: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -169,6 +217,7 @@ class Folder(BaseModel):
     name: str
     parent_id: Optional[str] = None  # Root folders have None
     path: str  # Full path like /folder1/subfolder2
+    ancestors: List[str] = []  # Ancestor folder ids, root first
     created_by: str  # user_id
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -188,11 +237,19 @@ class FileItem(BaseModel):
     folder_id: Optional[str] = None  # Root files have None
     file_size: int
     mime_type: str
+    checksum: Optional[str] = None  # SHA-256 of the stored bytes
     created_by: str  # user_id
     uploaded_by_name: str  # user full name for display
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class EventRecurrence(BaseModel):
+    frequency: RecurrenceFrequency
+    interval: int = Field(1, ge=1, le=366)  # Every `interval` days, weeks or months
+    weekdays: List[int] = []  # Weekly series only, 0 = Monday; empty repeats the start day
+    count: Optional[int] = Field(None, ge=1, le=5000)  # Number of occurrences
+    until: Optional[datetime] = None  # Latest possible occurrence start
+
 class CalendarEvent(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
@@ -207,6 +264,9 @@ class CalendarEvent(BaseModel):
     location: Optional[str] = None
     reminder_minutes: int = 15  # Minutes before event to remind
     category: str = "general"  # general, meeting, deadline, holiday, etc.
+    visibility: str = "public"  # public, private (creator and attendees only)
+    recurrence: Optional[EventRecurrence] = None  # Stored once, expanded per requested window
+    series_end: Optional[datetime] = None  # End of the last occurrence
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -221,6 +281,8 @@ class CalendarEventCreate(BaseModel):
     location: Optional[str] = None
     reminder_minutes: int = 15
     category: str = "general"
+    visibility: str = Field("public", pattern="^(public|private)$")
+    recurrence: Optional[EventRecurrence] = None
 
 class CalendarEventUpdate(BaseModel):
     title: Optional[str] = None
@@ -233,6 +295,8 @@ class CalendarEventUpdate(BaseModel):
     location: Optional[str] = None
     reminder_minutes: Optional[int] = None
     category: Optional[str] = None
+    visibility: Optional[str] = Field(None, pattern="^(public|private)$")
+    recurrence: Optional[EventRecurrence] = None  # null turns a series back into a single event
 
 class UserSettings(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -292,48 +356,121 @@ class PasswordChangeRequest(BaseModel):
     new_password: str = Field(..., min_length=6)
 
 # Utility Functions
-def hash_password(password: str) -> str:
+# Password hashing
+# bcrypt takes ~250 ms per call, so it runs on a bounded thread pool instead of
+# the event loop. The semaphore caps concurrent hashes; callers beyond the cap
+# wait in its queue, which is what password_pool_stats reports.
+PASSWORD_HASH_CONCURRENCY = max(1, int(os.environ.get("PASSWORD_HASH_CONCURRENCY", str(os.cpu_count() or 2))))
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt")
+_password_semaphore = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
+password_pool_stats = {
+    "concurrency": PASSWORD_HASH_CONCURRENCY,
+    "running": 0,
+    "queued": 0,
+    "max_queued": 0,
+    "completed": 0,
+    "total_wait_ms": 0.0,
+    "total_run_ms": 0.0
+}
+
+async def run_password_task(func, *args):
+    stats = password_pool_stats
+    enqueued = time.perf_counter()
+    if _password_semaphore.locked():
+        stats["queued"] += 1
+        stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+        try:
+            await _password_semaphore.acquire()
+        finally:
+            stats["queued"] -= 1
+    else:
+        await _password_semaphore.acquire()
+    started = time.perf_counter()
+    stats["running"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, func, *args)
+    finally:
+        stats["running"] -= 1
+        stats["completed"] += 1
+        stats["total_wait_ms"] += (started - enqueued) * 1000
+        stats["total_run_ms"] += (time.perf_counter() - started) * 1000
+        _password_semaphore.release()
+
+def get_password_pool_stats() -> Dict[str, Any]:
+    stats = dict(password_pool_stats)
+    completed = stats["completed"]
+    stats["avg_wait_ms"] = round(stats.pop("total_wait_ms") / completed, 1) if completed else 0.0
+    stats["avg_run_ms"] = round(stats.pop("total_run_ms") / completed, 1) if completed else 0.0
+    return stats
+
+def _hash_password_sync(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
-def verify_password(password: str, hashed: str) -> bool:
+def _verify_password_sync(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+async def hash_password(password: str) -> str:
+    return await run_password_task(_hash_password_sync, password)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await run_password_task(_verify_password_sync, password, hashed)
+
+# Reference allocation
+# Each create takes one number from document_counters with a single atomic
+# find-and-increment. With REFERENCE_BLOCK_SIZE > 1 a worker leases a block of
+# numbers at once and hands them out from memory; unused numbers of a lease are
+# lost on restart, so references stay unique but may have gaps.
+REFERENCE_BLOCK_SIZE = max(1, int(os.environ.get("REFERENCE_BLOCK_SIZE", "1")))
+
+REFERENCE_PREFIXES = {
+    'outgoing_mail': 'DEP',
+    'incoming_mail': 'ARR',
+    'dri_deport': 'DRI',
+    'om_approval': 'OM'
+}
+
+_reference_leases: Dict[tuple, List[int]] = {}  # (document_type, year) -> [next, last]
+_reference_lease_lock = asyncio.Lock()
+
+async def allocate_counter_block(document_type: str, year: int, size: int = 1) -> int:
+    """Atomically reserve `size` numbers and return the last one reserved"""
+    for attempt in range(2):
+        try:
+            counter_doc = await db.document_counters.find_one_and_update(
+                {"document_type": document_type, "year": year},
+                {
+                    "$inc": {"counter": size},
+                    "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": datetime.utcnow()}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return counter_doc["counter"]
+        except DuplicateKeyError:
+            # Two first-of-the-year upserts raced on the unique index; the loser retries as an update
+            if attempt:
+                raise
+
+async def next_reference_number(document_type: str, year: int) -> int:
+    if REFERENCE_BLOCK_SIZE == 1:
+        return await allocate_counter_block(document_type, year)
+    
+    key = (document_type, year)
+    async with _reference_lease_lock:
+        lease = _reference_leases.get(key)
+        if not lease or lease[0] > lease[1]:
+            last = await allocate_counter_block(document_type, year, REFERENCE_BLOCK_SIZE)
+            lease = [last - REFERENCE_BLOCK_SIZE + 1, last]
+            _reference_leases[key] = lease
+        number = lease[0]
+        lease[0] += 1
+        return number
+
 async def generate_reference(document_type: str) -> str:
     """Generate reference number like DEP-2025-001"""
     current_year = datetime.now().year
-    
-    # Define prefixes for each document type
-    prefixes = {
-        'outgoing_mail': 'DEP',
-        'incoming_mail': 'ARR', 
-        'dri_deport': 'DRI',
-        'om_approval': 'OM'
-    }
-    
-    prefix = prefixes.get(document_type, 'DOC')
-    
-    # Find or create counter for this document type and year
-    counter_doc = await db.document_counters.find_one({
-        "document_type": document_type,
-        "year": current_year
-    })
-    
-    if not counter_doc:
-        # Create new counter for this type and year
-        counter = DocumentCounter(
-            document_type=document_type,
-            year=current_year,
-            counter=1
-        )
-        await db.document_counters.insert_one(counter.dict())
-        current_counter = 1
-    else:
-        # Increment existing counter
-        current_counter = counter_doc["counter"] + 1
-        await db.document_counters.update_one(
-            {"document_type": document_type, "year": current_year},
-            {"$set": {"counter": current_counter}}
-        )
+    prefix = REFERENCE_PREFIXES.get(document_type, 'DOC')
+    current_counter = await next_reference_number(document_type, current_year)
     
     # Format reference: PREFIX-YYYY-001
     reference = f"{prefix}-{current_year}-{current_counter:03d}"
@@ -355,6 +492,627 @@ def get_upload_folder(document_type: str) -> Path:
     folder_path.mkdir(exist_ok=True)
     return folder_path
 
+# Streaming uploads
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB per file
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+async def stream_upload(file: UploadFile, temp_path: Path, max_size: int = MAX_UPLOAD_SIZE) -> Dict[str, Any]:
+    """Stream an upload to temp_path in chunks, enforcing the size limit as it goes.
+    
+    The partial file is removed if the upload fails or exceeds the limit.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"File {file.filename} is too large (max {max_size // (1024 * 1024)}MB)"
+                    )
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        if await aiofiles.os.path.exists(temp_path):
+            await aiofiles.os.remove(temp_path)
+        raise
+    
+    return {"file_size": size, "checksum": digest.hexdigest()}
+
+# Content-addressed blob store
+# Uploaded bytes are stored once under uploads/blobs/<sha[:2]>/<sha[2:4]>/<sha>;
+# upload_blobs keeps one refcount per blob, incremented for every file entry in
+# documents.metadata.files, documents.metadata.uploaded_files and file_items
+# that points at it. Per-checksum locks serialize attach/release in this process.
+# Across processes, whoever unlinks an unreferenced blob first claims it by
+# setting deleting_at; new references wait until the row is gone (or the claim
+# is older than BLOB_DELETE_STALE_SECONDS) and then put the bytes back.
+BLOBS_DIR = UPLOADS_DIR / "blobs"
+BLOB_DELETE_STALE_SECONDS = 60
+
+_blob_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def get_blob_path(checksum: str) -> Path:
+    return BLOBS_DIR / checksum[:2] / checksum[2:4] / checksum
+
+def _blob_lock(checksum: str) -> asyncio.Lock:
+    lock = _blob_locks.get(checksum)
+    if lock is None:
+        lock = asyncio.Lock()
+        _blob_locks[checksum] = lock
+    return lock
+
+async def store_upload_file(file: UploadFile, upload_folder: Path, max_size: int = MAX_UPLOAD_SIZE) -> Dict[str, Any]:
+    """Stream an upload into the blob store and take a reference on it.
+    
+    The bytes are staged in upload_folder and atomically renamed into the blob
+    store; if a blob with the same content already exists the staged copy is dropped.
+    """
+    temp_path = upload_folder / f".{uuid.uuid4().hex}.part"
+    saved = await stream_upload(file, temp_path, max_size)
+    return await commit_blob(temp_path, saved["checksum"], saved["file_size"])
+
+async def commit_blob(temp_path: Path, checksum: str, file_size: int) -> Dict[str, Any]:
+    """Move a staged file into the blob store (or drop it if the blob exists) and take a reference"""
+    blob_path = get_blob_path(checksum)
+    
+    try:
+        async with _blob_lock(checksum):
+            await acquire_blob_reference(checksum, blob_path, file_size)
+            if await aiofiles.os.path.exists(blob_path):
+                await aiofiles.os.remove(temp_path)
+            else:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                await aiofiles.os.replace(temp_path, blob_path)
+    except BaseException:
+        if await aiofiles.os.path.exists(temp_path):
+            await aiofiles.os.remove(temp_path)
+        raise
+    
+    return {
+        "stored_name": checksum,
+        "file_path": str(blob_path),
+        "file_size": file_size,
+        "checksum": checksum
+    }
+
+async def acquire_blob_reference(checksum: str, blob_path: Path, file_size: int):
+    """Take one reference on a blob row, creating it if needed"""
+    deadline = time.monotonic() + BLOB_DELETE_STALE_SECONDS + 5
+    while True:
+        try:
+            await db.upload_blobs.update_one(
+                {"checksum": checksum, "deleting_at": None},
+                {
+                    "$inc": {"refcount": 1},
+                    "$setOnInsert": {
+                        "file_path": str(blob_path),
+                        "file_size": file_size,
+                        "created_at": datetime.utcnow()
+                    }
+                },
+                upsert=True
+            )
+            return
+        except DuplicateKeyError:
+            # Either a concurrent first upload created the row (the retry matches it),
+            # or the blob is being deleted: wait for that, taking over a stale claim
+            if time.monotonic() > deadline:
+                raise
+            stale = datetime.utcnow() - timedelta(seconds=BLOB_DELETE_STALE_SECONDS)
+            await db.upload_blobs.update_one(
+                {"checksum": checksum, "deleting_at": {"$lt": stale}},
+                {"$set": {"deleting_at": None, "refcount": 0}}
+            )
+            await asyncio.sleep(0.1)
+
+async def claim_blob_deletion(checksum: str) -> Optional[datetime]:
+    """Claim an unreferenced blob for unlinking; None if it is referenced, gone or claimed"""
+    now = to_mongo_precision(datetime.utcnow())
+    stale = now - timedelta(seconds=BLOB_DELETE_STALE_SECONDS)
+    result = await db.upload_blobs.update_one(
+        {
+            "checksum": checksum,
+            "refcount": {"$lte": 0},
+            "$or": [{"deleting_at": None}, {"deleting_at": {"$lt": stale}}]
+        },
+        {"$set": {"deleting_at": now}}
+    )
+    return now if result.modified_count else None
+
+async def finish_blob_deletion(checksum: str, claimed_at: datetime, unlinked: bool):
+    """Drop the row of an unlinked blob, or give the claim back so a later pass retries"""
+    if unlinked:
+        await db.upload_blobs.delete_one({"checksum": checksum, "deleting_at": claimed_at})
+    else:
+        await db.upload_blobs.update_one({"checksum": checksum, "deleting_at": claimed_at}, {"$set": {"deleting_at": None}})
+
+async def release_stored_file(file_path: Optional[str], checksum: Optional[str] = None):
+    """Drop one reference to a stored file, unlinking it once nothing uses it.
+    
+    Files stored before the blob store existed have no checksum and are
+    removed directly, as before.
+    """
+    if not file_path:
+        return
+    
+    if checksum and Path(file_path) == get_blob_path(checksum):
+        async with _blob_lock(checksum):
+            blob = await db.upload_blobs.find_one_and_update(
+                {"checksum": checksum},
+                {"$inc": {"refcount": -1}},
+                return_document=ReturnDocument.AFTER
+            )
+            if blob is None or blob["refcount"] > 0:
+                # Still referenced (or untracked, in which case keep the bytes)
+                return
+            claimed_at = await claim_blob_deletion(checksum)
+            if claimed_at is None:
+                return
+            try:
+                if await aiofiles.os.path.exists(file_path):
+                    await aiofiles.os.remove(file_path)
+            except BaseException:
+                await finish_blob_deletion(checksum, claimed_at, unlinked=False)
+                raise
+            await finish_blob_deletion(checksum, claimed_at, unlinked=True)
+        return
+    
+    if await aiofiles.os.path.exists(file_path):
+        await aiofiles.os.remove(file_path)
+
+async def release_uploaded_files(entries: List[Dict[str, Any]]):
+    """Drop the references taken for a request's uploads when the request fails"""
+    for entry in entries:
+        await release_stored_file(entry.get("file_path"), entry.get("checksum"))
+
+def document_stored_files(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """All stored file entries a document holds a reference on"""
+    metadata = document.get("metadata") or {}
+    entries = list(metadata.get("files") or []) + list(metadata.get("uploaded_files") or [])
+    
+    # Legacy single-file documents only carry the top-level file_path
+    file_path = document.get("file_path")
+    if file_path and all(entry.get("file_path") != file_path for entry in entries):
+        entries.append({"file_path": file_path, "checksum": metadata.get("checksum")})
+    return entries
+
+# Background file reclamation
+# Bulk deletions queue their stored files in file_reclaim_queue (in the same
+# transaction as the delete) and return; the reclaimer drops the blob references
+# and unlinks unreferenced files in batches on a small thread pool. Failed
+# unlinks stay in the queue and are retried with backoff, so the queue doubles
+# as the retry log and survives restarts.
+FILE_RECLAIM_WORKERS = max(1, int(os.environ.get("FILE_RECLAIM_WORKERS", "2")))
+FILE_RECLAIM_BATCH_SIZE = 500
+FILE_RECLAIM_MAX_ATTEMPTS = 8
+
+def _unlink_paths(paths: List[str]) -> Dict[str, str]:
+    """Remove files, returning the error for each path that could not be removed"""
+    errors = {}
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            errors[path] = str(e)
+    return errors
+
+class FileReclaimer:
+    """Drains file_reclaim_queue: releases blob references, then unlinks files"""
+    
+    def __init__(self, workers: int, batch_size: int, poll_interval: float = 60.0):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"workers": workers, "reclaimed": 0, "released": 0, "failed_attempts": 0, "batches": 0}
+    
+    def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reclaim")
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    def wake(self):
+        if self._wakeup:
+            self._wakeup.set()
+    
+    async def enqueue(self, files: List[Dict[str, Any]], session=None):
+        """Queue stored files for release; call wake() once the caller's writes are committed"""
+        now = datetime.utcnow()
+        entries = [
+            {
+                "id": str(uuid.uuid4()),
+                "file_path": file["file_path"],
+                "checksum": file.get("checksum"),
+                "released": False,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "last_error": None,
+                "created_at": now
+            }
+            for file in files if file.get("file_path")
+        ]
+        for offset in range(0, len(entries), self.batch_size):
+            await db.file_reclaim_queue.insert_many(entries[offset:offset + self.batch_size], session=session)
+    
+    async def _run(self):
+        while True:
+            try:
+                while await self.process_batch():
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"File reclaimer batch failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+    
+    async def process_batch(self) -> int:
+        """Reclaim one batch of due entries; returns how many were taken"""
+        batch = await db.file_reclaim_queue.find(
+            {"next_attempt_at": {"$lte": datetime.utcnow()}, "attempts": {"$lt": FILE_RECLAIM_MAX_ATTEMPTS}}
+        ).sort("next_attempt_at", 1).to_list(self.batch_size)
+        if not batch:
+            return 0
+        self.stats["batches"] += 1
+        
+        # Drop one blob reference per entry, then unlink the blobs nothing references
+        to_release = [e for e in batch if not e["released"]]
+        if to_release:
+            released = await run_in_transaction(lambda session: self._release_references(to_release, session))
+            self.stats["released"] += released
+        claims, done = await self._claim_deletions(batch)
+        pending = [e for e in batch if e["id"] not in done]
+        
+        errors = await self._unlink(pending)
+        for checksum, claimed_at in claims.items():
+            await finish_blob_deletion(checksum, claimed_at, unlinked=str(get_blob_path(checksum)) not in errors)
+        done += [e["id"] for e in pending if e["file_path"] not in errors]
+        if done:
+            await db.file_reclaim_queue.delete_many({"id": {"$in": done}})
+            self.stats["reclaimed"] += len(done)
+        
+        for entry in pending:
+            error = errors.get(entry["file_path"])
+            if error is None:
+                continue
+            self.stats["failed_attempts"] += 1
+            attempts = entry["attempts"] + 1
+            if attempts >= FILE_RECLAIM_MAX_ATTEMPTS:
+                logger.error(f"Giving up reclaiming {entry['file_path']}: {error}")
+            await db.file_reclaim_queue.update_one(
+                {"id": entry["id"]},
+                {"$set": {
+                    "attempts": attempts,
+                    "last_error": error,
+                    "next_attempt_at": datetime.utcnow() + timedelta(seconds=min(3600, 30 * 2 ** attempts))
+                }}
+            )
+        return len(batch)
+    
+    async def _release_references(self, entries: List[Dict[str, Any]], session=None) -> int:
+        """Mark entries released and decrement their blobs' refcounts, once per entry.
+        
+        The conditional flip comes first, so another reclaimer taking the same
+        entry (or a retry after a crash without transactions) never decrements
+        twice; at worst a reference leaks and the bytes are kept.
+        """
+        per_checksum = Counter()
+        released = 0
+        for entry in entries:
+            result = await db.file_reclaim_queue.update_one(
+                {"id": entry["id"], "released": False}, {"$set": {"released": True}}, session=session
+            )
+            if not result.modified_count:
+                continue
+            released += 1
+            if entry["checksum"] and Path(entry["file_path"]) == get_blob_path(entry["checksum"]):
+                per_checksum[entry["checksum"]] += 1
+        for checksum, count in per_checksum.items():
+            await db.upload_blobs.update_one({"checksum": checksum}, {"$inc": {"refcount": -count}}, session=session)
+        return released
+    
+    async def _claim_deletions(self, entries: List[Dict[str, Any]]) -> tuple:
+        """Claim the unreferenced blobs of the entries.
+        
+        Returns the claims by checksum and the ids of entries that are done
+        without unlinking: their blob is referenced again, untracked or already gone.
+        """
+        claims, kept, done = {}, set(), []
+        for entry in entries:
+            checksum = entry["checksum"]
+            if not checksum or Path(entry["file_path"]) != get_blob_path(checksum):
+                continue  # Pre-blob-store file, unlinked directly
+            if checksum not in claims and checksum not in kept:
+                claimed_at = await claim_blob_deletion(checksum)
+                if claimed_at is None:
+                    kept.add(checksum)
+                else:
+                    claims[checksum] = claimed_at
+            if checksum in kept:
+                done.append(entry["id"])
+        return claims, done
+    
+    async def _unlink(self, entries: List[Dict[str, Any]]) -> Dict[str, str]:
+        if not entries:
+            return {}
+        paths = sorted({e["file_path"] for e in entries})
+        # One slice per worker thread
+        loop = asyncio.get_running_loop()
+        slices = [paths[i::self.workers] for i in range(self.workers) if paths[i::self.workers]]
+        errors = {}
+        for result in await asyncio.gather(*(loop.run_in_executor(self._executor, _unlink_paths, part) for part in slices)):
+            errors.update(result)
+        return errors
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["queued"] = await db.file_reclaim_queue.count_documents({"attempts": {"$lt": FILE_RECLAIM_MAX_ATTEMPTS}})
+        stats["abandoned"] = await db.file_reclaim_queue.count_documents({"attempts": {"$gte": FILE_RECLAIM_MAX_ATTEMPTS}})
+        return stats
+
+file_reclaimer = FileReclaimer(FILE_RECLAIM_WORKERS, FILE_RECLAIM_BATCH_SIZE)
+
+# In-process caching
+class TTLCache:
+    """Small LRU cache with a per-entry time to live and hit/miss counters"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def set(self, key: Any, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, key: Any = None):
+        """Drop one entry, or everything when no key is given"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+# Authenticated users by username, so get_current_user does not hit Mongo on every request.
+# Tokens carry the user's token_version; bumping it (password change, deactivation)
+# revokes outstanding tokens once the cache entry is invalidated or expires.
+auth_user_cache = TTLCache(
+    maxsize=int(os.environ.get("AUTH_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("AUTH_CACHE_TTL_SECONDS", "60"))
+)
+
+def invalidate_auth_user(username: str):
+    auth_user_cache.invalidate(username)
+
+# Display names for created_by decoration, shared across requests
+user_display_name_cache = TTLCache(maxsize=4096, ttl=float(os.environ.get("USER_NAME_CACHE_TTL_SECONDS", "300")))
+
+class UserNameLoader:
+    """Request-scoped batch loader for user display names.
+    
+    Names already resolved in this request or present in the shared cache are
+    reused; everything else is fetched with a single $in query per call.
+    """
+    
+    def __init__(self):
+        self._names: Dict[str, str] = {}
+    
+    async def load_many(self, user_ids: List[str]) -> Dict[str, str]:
+        missing = set()
+        for user_id in set(user_ids):
+            if user_id in self._names:
+                continue
+            cached = user_display_name_cache.get(user_id)
+            if cached is not None:
+                self._names[user_id] = cached
+            else:
+                missing.add(user_id)
+        
+        if missing:
+            async for user in db.users.find({"id": {"$in": list(missing)}}, {"_id": 0, "id": 1, "full_name": 1}):
+                self._names[user["id"]] = user["full_name"]
+                user_display_name_cache.set(user["id"], user["full_name"])
+        
+        return {user_id: self._names.get(user_id, "Unknown") for user_id in user_ids}
+    
+    async def load(self, user_id: str) -> str:
+        return (await self.load_many([user_id]))[user_id]
+    
+    async def attach_creator_names(self, items: List[Dict[str, Any]]):
+        """Set created_by_name on each item from its created_by id"""
+        names = await self.load_many([item["created_by"] for item in items])
+        for item in items:
+            item["created_by_name"] = names[item["created_by"]]
+
+def get_user_name_loader() -> UserNameLoader:
+    return UserNameLoader()
+
+# Real-time push
+# Writes publish events to the in-process bus, which fans them out to the open
+# WebSocket and SSE connections of the users concerned. Each connection owns a
+# bounded queue: when a slow client lets it fill up, the backlog is replaced by a
+# single "resync" event telling the client to refetch, so publishers never wait.
+# Only connections held by this worker process are reached.
+PUSH_QUEUE_SIZE = int(os.environ.get("PUSH_QUEUE_SIZE", "100"))
+PUSH_HEARTBEAT_SECONDS = float(os.environ.get("PUSH_HEARTBEAT_SECONDS", "25"))
+PUSH_SEND_TIMEOUT_SECONDS = 10.0
+PUSH_RESYNC = json.dumps({"type": "resync"})
+PUSH_HEARTBEAT = json.dumps({"type": "heartbeat"})
+
+class PushSubscription:
+    """One client connection's bounded queue of serialized events"""
+    
+    def __init__(self, user_id: str, is_admin: bool, maxsize: int):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+    
+    def offer(self, payload: str) -> bool:
+        """Queue an event; returns False when the backlog had to be dropped"""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(PUSH_RESYNC)
+            return False
+    
+    async def next_payload(self, timeout: float) -> str:
+        """Next queued event, or a heartbeat after `timeout` seconds of silence"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return PUSH_HEARTBEAT
+
+class PushBus:
+    """Per-user fan-out of events to the subscriptions of this process"""
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._by_user: Dict[str, set] = {}
+        self._admins: set = set()
+        self.stats = {"published": 0, "delivered": 0, "resyncs": 0}
+    
+    def subscribe(self, user: User) -> PushSubscription:
+        subscription = PushSubscription(user.id, user.role == UserRole.ADMIN, self.queue_size)
+        self._by_user.setdefault(user.id, set()).add(subscription)
+        if subscription.is_admin:
+            self._admins.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: PushSubscription):
+        subscriptions = self._by_user.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._by_user[subscription.user_id]
+        self._admins.discard(subscription)
+    
+    def is_connected(self, user_id: str) -> bool:
+        return user_id in self._by_user
+    
+    def publish(self, event_type: str, data: Dict[str, Any], user_ids=(), admins: bool = False, everyone: bool = False):
+        """Send an event to the given users' connections (and admins', or everyone's)"""
+        if everyone:
+            targets = {subscription for subscriptions in self._by_user.values() for subscription in subscriptions}
+        else:
+            targets = {subscription for user_id in set(user_ids) if user_id for subscription in self._by_user.get(user_id, ())}
+            if admins:
+                targets |= self._admins
+        self.stats["published"] += 1
+        if not targets:
+            return
+        # Serialized once, whatever the number of connections
+        payload = json.dumps(jsonable_encoder({"type": event_type, "data": data}))
+        for subscription in targets:
+            if not subscription.offer(payload):
+                self.stats["resyncs"] += 1
+        self.stats["delivered"] += len(targets)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["users"] = len(self._by_user)
+        stats["connections"] = sum(len(subscriptions) for subscriptions in self._by_user.values())
+        return stats
+
+push_bus = PushBus(PUSH_QUEUE_SIZE)
+
+# Transactions
+# Multi-document transactions need a replica set; on a standalone server the
+# operation runs without one (first failure is remembered for the process).
+_transactions_supported: Optional[bool] = None
+
+async def run_in_transaction(operation):
+    """Run `await operation(session)` atomically where the deployment allows it"""
+    global _transactions_supported
+    if _transactions_supported is not False:
+        try:
+            async with await client.start_session() as session:
+                async with session.start_transaction():
+                    result = await operation(session)
+            _transactions_supported = True
+            return result
+        except OperationFailure as e:
+            # IllegalOperation: "Transaction numbers are only allowed on a replica set member or mongos"
+            if e.code != 20:
+                raise
+            _transactions_supported = False
+    return await operation(None)
+
+# Keyset pagination
+# Lists are ordered by (created_at, id) descending; a cursor is the opaque,
+# URL-safe encoding of the last row's sort key. Other date keys pass `field`.
+def encode_cursor(document: Dict[str, Any], field: str = "created_at") -> str:
+    raw = json.dumps({"t": document[field].isoformat(), "id": document["id"]})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, field: str = "created_at") -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {field: datetime.fromisoformat(raw["t"]), "id": str(raw["id"])}
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def cursor_query(cursor: str, field: str = "created_at") -> Dict[str, Any]:
+    """Filter for the rows after `cursor` in (field, id) descending order"""
+    position = decode_cursor(cursor, field)
+    return {"$or": [
+        {field: {"$lt": position[field]}},
+        {field: position[field], "id": {"$lt": position["id"]}}
+    ]}
+
+CURSOR_SORT = [("created_at", -1), ("id", -1)]
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -365,14 +1123,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def user_from_token(token: str) -> User:
+    """Authenticate a bearer token; raises 401 when it is invalid, expired or revoked"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -385,12 +1144,22 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except Exception:  # Catch all JWT-related exceptions
         raise credentials_exception
     
-    user = await db.users.find_one({"username": username})
+    user = auth_user_cache.get(username)
     if user is None:
+        user = await db.users.find_one({"username": username}, {"_id": 0, "password": 0})
+        if user is None:
+            raise credentials_exception
+        auth_user_cache.set(username, user)
+    
+    # Tokens issued before a password change or deactivation carry an older version
+    if payload.get("ver", 0) != user.get("token_version", 0) or not user.get("is_active", True):
         raise credentials_exception
     
     return User(**user)
 
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await user_from_token(credentials.credentials)
+
 async def get_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -419,7 +1188,7 @@ async def register(user_data: UserCreate):
         )
     
     # Hash password and create user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     user_dict = user_data.dict()
     del user_dict["password"]
     
@@ -432,7 +1201,7 @@ async def register(user_data: UserCreate):
 @api_router.post("/login", response_model=Token)
 async def login(user_data: UserLogin):
     user = await db.users.find_one({"username": user_data.username})
-    if not user or not verify_password(user_data.password, user["password"]):
+    if not user or not await verify_password(user_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -447,7 +1216,8 @@ async def login(user_data: UserLogin):
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user["username"]}, expires_delta=access_token_expires
+        data={"sub": user["username"], "ver": user.get("token_version", 0)},
+        expires_delta=access_token_expires
     )
     
     user_obj = User(**user)
@@ -478,60 +1248,64 @@ async def create_dri_depart_document(
     
     # Handle file uploads
     uploaded_files = []
-    for file in files:
-        # Check file size (10MB limit per file)
-        content = await file.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail=f"File {file.filename} is too large (max 10MB)")
-        
-        # Create unique filename
-        file_extension = file.filename.split(".")[-1] if "." in file.filename else ""
-        unique_filename = f"dri_{uuid.uuid4()}.{file_extension}"
-        file_path = upload_folder / unique_filename
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
-        
-        uploaded_files.append({
-            "original_name": file.filename,
-            "stored_name": unique_filename,
-            "file_path": str(file_path),
-            "file_size": len(content),
-            "mime_type": file.content_type
-        })
-    
-    # Create document
-    document = Document(
-        title=f"DRI Départ - {objet[:50]}",
-        description=f"Courrier DRI départ de {expediteur} vers {destinataire}",
-        document_type=DocumentType.DRI_DEPORT,
-        status=DocumentStatus.DRAFT,
-        created_by=current_user.id,
-        reference=reference,
-        metadata={
-            "date": date,
-            "expediteur": expediteur,
-            "expediteur_reference": expediteur_reference,
-            "expediteur_date": expediteur_date,
-            "destinataire": destinataire,
-            "objet": objet,
-            "files": uploaded_files
-        }
-    )
-    
-    await db.documents.insert_one(document.dict())
+    try:
+        for file in files:
+            # Store file content-addressed (10MB limit per file)
+            saved = await store_upload_file(file, upload_folder)
+            
+            uploaded_files.append({
+                "original_name": file.filename,
+                "stored_name": saved["stored_name"],
+                "file_path": saved["file_path"],
+                "file_size": saved["file_size"],
+                "checksum": saved["checksum"],
+                "mime_type": file.content_type
+            })
+        
+        # Create document
+        document = Document(
+            title=f"DRI Départ - {objet[:50]}",
+            description=f"Courrier DRI départ de {expediteur} vers {destinataire}",
+            document_type=DocumentType.DRI_DEPORT,
+            status=DocumentStatus.DRAFT,
+            created_by=current_user.id,
+            reference=reference,
+            metadata={
+                "date": date,
+                "expediteur": expediteur,
+                "expediteur_reference": expediteur_reference,
+                "expediteur_date": expediteur_date,
+                "destinataire": destinataire,
+                "objet": objet,
+                "files": uploaded_files
+            }
+        )
+        
+        await db.documents.insert_one(document.dict())
+    except BaseException:
+        await release_uploaded_files(uploaded_files)
+        raise
+    invalidate_dashboard_documents(document.created_by, document.assigned_to)
+    content_indexer.submit("document", document.id)
     return document
 
+# Short-lived exact counts for paginated listings, keyed by query scope
+listing_count_cache = TTLCache(maxsize=1024, ttl=float(os.environ.get("LISTING_COUNT_TTL_SECONDS", "30")))
+
 @api_router.get("/documents/dri-depart")
 async def get_dri_depart_documents(
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    total_mode: str = Query("exact", pattern="^(exact|cached|none)$"),
     current_user: User = Depends(get_current_user)
 ):
-    """Get DRI Depart documents with pagination"""
-    skip = (page - 1) * limit
+    """Get DRI Depart documents with pagination.
     
+    Pass the returned next_cursor back as `cursor` for keyset paging, which
+    costs the same on every page; `page` keeps the offset-based behaviour.
+    total_mode=cached reuses a recent count, total_mode=none skips counting.
+    """
     # Query based on user role
     if current_user.role == UserRole.ADMIN:
         query = {"document_type": DocumentType.DRI_DEPORT}
@@ -542,17 +1316,34 @@ async def get_dri_depart_documents(
         }
     
     # Get total count
-    total = await db.documents.count_documents(query)
+    total = None
+    if total_mode != "none":
+        count_key = ("dri_depart", "all" if current_user.role == UserRole.ADMIN else current_user.id)
+        total = listing_count_cache.get(count_key) if total_mode == "cached" else None
+        if total is None:
+            total = await db.documents.count_documents(query)
+            listing_count_cache.set(count_key, total)
     
     # Get documents
-    documents = await db.documents.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+    if cursor:
+        page_query = {"$and": [query, cursor_query(cursor)]}
+        documents = await db.documents.find(page_query).sort(CURSOR_SORT).limit(limit + 1).to_list(limit + 1)
+    else:
+        skip = (page - 1) * limit
+        documents = await db.documents.find(query).sort(CURSOR_SORT).skip(skip).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1])
     
     return {
         "documents": [Document(**doc) for doc in documents],
         "total": total,
         "page": page,
         "limit": limit,
-        "pages": math.ceil(total / limit) if total > 0 else 0
+        "pages": math.ceil(total / limit) if total else 0,
+        "next_cursor": next_cursor
     }
 
 @api_router.put("/documents/dri-depart/{document_id}")
@@ -580,50 +1371,46 @@ async def update_dri_depart_document(
     upload_folder = get_upload_folder(DocumentType.DRI_DEPORT)
     
     # Handle new file uploads
-    uploaded_files = existing_doc.get("metadata", {}).get("files", [])
-    for file in files:
-        # Check file size (10MB limit per file)
-        content = await file.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail=f"File {file.filename} is too large (max 10MB)")
-        
-        # Create unique filename
-        file_extension = file.filename.split(".")[-1] if "." in file.filename else ""
-        unique_filename = f"dri_{uuid.uuid4()}.{file_extension}"
-        file_path = upload_folder / unique_filename
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
-        
-        uploaded_files.append({
-            "original_name": file.filename,
-            "stored_name": unique_filename,
-            "file_path": str(file_path),
-            "file_size": len(content),
-            "mime_type": file.content_type
-        })
-    
-    # Update document
-    update_data = {
-        "title": f"DRI Départ - {objet[:50]}",
-        "description": f"Courrier DRI départ de {expediteur} vers {destinataire}",
-        "updated_at": datetime.utcnow(),
-        "metadata": {
-            "date": date,
-            "expediteur": expediteur,
-            "expediteur_reference": expediteur_reference,
-            "expediteur_date": expediteur_date,
-            "destinataire": destinataire,
-            "objet": objet,
-            "files": uploaded_files
+    new_files = []
+    try:
+        for file in files:
+            # Store file content-addressed (10MB limit per file)
+            saved = await store_upload_file(file, upload_folder)
+            
+            new_files.append({
+                "original_name": file.filename,
+                "stored_name": saved["stored_name"],
+                "file_path": saved["file_path"],
+                "file_size": saved["file_size"],
+                "checksum": saved["checksum"],
+                "mime_type": file.content_type
+            })
+        
+        # Update document
+        update_data = {
+            "title": f"DRI Départ - {objet[:50]}",
+            "description": f"Courrier DRI départ de {expediteur} vers {destinataire}",
+            "updated_at": datetime.utcnow(),
+            "metadata": {
+                "date": date,
+                "expediteur": expediteur,
+                "expediteur_reference": expediteur_reference,
+                "expediteur_date": expediteur_date,
+                "destinataire": destinataire,
+                "objet": objet,
+                "files": existing_doc.get("metadata", {}).get("files", []) + new_files
+            }
         }
-    }
-    
-    await db.documents.update_one({"id": document_id}, {"$set": update_data})
+        
+        await db.documents.update_one({"id": document_id}, {"$set": update_data})
+    except BaseException:
+        await release_uploaded_files(new_files)
+        raise
+    content_indexer.submit("document", document_id)
     
     # Return updated document
     updated_doc = await db.documents.find_one({"id": document_id})
+    publish_document_update(updated_doc, existing_doc.get("assigned_to"))
     return Document(**updated_doc)
 
 # Generic Document Routes
@@ -641,28 +1428,89 @@ async def create_document(
         reference=reference
     )
     await db.documents.insert_one(document.dict())
+    invalidate_dashboard_documents(document.created_by, document.assigned_to)
     return document
 
-@api_router.get("/documents", response_model=List[Document])
+REFERENCE_SEARCH_PATTERN = re.compile(r"^[A-Za-z]+-\d")
+
+def document_search_query(q: str) -> Dict[str, Any]:
+    """Reference prefixes (DEP-2025-0...) match on the reference, anything else is a text search"""
+    q = q.strip()
+    if REFERENCE_SEARCH_PATTERN.match(q):
+        return {"reference": {"$regex": f"^{re.escape(q.upper())}"}}
+    return {"$text": {"$search": q}}
+
+def document_projection(fields: Optional[str]) -> Optional[Dict[str, int]]:
+    if not fields:
+        return None
+    projection = {"_id": 0, "id": 1, "created_at": 1}
+    for field in (name.strip() for name in fields.split(",")):
+        if not field:
+            continue
+        if field not in Document.__fields__ and not field.startswith("metadata."):
+            raise HTTPException(status_code=400, detail=f"Unknown document field: {field}")
+        projection[field] = 1
+    return projection
+
+@api_router.get("/documents")
 async def get_documents(
+    response: Response,
     document_type: Optional[DocumentType] = None,
     status: Optional[DocumentStatus] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_total: bool = False,
     current_user: User = Depends(get_current_user)
 ):
+    """List documents newest first, one keyset page at a time.
+    
+    The cursor for the next page is returned in the X-Next-Cursor header and,
+    when include_total is set, the match count in X-Total-Count.
+    """
+    conditions = []
     query = {}
     if document_type:
         query["document_type"] = document_type
     if status:
         query["status"] = status
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from
+        if date_to:
+            query["created_at"]["$lte"] = date_to
+    if q:
+        conditions.append(document_search_query(q))
     
     # Users can only see their own documents unless they're admin
     if current_user.role != UserRole.ADMIN:
-        query["$or"] = [
+        conditions.append({"$or": [
             {"created_by": current_user.id},
             {"assigned_to": current_user.id}
-        ]
+        ]})
+    
+    if include_total:
+        count_query = {**query, "$and": conditions} if conditions else query
+        response.headers["X-Total-Count"] = str(await db.documents.count_documents(count_query))
+    
+    if cursor:
+        conditions.append(cursor_query(cursor))
+    if conditions:
+        query["$and"] = conditions
+    
+    projection = document_projection(fields)
+    documents = await db.documents.find(query, projection).sort(CURSOR_SORT).limit(limit + 1).to_list(limit + 1)
+    
+    if len(documents) > limit:
+        documents = documents[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(documents[-1])
     
-    documents = await db.documents.find(query).sort("created_at", -1).to_list(100)
+    if projection:
+        return documents
     return [Document(**doc) for doc in documents]
 
 @api_router.get("/documents/{document_id}", response_model=Document)
@@ -702,8 +1550,11 @@ async def update_document(
     update_data["updated_at"] = datetime.utcnow()
     
     await db.documents.update_one({"id": document_id}, {"$set": update_data})
+    invalidate_dashboard_documents(doc_obj.created_by, doc_obj.assigned_to, update_data.get("assigned_to"))
+    content_indexer.submit("document", document_id)
     
     updated_document = await db.documents.find_one({"id": document_id})
+    publish_document_update(updated_document, doc_obj.assigned_to)
     return Document(**updated_document)
 
 @api_router.delete("/documents/{document_id}")
@@ -722,10 +1573,12 @@ async def delete_document(
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     await db.documents.delete_one({"id": document_id})
+    await db.content_index.delete_many({"source": "document", "source_id": document_id})
+    invalidate_dashboard_documents(doc_obj.created_by, doc_obj.assigned_to)
     
-    # Delete file if exists
-    if doc_obj.file_path and os.path.exists(doc_obj.file_path):
-        os.remove(doc_obj.file_path)
+    # Release stored files; shared blobs are only removed with their last reference
+    for stored_file in document_stored_files(document):
+        await release_stored_file(stored_file.get("file_path"), stored_file.get("checksum"))
     
     return {"message": "Document deleted successfully"}
 
@@ -752,47 +1605,48 @@ async def upload_files(
     uploaded_files = []
     total_size = 0
     
-    for file in files:
-        # Check file size (10MB limit per file)
-        content = await file.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail=f"File {file.filename} is too large (max 10MB)")
-        
-        total_size += len(content)
-        
-        # Create file path in appropriate folder
-        file_extension = file.filename.split(".")[-1] if "." in file.filename else ""
-        unique_filename = f"{document_id}_{uuid.uuid4()}.{file_extension}"
-        file_path = upload_folder / unique_filename
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
-        
-        uploaded_files.append({
-            "original_name": file.filename,
-            "file_path": str(file_path),
-            "file_size": len(content),
-            "mime_type": file.content_type
-        })
+    try:
+        for file in files:
+            # Store file content-addressed (10MB limit per file)
+            saved = await store_upload_file(file, upload_folder)
+            total_size += saved["file_size"]
+            
+            uploaded_files.append({
+                "original_name": file.filename,
+                "file_path": saved["file_path"],
+                "file_size": saved["file_size"],
+                "checksum": saved["checksum"],
+                "mime_type": file.content_type
+            })
+        
+        # Update document with file info (for now, we'll store the first file for compatibility)
+        if uploaded_files:
+            first_file = uploaded_files[0]
+            update_data = {
+                "file_path": first_file["file_path"],
+                "file_name": first_file["original_name"],
+                "file_size": first_file["file_size"],
+                "mime_type": first_file["mime_type"],
+                "updated_at": datetime.utcnow()
+            }
+            
+            # Store all files in metadata
+            current_metadata = doc_obj.metadata or {}
+            previous_files = current_metadata.get("uploaded_files") or []
+            current_metadata["uploaded_files"] = uploaded_files
+            update_data["metadata"] = current_metadata
+            
+            await db.documents.update_one({"id": document_id}, {"$set": update_data})
+    except BaseException:
+        await release_uploaded_files(uploaded_files)
+        raise
     
-    # Update document with file info (for now, we'll store the first file for compatibility)
     if uploaded_files:
-        first_file = uploaded_files[0]
-        update_data = {
-            "file_path": first_file["file_path"],
-            "file_name": first_file["original_name"],
-            "file_size": first_file["file_size"],
-            "mime_type": first_file["mime_type"],
-            "updated_at": datetime.utcnow()
-        }
-        
-        # Store all files in metadata
-        current_metadata = doc_obj.metadata or {}
-        current_metadata["uploaded_files"] = uploaded_files
-        update_data["metadata"] = current_metadata
+        content_indexer.submit("document", document_id)
         
-        await db.documents.update_one({"id": document_id}, {"$set": update_data})
+        # The new upload replaces the previous set of files
+        for previous_file in previous_files:
+            await release_stored_file(previous_file.get("file_path"), previous_file.get("checksum"))
     
 # File Manager Upload Route - Updated for backward compatibility
 @api_router.post("/file-manager/upload-legacy")
@@ -806,19 +1660,8 @@ async def upload_file_manager_files_legacy(
     uploaded_files = []
     
     for file in files:
-        # Check file size (10MB limit per file)
-        content = await file.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail=f"File {file.filename} is too large (max 10MB)")
-        
-        # Create unique filename
-        file_extension = file.filename.split(".")[-1] if "." in file.filename else ""
-        unique_filename = f"fm_{uuid.uuid4()}.{file_extension}"
-        file_path = upload_folder / unique_filename
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
+        # Store file content-addressed (10MB limit per file)
+        saved = await store_upload_file(file, upload_folder)
         
         # Create a general document entry for file manager files (legacy compatibility)
         document = Document(
@@ -826,14 +1669,16 @@ async def upload_file_manager_files_legacy(
             description=f"File Manager upload: {file.filename}",
             document_type='general',
             created_by=current_user.id,
-            file_path=str(file_path),
+            file_path=saved["file_path"],
             file_name=file.filename,
-            file_size=len(content),
+            file_size=saved["file_size"],
             mime_type=file.content_type,
-            metadata={"source": "file_manager"}
+            metadata={"source": "file_manager", "checksum": saved["checksum"]}
         )
         
         await db.documents.insert_one(document.dict())
+        invalidate_dashboard_documents(current_user.id)
+        content_indexer.submit("document", document.id)
         uploaded_files.append(document)
     
     return {
@@ -841,62 +1686,280 @@ async def upload_file_manager_files_legacy(
         "files": [doc.dict() for doc in uploaded_files]
     }
 
+def publish_document_update(document: Dict[str, Any], previous_assignee: Optional[str] = None):
+    """Tell the document's creator, assignees and admins that it changed"""
+    push_bus.publish(
+        "document.updated",
+        {key: document.get(key) for key in ("id", "reference", "document_type", "status", "assigned_to", "updated_at")},
+        [document["created_by"], document.get("assigned_to"), previous_assignee],
+        admins=True
+    )
+
 # Dashboard Statistics Route
-@api_router.get("/dashboard/stats")
-async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
-    # Query based on user role
-    if current_user.role == UserRole.ADMIN:
+# Document stats are cached for a few seconds per scope ("all" for admins, the user
+# id otherwise) and dropped as soon as a document affecting them changes. Unread
+# messages come from the materialized message_counters.
+DASHBOARD_CACHE_TTL_SECONDS = float(os.environ.get("DASHBOARD_CACHE_TTL_SECONDS", "5"))
+dashboard_stats_cache = TTLCache(maxsize=4096, ttl=DASHBOARD_CACHE_TTL_SECONDS)
+
+def invalidate_dashboard_documents(*user_ids: Optional[str]):
+    dashboard_stats_cache.invalidate(("documents", "all"))
+    for user_id in user_ids:
+        if user_id:
+            dashboard_stats_cache.invalidate(("documents", user_id))
+
+async def get_document_stats(current_user: User) -> Dict[str, int]:
+    """Per-type, per-status and total document counts in one aggregation pass"""
+    scope = "all" if current_user.role == UserRole.ADMIN else current_user.id
+    cache_key = ("documents", scope)
+    stats = dashboard_stats_cache.get(cache_key)
+    if stats is not None:
+        return stats
+    
+    if scope == "all":
         query = {}
     else:
         query = {"$or": [{"created_by": current_user.id}, {"assigned_to": current_user.id}]}
     
-    # Get document counts by type
-    outgoing_count = await db.documents.count_documents({**query, "document_type": DocumentType.OUTGOING_MAIL})
-    incoming_count = await db.documents.count_documents({**query, "document_type": DocumentType.INCOMING_MAIL})
-    om_approval_count = await db.documents.count_documents({**query, "document_type": DocumentType.OM_APPROVAL})
-    dri_deport_count = await db.documents.count_documents({**query, "document_type": DocumentType.DRI_DEPORT})
+    groups = await db.documents.aggregate([
+        {"$match": query},
+        {"$group": {"_id": {"type": "$document_type", "status": "$status"}, "count": {"$sum": 1}}}
+    ]).to_list(None)
+    
+    stats = {"total": 0}
+    for group in groups:
+        count = group["count"]
+        stats["total"] += count
+        for key in (f"type:{group['_id'].get('type')}", f"status:{group['_id'].get('status')}"):
+            stats[key] = stats.get(key, 0) + count
+    
+    dashboard_stats_cache.set(cache_key, stats)
+    return stats
+
+async def get_unread_message_count(user_id: str) -> int:
+    counter = await db.message_counters.find_one({"user_id": user_id}, {"_id": 0, "unread": 1})
+    return counter["unread"] if counter else 0
+
+@api_router.get("/dashboard/stats")
+async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+    stats = await get_document_stats(current_user)
     
     # Get completion stats
-    total_docs = await db.documents.count_documents(query)
-    completed_docs = await db.documents.count_documents({**query, "status": DocumentStatus.COMPLETED})
+    total_docs = stats["total"]
+    completed_docs = stats.get(f"status:{DocumentStatus.COMPLETED.value}", 0)
     efficiency = round((completed_docs / total_docs * 100) if total_docs > 0 else 0, 1)
     
     # Get unread messages
-    unread_messages = await db.messages.count_documents({"recipient_id": current_user.id, "is_read": False})
+    unread_messages = await get_unread_message_count(current_user.id)
     
     return {
-        "outgoing_mail": outgoing_count,
-        "incoming_mail": incoming_count,
-        "om_approval": om_approval_count,
-        "dri_deport": dri_deport_count,
+        "outgoing_mail": stats.get(f"type:{DocumentType.OUTGOING_MAIL.value}", 0),
+        "incoming_mail": stats.get(f"type:{DocumentType.INCOMING_MAIL.value}", 0),
+        "om_approval": stats.get(f"type:{DocumentType.OM_APPROVAL.value}", 0),
+        "dri_deport": stats.get(f"type:{DocumentType.DRI_DEPORT.value}", 0),
         "efficiency": efficiency,
         "unread_messages": unread_messages,
         "total_documents": total_docs
     }
 
+# Messages
+# Messages between the same two users about the same document (or about none)
+# form a conversation, whose id is derived from that key. conversations holds
+# each conversation's latest message for the inbox; message_counters holds each
+# user's unread total, adjusted on delivery and on read.
+CONVERSATION_SNIPPET_LENGTH = 140
+CONVERSATION_SORT = [("last_message_at", -1), ("id", -1)]
+
+def conversation_id_for(sender_id: str, recipient_id: str, document_id: Optional[str] = None) -> str:
+    first, second = sorted((sender_id, recipient_id))
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"epsys:conversation:{first}:{second}:{document_id or ''}"))
+
+def conversation_upsert(message: Dict[str, Any], created_at: Optional[datetime] = None) -> UpdateOne:
+    """Create the message's conversation if needed and make the message its latest"""
+    return UpdateOne(
+        {"id": message["conversation_id"]},
+        {
+            "$setOnInsert": {
+                "participants": sorted({message["sender_id"], message["recipient_id"]}),
+                "document_id": message.get("document_id"),
+                "created_at": created_at or message["created_at"]
+            },
+            "$set": {
+                "last_message_at": message["created_at"],
+                "last_message": {
+                    "id": message["id"],
+                    "subject": message["subject"],
+                    "snippet": message["content"][:CONVERSATION_SNIPPET_LENGTH],
+                    "sender_id": message["sender_id"]
+                }
+            }
+        },
+        upsert=True
+    )
+
+async def adjust_unread_counters(deltas: Dict[str, int]):
+    """Add each delta to the user's unread counter, never going below zero"""
+    operations = [
+        UpdateOne(
+            {"user_id": user_id},
+            [{"$set": {"user_id": user_id, "unread": {"$max": [0, {"$add": [{"$ifNull": ["$unread", 0]}, delta]}]}}}],
+            upsert=True
+        )
+        for user_id, delta in deltas.items() if delta
+    ]
+    if operations:
+        await db.message_counters.bulk_write(operations, ordered=False)
+    
+    # Connected users get their new totals pushed
+    connected = [user_id for user_id in deltas if push_bus.is_connected(user_id)]
+    if connected:
+        async for counter in db.message_counters.find({"user_id": {"$in": connected}}, {"_id": 0}):
+            push_bus.publish("counters", {"unread_messages": counter["unread"]}, [counter["user_id"]])
+
+async def deliver_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Insert messages, then update their conversations and unread counters.
+    
+    Messages whose id already exists are skipped, so delivering the same batch
+    again is harmless. Returns the messages actually inserted.
+    """
+    for message in messages:
+        message["conversation_id"] = conversation_id_for(message["sender_id"], message["recipient_id"], message.get("document_id"))
+    try:
+        await db.messages.insert_many(messages, ordered=False)
+        inserted = messages
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+        duplicates = {error["index"] for error in e.details["writeErrors"]}
+        inserted = [message for index, message in enumerate(messages) if index not in duplicates]
+    if not inserted:
+        return []
+    
+    latest = {}
+    for message in sorted(inserted, key=lambda m: m["created_at"]):
+        latest[message["conversation_id"]] = message
+    await db.conversations.bulk_write([conversation_upsert(message) for message in latest.values()], ordered=False)
+    await adjust_unread_counters(Counter(message["recipient_id"] for message in inserted))
+    for message in inserted:
+        push_bus.publish("message.created", {
+            key: message.get(key) for key in ("id", "conversation_id", "subject", "sender_id", "recipient_id", "document_id", "created_at")
+        }, [message["sender_id"], message["recipient_id"]])
+    return inserted
+
 # Messages Routes
 @api_router.post("/messages", response_model=Message)
 async def create_message(
     message_data: MessageCreate,
     current_user: User = Depends(get_current_user)
 ):
-    message = Message(**message_data.dict(), sender_id=current_user.id)
-    await db.messages.insert_one(message.dict())
-    return message
+    message = Message(**message_data.dict(), sender_id=current_user.id).dict()
+    await deliver_messages([message])
+    return Message(**message)
 
 @api_router.get("/messages", response_model=List[Message])
 async def get_messages(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    messages = await db.messages.find({
-        "$or": [
-            {"sender_id": current_user.id},
-            {"recipient_id": current_user.id}
-        ]
-    }).sort("created_at", -1).to_list(100)
+    """Sent and received messages, newest first; the next page's cursor is in X-Next-Cursor"""
+    query = {"$or": [
+        {"sender_id": current_user.id},
+        {"recipient_id": current_user.id}
+    ]}
+    if cursor:
+        query = {"$and": [query, cursor_query(cursor)]}
+    messages = await db.messages.find(query).sort(CURSOR_SORT).limit(limit + 1).to_list(limit + 1)
+    
+    if len(messages) > limit:
+        messages = messages[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(messages[-1])
     
     return [Message(**msg) for msg in messages]
 
+@api_router.get("/messages/conversations")
+async def get_conversations(
+    limit: int = Query(30, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    name_loader: UserNameLoader = Depends(get_user_name_loader)
+):
+    """The user's conversations, most recently active first, with unread counts"""
+    query = {"participants": current_user.id}
+    if cursor:
+        query.update(cursor_query(cursor, "last_message_at"))
+    conversations = await db.conversations.find(query, {"_id": 0}).sort(CONVERSATION_SORT).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(conversations) > limit:
+        conversations = conversations[:limit]
+        next_cursor = encode_cursor(conversations[-1], "last_message_at")
+    
+    unread = {
+        group["_id"]: group["count"]
+        async for group in db.messages.aggregate([
+            {"$match": {
+                "recipient_id": current_user.id,
+                "is_read": False,
+                "conversation_id": {"$in": [conversation["id"] for conversation in conversations]}
+            }},
+            {"$group": {"_id": "$conversation_id", "count": {"$sum": 1}}}
+        ])
+    }
+    for conversation in conversations:
+        others = [user_id for user_id in conversation["participants"] if user_id != current_user.id]
+        conversation["counterpart_id"] = others[0] if others else current_user.id
+        conversation["unread"] = unread.get(conversation["id"], 0)
+    names = await name_loader.load_many([
+        conversation["counterpart_id"] for conversation in conversations
+        if conversation["counterpart_id"] != REMINDER_SENDER_ID
+    ])
+    names[REMINDER_SENDER_ID] = REMINDER_SENDER_NAME
+    for conversation in conversations:
+        conversation["counterpart_name"] = names[conversation["counterpart_id"]]
+    
+    return {"conversations": conversations, "next_cursor": next_cursor}
+
+@api_router.get("/messages/conversations/{conversation_id}")
+async def get_conversation_messages(
+    conversation_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Messages of one conversation, newest first"""
+    conversation = await db.conversations.find_one({"id": conversation_id, "participants": current_user.id}, {"_id": 0})
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    query = {"conversation_id": conversation_id}
+    if cursor:
+        query.update(cursor_query(cursor))
+    messages = await db.messages.find(query).sort(CURSOR_SORT).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor(messages[-1])
+    
+    return {"conversation": conversation, "messages": [Message(**msg) for msg in messages], "next_cursor": next_cursor}
+
+@api_router.put("/messages/conversations/{conversation_id}/read")
+async def mark_conversation_read(
+    conversation_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Mark every message the user received in the conversation as read, in one write"""
+    result = await db.messages.update_many(
+        {"conversation_id": conversation_id, "recipient_id": current_user.id, "is_read": False},
+        {"$set": {"is_read": True}}
+    )
+    await adjust_unread_counters({current_user.id: -result.modified_count})
+    if result.modified_count:
+        push_bus.publish("conversation.read", {"conversation_id": conversation_id, "reader_id": current_user.id}, [current_user.id])
+    return {"marked_read": result.modified_count}
+
 @api_router.put("/messages/{message_id}/read")
 async def mark_message_read(
     message_id: str,
@@ -906,35 +1969,466 @@ async def mark_message_read(
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
     
-    await db.messages.update_one({"id": message_id}, {"$set": {"is_read": True}})
+    # Only the request that flips is_read adjusts the counter
+    result = await db.messages.update_one({"id": message_id, "is_read": False}, {"$set": {"is_read": True}})
+    await adjust_unread_counters({current_user.id: -result.modified_count})
+    if result.modified_count:
+        push_bus.publish(
+            "message.read",
+            {"id": message_id, "conversation_id": message.get("conversation_id")},
+            [current_user.id, message["sender_id"]]
+        )
     return {"message": "Message marked as read"}
 
-# Employee Lookup Route
-@api_router.get("/employees/{matricule}")
+# Real-time push routes
+# Browsers cannot set headers on WebSocket or EventSource requests, so both
+# endpoints take the access token as a query parameter.
+async def wait_for_disconnect(websocket: WebSocket):
+    """Read (and ignore) client frames until the client goes away"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+@api_router.websocket("/ws")
+async def push_websocket(websocket: WebSocket, token: str = Query(...)):
+    """Push channel: JSON events for the user, with a heartbeat when idle"""
+    try:
+        user = await user_from_token(token)
+    except HTTPException:
+        await websocket.close(code=4401)
+        return
+    await websocket.accept()
+    subscription = push_bus.subscribe(user)
+    disconnected = asyncio.create_task(wait_for_disconnect(websocket))
+    try:
+        while True:
+            next_payload = asyncio.create_task(subscription.next_payload(PUSH_HEARTBEAT_SECONDS))
+            await asyncio.wait({next_payload, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_payload.cancel()
+                break
+            # A client that cannot take a frame within the timeout is dropped
+            await asyncio.wait_for(websocket.send_text(next_payload.result()), timeout=PUSH_SEND_TIMEOUT_SECONDS)
+    except (WebSocketDisconnect, asyncio.TimeoutError, RuntimeError):
+        pass
+    finally:
+        disconnected.cancel()
+        push_bus.unsubscribe(subscription)
+
+@api_router.get("/events/stream")
+async def push_event_stream(request: Request, token: str = Query(...)):
+    """Server-sent events fallback of the push channel"""
+    user = await user_from_token(token)
+    
+    async def stream():
+        subscription = push_bus.subscribe(user)
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                payload = await subscription.next_payload(PUSH_HEARTBEAT_SECONDS)
+                yield f"data: {payload}\n\n"
+        finally:
+            push_bus.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Employee directory
+# The roster is small and mostly static, so lookups and typeahead run from memory:
+# an exact matricule map, a trigram index over the accent-folded words of names,
+# job titles and matricules, and a prefix map for one- and two-letter queries.
+# Each worker rebuilds it off the event loop when the roster fingerprint (the
+# version bumped by writers, plus the employee count) changes.
+EMPLOYEE_DIRECTORY_REFRESH_SECONDS = float(os.environ.get("EMPLOYEE_DIRECTORY_REFRESH_SECONDS", "30"))
+
+def employee_form_fields(employee: Dict[str, Any]) -> Dict[str, Any]:
+    """Employee in the shape the OM approval form fills itself from"""
+    return {
+        "matricule": employee["matricule"],
+        "fullName": f"{employee['full_name']} {employee['full_name1']}",
+        "jobTitle": employee['job_title'],
+        "division": employee['division'],
+        "itineraire": employee['itineraire'],
+        "service": employee['service']
+    }
+
+def word_trigrams(word: str) -> set:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+async def bump_employee_directory_version():
+    """Signal every worker that the roster changed, and reload this one now if it serves lookups"""
+    await db.directory_versions.update_one({"name": "employees"}, {"$inc": {"version": 1}}, upsert=True)
+    if employee_directory.loaded:
+        await employee_directory.refresh()
+
+def normalize_matricule(matricule: str) -> str:
+    """Matricules compare case- and whitespace-insensitively; imports store this form"""
+    return matricule.strip().upper()
+
+class EmployeeDirectory:
+    """In-memory employee index for matricule lookups and name/job title typeahead"""
+    
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.loaded = False
+        self._employees: List[Dict[str, Any]] = []
+        self._keys: List[tuple] = []  # (matricule, name, name words, job title words) per employee
+        self._by_matricule: Dict[str, Dict[str, Any]] = {}
+        self._trigrams: Dict[str, set] = {}
+        self._short_prefixes: Dict[str, set] = {}
+        self._fingerprint: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"reloads": 0, "lookups": 0, "searches": 0, "search_seconds": 0.0}
+    
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Employee directory refresh failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+    
+    async def refresh(self):
+        """Reload when the roster changed since the last load"""
+        state = await db.directory_versions.find_one({"name": "employees"})
+        fingerprint = (state["version"] if state else 0, await db.employees.estimated_document_count())
+        if fingerprint == self._fingerprint:
+            return
+        employees = await db.employees.find({}, {"_id": 0}).to_list(None)
+        index = await asyncio.get_running_loop().run_in_executor(None, self._build, employees)
+        self._employees, self._keys, self._by_matricule, self._trigrams, self._short_prefixes = index
+        self._fingerprint = fingerprint
+        self.loaded = True
+        self.stats["reloads"] += 1
+    
+    @staticmethod
+    def _build(employees: List[Dict[str, Any]]) -> tuple:
+        keys, by_matricule, trigrams, short_prefixes = [], {}, {}, {}
+        for position, employee in enumerate(employees):
+            matricule = fold_search_text(employee["matricule"].strip())
+            name_words = search_words(f"{employee['full_name']} {employee['full_name1']}")
+            title_words = search_words(employee.get("job_title"))
+            keys.append((matricule, " ".join(name_words), name_words, title_words))
+            by_matricule[normalize_matricule(employee["matricule"])] = employee
+            for word in {matricule, *name_words, *title_words}:
+                for gram in word_trigrams(word):
+                    trigrams.setdefault(gram, set()).add(position)
+                for length in (1, 2):
+                    if len(word) >= length:
+                        short_prefixes.setdefault(word[:length], set()).add(position)
+        return employees, keys, by_matricule, trigrams, short_prefixes
+    
+    def get(self, matricule: str) -> Optional[Dict[str, Any]]:
+        self.stats["lookups"] += 1
+        return self._by_matricule.get(normalize_matricule(matricule))
+    
+    def _candidates(self, word: str) -> set:
+        """Employees with a word containing `word` (starting with it, for short words)"""
+        if len(word) < 3:
+            return self._short_prefixes.get(word, set())
+        postings = [self._trigrams.get(gram) for gram in word_trigrams(word)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+    
+    def _rank(self, position: int, query_words: List[str]) -> Optional[tuple]:
+        """Sort key (lower is better): matricule, name, matricule prefix, job title, substring"""
+        matricule, name, name_words, title_words = self._keys[position]
+        query = " ".join(query_words)
+        if query == matricule:
+            return (0, 0, name)
+        if all(any(word.startswith(q) for word in name_words) for q in query_words):
+            return (1 if name == query else 2 if name.startswith(query) else 3, len(name), name)
+        if matricule.startswith(query):
+            return (4, len(matricule), name)
+        if all(any(word.startswith(q) for word in title_words) for q in query_words):
+            return (5, len(name), name)
+        if all(any(q in word for word in (matricule, *name_words, *title_words)) for q in query_words):
+            return (6, len(name), name)
+        return None
+    
+    def search(self, q: str, limit: int) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        query_words = search_words(q)[:5]
+        candidates = None
+        for word in query_words:
+            matches = self._candidates(word)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                break
+        ranked = []
+        for position in candidates or ():
+            rank = self._rank(position, query_words)
+            if rank is not None:
+                ranked.append((rank, position))
+        results = [self._employees[position] for _, position in heapq.nsmallest(limit, ranked)]
+        self.stats["searches"] += 1
+        self.stats["search_seconds"] += time.perf_counter() - started
+        return results
+    
+    def get_stats(self) -> Dict[str, Any]:
+        searches = self.stats["searches"]
+        return {
+            "employees": len(self._employees),
+            "reloads": self.stats["reloads"],
+            "lookups": self.stats["lookups"],
+            "searches": searches,
+            "avg_search_ms": round(self.stats["search_seconds"] / searches * 1000, 3) if searches else 0.0
+        }
+
+employee_directory = EmployeeDirectory(EMPLOYEE_DIRECTORY_REFRESH_SECONDS)
+
+# Employee import
+# HR roster exports (CSV or XLSX) are read row by row and upserted by matricule
+# in unordered bulk_write batches, so memory stays flat however large the file.
+# Headers are matched after accent folding ("Prénom" -> prenom); rows that fail
+# the Employee model are reported with their line number instead of aborting.
+EMPLOYEE_IMPORT_BATCH_SIZE = int(os.environ.get("EMPLOYEE_IMPORT_BATCH_SIZE", "1000"))
+EMPLOYEE_IMPORT_MAX_SIZE = 50 * 1024 * 1024
+EMPLOYEE_IMPORT_MAX_REJECTIONS = 100  # rejected rows listed in the report
+EMPLOYEE_IMPORT_COLUMNS = {
+    "matricule": "matricule",
+    "nom": "full_name",
+    "fullname": "full_name",
+    "prenom": "full_name1",
+    "fullname1": "full_name1",
+    "fonction": "job_title",
+    "poste": "job_title",
+    "jobtitle": "job_title",
+    "division": "division",
+    "itineraire": "itineraire",
+    "service": "service"
+}
+EMPLOYEE_IMPORT_FIELDS = ("matricule", "full_name", "full_name1", "job_title", "division", "itineraire", "service")
+
+def employee_import_header(header: List[Any]) -> Dict[int, str]:
+    """Map column positions to Employee fields, rejecting files that miss one"""
+    columns = {}
+    for position, title in enumerate(header):
+        field = EMPLOYEE_IMPORT_COLUMNS.get("".join(search_words(str(title or ""))))
+        if field and field not in columns.values():
+            columns[position] = field
+    missing = [field for field in EMPLOYEE_IMPORT_FIELDS if field not in columns.values()]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    return columns
+
+def iter_employee_csv(path: Path):
+    """Yield raw rows of a CSV export, sniffing the delimiter and legacy encodings"""
+    with open(path, 'rb') as f:
+        sample = f.read(64 * 1024)
+    try:
+        sample.decode('utf-8')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still UTF-8
+        encoding = 'utf-8-sig' if e.start >= len(sample) - 3 else 'cp1252'
+    text = sample.decode(encoding, errors='ignore')
+    try:
+        dialect = csv.Sniffer().sniff(text.split('\n', 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    with open(path, newline='', encoding=encoding) as f:
+        yield from csv.reader(f, dialect)
+
+def iter_employee_xlsx(path: Path):
+    """Yield raw rows of the first worksheet without loading the workbook in memory"""
+    if load_workbook is None:
+        raise ValueError("XLSX import requires openpyxl")
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        raise ValueError("The file is not a valid .xlsx workbook") from e
+    try:
+        if not workbook.worksheets:
+            raise ValueError("The workbook has no worksheet")
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+def iter_employee_rows(path: Path):
+    """Yield (line number, fields or None, errors) for every data row of an export"""
+    if path.suffix.lower() == ".xlsx":
+        rows = iter_employee_xlsx(path)
+    elif path.suffix.lower() in (".csv", ".txt"):
+        rows = iter_employee_csv(path)
+    else:
+        raise ValueError("Unsupported file type, expected .csv or .xlsx")
+    
+    columns = None
+    for line, row in enumerate(rows, start=1):
+        if not any(str(value).strip() for value in row):
+            continue
+        if columns is None:
+            columns = employee_import_header(row)
+            continue
+        fields = {field: str(row[position]).strip() if position < len(row) else "" for position, field in columns.items()}
+        fields["matricule"] = normalize_matricule(fields["matricule"])
+        missing = [field for field in ("matricule", "full_name", "full_name1") if not fields[field]]
+        if missing:
+            yield line, None, [f"{field}: required" for field in missing]
+            continue
+        try:
+            Employee(**fields)
+        except ValidationError as e:
+            yield line, None, [f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()]
+            continue
+        yield line, fields, []
+    if columns is None:
+        raise ValueError("The file has no header row")
+
+async def import_employees(path: Path, prune: bool = False) -> Dict[str, Any]:
+    """Upsert every valid row of an HR export; with prune, delete employees absent from it.
+    
+    Pruning is skipped when rows were rejected, since a rejected row may be a
+    current employee. The employee directory is reloaded once at the end.
+    """
+    loop = asyncio.get_running_loop()
+    rows = iter_employee_rows(path)
+    seen = set()
+    report = {
+        "rows": 0, "inserted": 0, "updated": 0, "unchanged": 0, "duplicates": 0,
+        "rejected": 0, "pruned": 0, "rejections": []
+    }
+    
+    def reject(line: int, errors: List[str]):
+        report["rejected"] += 1
+        if len(report["rejections"]) < EMPLOYEE_IMPORT_MAX_REJECTIONS:
+            report["rejections"].append({"line": line, "errors": errors})
+    
+    while True:
+        chunk = await loop.run_in_executor(None, lambda: list(itertools.islice(rows, EMPLOYEE_IMPORT_BATCH_SIZE)))
+        if not chunk:
+            break
+        report["rows"] += len(chunk)
+        batch: Dict[str, tuple] = {}  # the last row wins when a matricule repeats
+        for line, fields, errors in chunk:
+            if fields is None:
+                reject(line, errors)
+                continue
+            if fields["matricule"] in batch:
+                report["duplicates"] += 1
+            batch[fields["matricule"]] = (line, fields)
+        seen.update(batch)
+        if not batch:
+            continue
+        
+        lines = [line for line, _ in batch.values()]
+        operations = [
+            UpdateOne(
+                {"matricule": matricule},
+                {
+                    "$set": fields,
+                    "$setOnInsert": {"id": str(uuid.uuid4()), "created_at": datetime.utcnow()}
+                },
+                upsert=True
+            )
+            for matricule, (_, fields) in batch.items()
+        ]
+        try:
+            result = (await db.employees.bulk_write(operations, ordered=False)).bulk_api_result
+        except BulkWriteError as e:
+            result = e.details
+            for error in result.get("writeErrors", []):
+                reject(lines[error["index"]], [error.get("errmsg", "write failed")])
+        report["inserted"] += result.get("nUpserted", 0)
+        report["updated"] += result.get("nModified", 0)
+        report["unchanged"] += result.get("nMatched", 0) - result.get("nModified", 0)
+    
+    if prune and report["rejected"] == 0 and report["rows"]:
+        stale = [
+            employee["matricule"]
+            async for employee in db.employees.find({}, {"_id": 0, "matricule": 1})
+            if employee["matricule"] not in seen
+        ]
+        if stale:
+            report["pruned"] = (await db.employees.delete_many({"matricule": {"$in": stale}})).deleted_count
+    
+    await bump_employee_directory_version()
+    logger.info(
+        f"Employee import: {report['inserted']} inserted, {report['updated']} updated, "
+        f"{report['unchanged']} unchanged, {report['rejected']} rejected, {report['pruned']} pruned"
+    )
+    return report
+
+# Employee Lookup Routes
+@api_router.get("/employees")
+async def search_employees(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_user)
+):
+    """Typeahead over matricules, names and job titles, best matches first"""
+    if not employee_directory.loaded:
+        await employee_directory.refresh()
+    return {"employees": [employee_form_fields(employee) for employee in employee_directory.search(q, limit)]}
+
+@api_router.get("/employees/{matricule}")
 async def get_employee_by_matricule(
     matricule: str,
     current_user: User = Depends(get_current_user)
 ):
     """Get employee data by matricule for auto-populating OM Approval form"""
-    employee = await db.employees.find_one({"matricule": matricule})
+    if employee_directory.loaded:
+        employee = employee_directory.get(matricule)
+    else:
+        normalized = normalize_matricule(matricule)
+        employee = await db.employees.find_one({"matricule": normalized})
+        if not employee and normalized:
+            # Rows stored before imports normalized matricules; matches what the directory finds
+            employee = await db.employees.find_one(
+                {"matricule": {"$regex": f"^\\s*{re.escape(normalized)}\\s*$", "$options": "i"}}
+            )
     
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
     # Return the employee data in the format expected by the form
-    return {
-        "fullName": f"{employee['full_name']} {employee['full_name1']}",
-        "jobTitle": employee['job_title'],
-        "division": employee['division'],
-        "itineraire": employee['itineraire'],
-        "service": employee['service']
-    }
+    return employee_form_fields(employee)
+
+@api_router.post("/employees/import")
+async def import_employee_roster(
+    file: UploadFile = File(...),
+    prune: bool = Form(False),
+    admin_user: User = Depends(get_admin_user)
+):
+    """Upsert employees from an HR CSV/XLSX export (admin only)"""
+    suffix = Path(file.filename or "").suffix.lower()
+    temp_path = UPLOADS_DIR / f".import-{uuid.uuid4().hex}{suffix}"
+    await stream_upload(file, temp_path, EMPLOYEE_IMPORT_MAX_SIZE)
+    try:
+        return await import_employees(temp_path, prune=prune)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await aiofiles.os.remove(temp_path)
 
 # File Manager Routes
 @api_router.get("/file-manager/folders")
 async def get_folders(
     parent_id: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    user_names: UserNameLoader = Depends(get_user_name_loader)
 ):
     """Get folders and files in a specific directory"""
     try:
@@ -948,9 +2442,7 @@ async def get_folders(
         files = await db.file_items.find(file_query).sort("name", 1).to_list(100)
         
         # Get user information for folders
-        for folder in folders:
-            user = await db.users.find_one({"id": folder["created_by"]})
-            folder["created_by_name"] = user["full_name"] if user else "Unknown"
+        await user_names.attach_creator_names(folders)
         
         # Get current folder info and navigation path
         current_folder_info = None
@@ -963,20 +2455,21 @@ async def get_folders(
                 current_folder_info = current_folder
                 current_path = current_folder["path"]
                 
-                # Build navigation breadcrumb more safely
-                if current_folder["path"] and current_folder["path"] != "/":
-                    path_parts = current_folder["path"].strip("/").split("/")
-                    temp_path = ""
-                    for part in path_parts:
-                        temp_path = f"{temp_path}/{part}" if temp_path else f"/{part}"
-                        # Find the folder for this path part
-                        folder_for_part = await db.folders.find_one({"path": temp_path})
-                        if folder_for_part:
-                            navigation_path.append({
-                                "id": folder_for_part["id"],
-                                "name": folder_for_part["name"],
-                                "path": temp_path
-                            })
+                # Build navigation breadcrumb from the stored ancestry in one query
+                breadcrumb_ids = current_folder.get("ancestors", []) + [current_folder["id"]]
+                breadcrumb_folders = await db.folders.find(
+                    {"id": {"$in": breadcrumb_ids}},
+                    {"_id": 0, "id": 1, "name": 1, "path": 1}
+                ).to_list(len(breadcrumb_ids))
+                folders_by_id = {folder["id"]: folder for folder in breadcrumb_folders}
+                navigation_path = [
+                    {
+                        "id": folder_id,
+                        "name": folders_by_id[folder_id]["name"],
+                        "path": folders_by_id[folder_id]["path"]
+                    }
+                    for folder_id in breadcrumb_ids if folder_id in folders_by_id
+                ]
         
         # Convert MongoDB documents to Pydantic models to handle ObjectId serialization
         # But preserve the created_by_name field we just added
@@ -1016,18 +2509,25 @@ async def create_folder(
     if existing_folder:
         raise HTTPException(status_code=400, detail="Folder with this name already exists")
     
-    # Build the full path
-    parent_path = await get_folder_path(folder_data.parent_id) if folder_data.parent_id else ""
+    # Build the full path and ancestry
+    parent_path = ""
+    ancestors = []
+    if folder_data.parent_id:
+        parent = await db.folders.find_one({"id": folder_data.parent_id}, {"_id": 0, "path": 1, "ancestors": 1})
+        if parent:
+            parent_path = parent["path"]
+            ancestors = parent.get("ancestors", []) + [folder_data.parent_id]
     full_path = f"{parent_path}/{folder_data.name}".replace("//", "/")
     
     folder = Folder(
         name=folder_data.name,
         parent_id=folder_data.parent_id,
         path=full_path,
+        ancestors=ancestors,
         created_by=current_user.id
     )
     
-    await db.folders.insert_one(folder.dict())
+    await db.folders.insert_one({**folder.dict(), "search_keys": search_index_keys(folder.name)})
     
     # Return folder with created_by_name for frontend display
     return {
@@ -1035,6 +2535,7 @@ async def create_folder(
         "name": folder.name,
         "parent_id": folder.parent_id,
         "path": folder.path,
+        "ancestors": folder.ancestors,
         "created_by": folder.created_by,
         "created_by_name": current_user.full_name,
         "created_at": folder.created_at,
@@ -1045,7 +2546,8 @@ async def create_folder(
 async def update_folder(
     folder_id: str,
     folder_data: FolderUpdate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    user_names: UserNameLoader = Depends(get_user_name_loader)
 ):
     """Update folder name"""
     folder = await db.folders.find_one({"id": folder_id})
@@ -1066,25 +2568,18 @@ async def update_folder(
     if existing_folder:
         raise HTTPException(status_code=400, detail="Folder with this name already exists")
     
-    # Update folder name and path
+    # Update folder name and path, then rewrite the path prefix of the whole subtree
     parent_path = await get_folder_path(folder["parent_id"]) if folder["parent_id"] else ""
     new_full_path = f"{parent_path}/{folder_data.name}".replace("//", "/")
     
-    update_data = {
-        "name": folder_data.name,
-        "path": new_full_path,
-        "updated_at": datetime.utcnow()
-    }
-    
-    await db.folders.update_one({"id": folder_id}, {"$set": update_data})
-    
-    # Update paths of all subfolders recursively
-    await update_subfolder_paths(folder_id, new_full_path)
+    await run_in_transaction(
+        lambda session: rename_folder_subtree(folder, folder_data.name, new_full_path, session)
+    )
     
     updated_folder = await db.folders.find_one({"id": folder_id})
     
     # Add created_by_name for frontend display
-    user = await db.users.find_one({"id": updated_folder["created_by"]})
+    created_by_name = await user_names.load(updated_folder["created_by"])
     
     return {
         "id": updated_folder["id"],
@@ -1092,7 +2587,7 @@ async def update_folder(
         "parent_id": updated_folder["parent_id"],
         "path": updated_folder["path"],
         "created_by": updated_folder["created_by"],
-        "created_by_name": user["full_name"] if user else "Unknown",
+        "created_by_name": created_by_name,
         "created_at": updated_folder["created_at"],
         "updated_at": updated_folder["updated_at"]
     }
@@ -1111,13 +2606,11 @@ async def delete_folder(
     if folder["created_by"] != current_user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized to delete this folder")
     
-    # Delete all files in this folder and subfolders
-    await delete_folder_contents(folder_id)
+    # Delete the folder, its subfolders and their files; stored files are reclaimed in the background
+    deleted = await run_in_transaction(lambda session: delete_folder_subtree(folder_id, session))
+    file_reclaimer.wake()
     
-    # Delete the folder itself
-    await db.folders.delete_one({"id": folder_id})
-    
-    return {"message": "Folder deleted successfully"}
+    return {"message": "Folder deleted successfully", **deleted}
 
 @api_router.post("/file-manager/upload")
 async def upload_files_to_folder(
@@ -1136,33 +2629,28 @@ async def upload_files_to_folder(
     uploaded_files = []
     
     for file in files:
-        # Check file size (10MB limit per file)
-        content = await file.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail=f"File {file.filename} is too large (max 10MB)")
-        
-        # Create unique filename
-        file_extension = file.filename.split(".")[-1] if "." in file.filename else ""
-        unique_filename = f"fm_{uuid.uuid4()}.{file_extension}"
-        file_path = upload_folder / unique_filename
-        
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(content)
+        # Store file content-addressed (10MB limit per file)
+        saved = await store_upload_file(file, upload_folder)
         
         # Create file item record
         file_item = FileItem(
             name=file.filename,
             original_name=file.filename,
-            file_path=str(file_path),
+            file_path=saved["file_path"],
             folder_id=folder_id,
-            file_size=len(content),
+            file_size=saved["file_size"],
+            checksum=saved["checksum"],
             mime_type=file.content_type or "application/octet-stream",
             created_by=current_user.id,
             uploaded_by_name=current_user.full_name
         )
         
-        await db.file_items.insert_one(file_item.dict())
+        await db.file_items.insert_one({
+            **file_item.dict(),
+            "search_keys": search_index_keys(file_item.name, file_item.original_name)
+        })
+        content_indexer.submit("file_item", file_item.id)
+        thumbnail_cache.prefetch(file_item.dict())
         uploaded_files.append(file_item)
     
     return {
@@ -1184,12 +2672,12 @@ async def delete_file(
     if file_item["created_by"] != current_user.id and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized to delete this file")
     
-    # Delete physical file
-    if os.path.exists(file_item["file_path"]):
-        os.remove(file_item["file_path"])
-    
     # Delete database record
     await db.file_items.delete_one({"id": file_id})
+    await db.content_index.delete_many({"source": "file_item", "source_id": file_id})
+    
+    # Release physical file
+    await release_stored_file(file_item["file_path"], file_item.get("checksum"))
     
     return {"message": "File deleted successfully"}
 
@@ -1216,10 +2704,12 @@ async def rename_file(
     update_data = {
         "name": new_name.strip(),
         "original_name": new_name.strip(),
+        "search_keys": search_index_keys(new_name.strip()),
         "updated_at": datetime.utcnow()
     }
     
     await db.file_items.update_one({"id": file_id}, {"$set": update_data})
+    content_indexer.submit("file_item", file_id)
     
     # Return updated file info
     updated_file = await db.file_items.find_one({"id": file_id})
@@ -1237,6 +2727,24 @@ async def rename_file(
         "updated_at": updated_file["updated_at"]
     }
 
+# Text previews read at most PREVIEW_MAX_CHARS characters worth of bytes and are
+# memoized per file id, modification time and size.
+PREVIEW_MAX_CHARS = 10000
+preview_snippet_cache = TTLCache(maxsize=512, ttl=3600)
+
+async def read_text_preview(path: str, file_size: int, max_chars: int = PREVIEW_MAX_CHARS) -> Dict[str, Any]:
+    # UTF-8 needs at most 4 bytes per character, Windows-1252 one
+    limit = max_chars * 4
+    async with aiofiles.open(path, "rb") as f:
+        data = await f.read(limit)
+    
+    complete = file_size <= limit
+    encoding = detect_text_encoding(data, final=complete)
+    content = decode_text_bytes(data, final=complete)
+    if len(content) > max_chars or not complete:
+        content = content[:max_chars] + "\n... (content truncated)"
+    return {"content": content, "encoding": encoding}
+
 @api_router.get("/file-manager/preview/{file_id}")
 async def preview_file(
     file_id: str,
@@ -1247,31 +2755,34 @@ async def preview_file(
     if not file_item:
         raise HTTPException(status_code=404, detail="File not found")
     
-    if not os.path.exists(file_item["file_path"]):
+    try:
+        stat_result = await aiofiles.os.stat(file_item["file_path"])
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Physical file not found")
     
     file_extension = file_item["name"].split(".")[-1].lower() if "." in file_item["name"] else ""
     
-    # For text files, read content
+    # For text files, read the beginning of the content
     if file_extension in ['txt', 'md', 'csv', 'json', 'xml', 'html', 'css', 'js', 'py']:
-        try:
-            with open(file_item["file_path"], 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Limit content size for preview (first 10000 characters)
-                if len(content) > 10000:
-                    content = content[:10000] + "\n... (content truncated)"
-                
-                return {
-                    "file_id": file_id,
-                    "name": file_item["name"],
-                    "file_size": file_item["file_size"],
-                    "mime_type": file_item["mime_type"],
-                    "preview_type": "text",
-                    "content": content,
-                    "can_preview": True
-                }
-        except UnicodeDecodeError:
-            pass
+        cache_key = (file_id, stat_result.st_mtime_ns, stat_result.st_size)
+        preview = preview_snippet_cache.get(cache_key)
+        if preview is None:
+            preview = await read_text_preview(file_item["file_path"], stat_result.st_size)
+            preview_snippet_cache.set(cache_key, preview)
+        
+        return {
+            "file_id": file_id,
+            "name": file_item["name"],
+            "file_size": file_item["file_size"],
+            "mime_type": file_item["mime_type"],
+            "preview_type": "text",
+            "content": preview["content"],
+            "encoding": preview["encoding"],
+            "can_preview": True
+        }
+    
+    # Downscaled rendition for images and PDFs when the renderers are installed
+    thumbnail_url = f"/api/file-manager/thumbnail/{file_id}" if thumbnail_cache.can_render(file_item["name"]) else None
     
     # For images, return file info for direct display
     if file_extension in ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 'svg']:
@@ -1282,6 +2793,7 @@ async def preview_file(
             "mime_type": file_item["mime_type"],
             "preview_type": "image",
             "file_url": f"/api/file-manager/download/{file_id}",
+            "thumbnail_url": thumbnail_url,
             "can_preview": True
         }
     
@@ -1294,6 +2806,7 @@ async def preview_file(
             "mime_type": file_item["mime_type"],
             "preview_type": "pdf",
             "file_url": f"/api/file-manager/download/{file_id}",
+            "thumbnail_url": thumbnail_url,
             "can_preview": True
         }
     
@@ -1321,37 +2834,382 @@ async def preview_file(
         "message": "Preview not available for this file type. Click download to view the file."
     }
 
-# Calendar Management Routes
-@api_router.get("/calendar/events")
-async def get_calendar_events(
-    start_date: Optional[str] = Query(None),
-    end_date: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user)
-):
-    """Get calendar events for a date range"""
+# Calendar windows and recurrence
+# A recurring event is stored once with its rule and expanded per requested
+# window. series_end holds the end of its last occurrence (CALENDAR_OPEN_END when
+# the series never ends, end_date for single events), so one series_end range plus
+# start_date <= window end selects single events and series alike. Most events
+# end in the past, so with windows capped at CALENDAR_MAX_WINDOW_DAYS the
+# series_end range of each visibility index stays short.
+CALENDAR_OPEN_END = datetime(9999, 12, 31)
+CALENDAR_MAX_WINDOW_DAYS = int(os.environ.get("CALENDAR_MAX_WINDOW_DAYS", "366"))
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Naive UTC datetime, as MongoDB stores and returns them"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def add_months(value: datetime, months: int) -> Optional[datetime]:
+    """Same day and time `months` later, or None when that month has no such day"""
+    month_index = value.month - 1 + months
     try:
-        query = {}
+        return value.replace(year=value.year + month_index // 12, month=month_index % 12 + 1)
+    except ValueError:
+        return None
+
+def iter_occurrence_starts(start: datetime, recurrence: Dict[str, Any], not_before: datetime):
+    """Occurrence starts of a series in order, from the period containing `not_before`.
+    
+    Earlier periods are skipped arithmetically; count and until are left to the
+    caller, which stops consuming once past its window.
+    """
+    interval = recurrence.get("interval") or 1
+    if recurrence["frequency"] == RecurrenceFrequency.MONTHLY:
+        months_before = (not_before.year - start.year) * 12 + not_before.month - start.month
+        period = max(0, months_before // interval)
+        while start.year + (start.month - 1 + period * interval) // 12 < CALENDAR_OPEN_END.year:
+            occurrence = add_months(start, period * interval)
+            if occurrence is not None:
+                yield occurrence
+            period += 1
+        return
+    
+    weekdays = sorted(set(recurrence.get("weekdays") or []))
+    if recurrence["frequency"] == RecurrenceFrequency.WEEKLY and weekdays:
+        anchor = start - timedelta(days=start.weekday())
+        offsets = [timedelta(days=day) for day in weekdays]
+    else:
+        anchor = start
+        offsets = [timedelta(0)]
+    step = timedelta(days=interval * (7 if recurrence["frequency"] == RecurrenceFrequency.WEEKLY else 1))
+    period = max(0, (not_before - anchor) // step)
+    try:
+        while True:
+            base = anchor + period * step
+            for offset in offsets:
+                if base + offset >= start:
+                    yield base + offset
+            period += 1
+    except OverflowError:
+        return
+
+def compute_series_end(start: datetime, end: datetime, recurrence: Optional[Dict[str, Any]]) -> datetime:
+    """End of the last occurrence; an upper bound for series limited by until only"""
+    if not recurrence:
+        return end
+    if any(day not in range(7) for day in recurrence.get("weekdays") or []):
+        raise HTTPException(status_code=400, detail="Recurrence weekdays must be between 0 (Monday) and 6 (Sunday)")
+    until = recurrence.get("until")
+    if until is not None and until < start:
+        raise HTTPException(status_code=400, detail="Recurrence must end after the event starts")
+    count = recurrence.get("count")
+    if count is None:
+        return until + (end - start) if until is not None else CALENDAR_OPEN_END
+    last = start
+    for number, occurrence in enumerate(iter_occurrence_starts(start, recurrence, start), 1):
+        if until is not None and occurrence > until:
+            break
+        last = occurrence
+        if number >= count:
+            break
+    return last + (end - start)
+
+def expand_event(event: Dict[str, Any], window_start: datetime, window_end: datetime):
+    """Yield (occurrence start, event) for each occurrence overlapping the window, in order"""
+    start, end = event["start_date"], event["end_date"]
+    recurrence = event.get("recurrence")
+    if not recurrence:
+        if start <= window_end and end >= window_start:
+            yield start, event
+        return
+    duration = end - start
+    until = recurrence.get("until")
+    series_end = event.get("series_end") or CALENDAR_OPEN_END
+    for occurrence in iter_occurrence_starts(start, recurrence, window_start - duration):
+        if occurrence > window_end or (until is not None and occurrence > until) or occurrence + duration > series_end:
+            return
+        if occurrence + duration >= window_start:
+            yield occurrence, event
+
+def calendar_occurrence(occurrence_start: datetime, event: Dict[str, Any]) -> Dict[str, Any]:
+    """Event as returned by the API; occurrences of a series carry the series' own dates"""
+    data = CalendarEvent(**event).dict()
+    if event.get("recurrence"):
+        data["series_start_date"] = event["start_date"]
+        data["series_end_date"] = event["end_date"]
+        data["start_date"] = occurrence_start
+        data["end_date"] = occurrence_start + (event["end_date"] - event["start_date"])
+    return data
+
+def attendee_match(user: User) -> Dict[str, Any]:
+    """Attendees are listed by email or username; events listing the user either way"""
+    return {"attendees": {"$in": [user.email, user.username]}}
+
+def attendee_users_query(attendees: List[str]) -> Dict[str, Any]:
+    """Active users an attendee list refers to, by email or username"""
+    return {"$or": [{"email": {"$in": attendees}}, {"username": {"$in": attendees}}], "is_active": {"$ne": False}}
+
+def calendar_window_query(current_user: User, window_start: datetime, window_end: datetime) -> Dict[str, Any]:
+    """Events visible to the user that may overlap the window, one index per $or branch"""
+    window = {"series_end": {"$gte": window_start}, "start_date": {"$lte": window_end}}
+    return {"$or": [
+        {"visibility": "public", **window},
+        {"created_by": current_user.id, **window},
+        {**attendee_match(current_user), **window}
+    ]}
+
+# Calendar reminders
+# Each event stores next_reminder_at, the reminder time of its next occurrence,
+# and next_reminder_occurrence, that occurrence's start. Together they are the
+# event's watermark: everything before has been reminded. The scheduler keeps a
+# min-heap of the reminders due within REMINDER_HORIZON_SECONDS, loaded
+# incrementally from the next_reminder_at index, and sleeps until the earliest.
+# Firing inserts one message per recipient under a deterministic id, then
+# advances the watermark with a conditional update, so neither a restart nor a
+# second worker can deliver the same reminder twice.
+REMINDER_HORIZON_SECONDS = int(os.environ.get("REMINDER_HORIZON_SECONDS", "900"))
+REMINDER_MAX_LATENESS_MINUTES = int(os.environ.get("REMINDER_MAX_LATENESS_MINUTES", "60"))
+REMINDER_BATCH_SIZE = 500
+REMINDER_SENDER_ID = "system"  # not a user; shown as REMINDER_SENDER_NAME in conversations
+REMINDER_SENDER_NAME = "Calendrier"
+
+def to_mongo_precision(value: datetime) -> datetime:
+    """Truncate to milliseconds, so values compare equal after a round trip"""
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+def next_event_reminder(event: Dict[str, Any], after: datetime) -> Dict[str, Optional[datetime]]:
+    """Watermark fields for the first occurrence starting after `after`"""
+    minutes = event.get("reminder_minutes") or 0
+    occurrence = None
+    if minutes > 0:
+        for occurrence_start, _ in expand_event(event, after, CALENDAR_OPEN_END - timedelta(days=1)):
+            if to_mongo_precision(occurrence_start) > after:
+                occurrence = to_mongo_precision(occurrence_start)
+                break
+    if occurrence is None:
+        return {"next_reminder_at": None, "next_reminder_occurrence": None}
+    return {"next_reminder_at": occurrence - timedelta(minutes=minutes), "next_reminder_occurrence": occurrence}
+
+def reminder_message(event: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    occurrence = event["next_reminder_occurrence"]
+    content = f"« {event['title']} » commence le {occurrence:%d/%m/%Y à %H:%M} (UTC)."
+    if event.get("location"):
+        content += f" Lieu : {event['location']}."
+    return Message(
+        id=f"reminder:{event['id']}:{occurrence.isoformat()}:{user_id}",
+        subject=f"Rappel : {event['title']}",
+        content=content,
+        sender_id=REMINDER_SENDER_ID,
+        recipient_id=user_id
+    ).dict()
+
+class ReminderScheduler:
+    """Delivers calendar reminders as messages from a min-heap of upcoming reminder times"""
+    
+    def __init__(self, horizon_seconds: int, batch_size: int):
+        self.horizon = timedelta(seconds=horizon_seconds)
+        self.batch_size = batch_size
+        self._heap: List[tuple] = []
+        self._loaded_until: Optional[datetime] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"loaded": 0, "fired": 0, "messages": 0, "skipped_late": 0, "stale": 0}
+    
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def wake(self):
+        if self._wakeup:
+            self._wakeup.set()
+    
+    def schedule(self, event_id: str, reminder_at: Optional[datetime]):
+        """Track a reminder set by a write; ones past the loaded horizon come with a later load"""
+        if reminder_at is None or self._loaded_until is None or reminder_at > self._loaded_until:
+            return
+        heapq.heappush(self._heap, (reminder_at, event_id))
+        self.wake()
+    
+    async def _run(self):
+        while True:
+            timeout = 5.0
+            try:
+                now = datetime.utcnow()
+                if self._loaded_until is None or self._loaded_until - now < self.horizon / 2:
+                    await self._load(now + self.horizon)
+                await self.fire_due(now)
+                # Sleep until the earliest reminder or the next load, whichever comes first
+                next_check = self._loaded_until - self.horizon / 2
+                if self._heap:
+                    next_check = min(next_check, self._heap[0][0])
+                timeout = max(0.0, (next_check - datetime.utcnow()).total_seconds())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reminder scheduler failed: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+    
+    async def _load(self, until: datetime):
+        """Push reminders due up to `until` that the previous loads did not cover"""
+        previous = self._loaded_until
+        query = {"next_reminder_at": {"$type": "date", "$lte": until}}
+        if previous is not None:
+            query["next_reminder_at"]["$gt"] = previous
+        # Raised first so that schedule() covers writes racing with the scan
+        self._loaded_until = until
+        try:
+            cursor = db.calendar_events.find(query, {"_id": 0, "id": 1, "next_reminder_at": 1}).batch_size(1000)
+            async for event in cursor:
+                heapq.heappush(self._heap, (event["next_reminder_at"], event["id"]))
+                self.stats["loaded"] += 1
+        except Exception:
+            self._loaded_until = previous
+            raise
+    
+    async def fire_due(self, now: datetime):
+        while self._heap and self._heap[0][0] <= now:
+            due = []
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                due.append(heapq.heappop(self._heap))
+            await self._fire(due, now)
+    
+    async def _fire(self, due: List[tuple], now: datetime):
+        events = await db.calendar_events.find(
+            {"id": {"$in": list({event_id for _, event_id in due})}}, {"_id": 0}
+        ).to_list(None)
+        by_id = {event["id"]: event for event in events}
         
-        # Add date filters if provided
-        if start_date and end_date:
-            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            query["$or"] = [
-                {
-                    "start_date": {"$lte": end_dt},
-                    "end_date": {"$gte": start_dt}
-                }
-            ]
+        # Entries whose event was deleted or rescheduled since they were pushed are stale
+        current = {}
+        for reminder_at, event_id in due:
+            event = by_id.get(event_id)
+            if event is None or event.get("next_reminder_at") != reminder_at or event_id in current:
+                self.stats["stale"] += 1
+                continue
+            current[event_id] = event
         
-        events = await db.calendar_events.find(query).sort("start_date", 1).to_list(1000)
+        late_cutoff = now - timedelta(minutes=REMINDER_MAX_LATENESS_MINUTES)
+        on_time = [event for event in current.values() if event["next_reminder_at"] >= late_cutoff]
+        self.stats["skipped_late"] += len(current) - len(on_time)
+        recipients = await self._recipients(on_time)
+        messages = [reminder_message(event, user_id) for event in on_time for user_id in recipients[event["id"]]]
+        # Messages delivered before a restart already exist and are skipped
+        delivered = await deliver_messages(messages) if messages else []
+        self.stats["fired"] += len(on_time)
+        self.stats["messages"] += len(delivered)
         
-        return {
-            "events": [CalendarEvent(**event).dict() for event in events]
+        # Advance each watermark to the next occurrence, unless the event changed meanwhile
+        operations = []
+        for event in current.values():
+            upcoming = next_event_reminder(event, event["next_reminder_occurrence"])
+            operations.append(UpdateOne({"id": event["id"], "next_reminder_at": event["next_reminder_at"]}, {"$set": upcoming}))
+            self.schedule(event["id"], upcoming["next_reminder_at"])
+        if operations:
+            await db.calendar_events.bulk_write(operations, ordered=False)
+    
+    async def _recipients(self, events: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Creator and attendees matching a user's email or username, minus opted-out users"""
+        attendees = list({attendee for event in events for attendee in event.get("attendees") or []})
+        user_ids_by_key = {}
+        if attendees:
+            async for user in db.users.find(
+                attendee_users_query(attendees),
+                {"_id": 0, "id": 1, "email": 1, "username": 1}
+            ):
+                user_ids_by_key[user["email"]] = user["id"]
+                user_ids_by_key[user["username"]] = user["id"]
+        per_event = {
+            event["id"]: {event["created_by"]} | {
+                user_ids_by_key[attendee] for attendee in event.get("attendees") or [] if attendee in user_ids_by_key
+            }
+            for event in events
         }
-        
-    except Exception as e:
-        print(f"Error in get_calendar_events: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to load calendar events: {str(e)}")
+        all_ids = set().union(*per_event.values()) if per_event else set()
+        opted_out = set(await db.user_settings.distinct(
+            "user_id", {"user_id": {"$in": list(all_ids)}, "calendar_reminders": False}
+        )) if all_ids else set()
+        return {event_id: sorted(user_ids - opted_out) for event_id, user_ids in per_event.items()}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["scheduled"] = len(self._heap)
+        stats["next_due"] = self._heap[0][0] if self._heap else None
+        stats["loaded_until"] = self._loaded_until
+        return stats
+
+reminder_scheduler = ReminderScheduler(REMINDER_HORIZON_SECONDS, REMINDER_BATCH_SIZE)
+
+async def publish_calendar_change(event: Dict[str, Any], action: str):
+    """Public events concern everyone; private ones their creator and attendees"""
+    data = {"id": event["id"], "action": action}
+    if event.get("visibility", "public") == "public":
+        push_bus.publish("calendar.changed", data, everyone=True)
+        return
+    user_ids = [event["created_by"]]
+    if event.get("attendees"):
+        user_ids += await db.users.distinct("id", attendee_users_query(event["attendees"]))
+    push_bus.publish("calendar.changed", data, user_ids)
+
+# Calendar Management Routes
+@api_router.get("/calendar/events")
+async def get_calendar_events(
+    start_date: datetime = Query(...),
+    end_date: datetime = Query(...),
+    limit: int = Query(500, ge=1, le=2000),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Event occurrences overlapping [start_date, end_date], in start order.
+    
+    The window is required and spans at most CALENDAR_MAX_WINDOW_DAYS. Pass the
+    returned next_cursor back as `cursor` for the following page.
+    """
+    window_start, window_end = to_utc_naive(start_date), to_utc_naive(end_date)
+    if window_end < window_start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if window_end - window_start > timedelta(days=CALENDAR_MAX_WINDOW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {CALENDAR_MAX_WINDOW_DAYS} days")
+    
+    # Nothing on later pages ends before the cursor's occurrence starts
+    after = decode_cursor(cursor, "start_date") if cursor else None
+    scan_from = max(window_start, after["start_date"]) if after else window_start
+    events = await db.calendar_events.find(
+        calendar_window_query(current_user, scan_from, window_end), {"_id": 0}
+    ).to_list(None)
+    
+    occurrences = heapq.merge(
+        *(expand_event(event, window_start, window_end) for event in events),
+        key=lambda item: (item[0], item[1]["id"])
+    )
+    if after:
+        occurrences = itertools.dropwhile(
+            lambda item: (item[0], item[1]["id"]) <= (after["start_date"], after["id"]), occurrences
+        )
+    page = list(itertools.islice(occurrences, limit + 1))
+    
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor({"start_date": page[-1][0], "id": page[-1][1]["id"]}, "start_date")
+    
+    return {
+        "events": [calendar_occurrence(occurrence_start, event) for occurrence_start, event in page],
+        "next_cursor": next_cursor
+    }
 
 @api_router.post("/calendar/events")
 async def create_calendar_event(
@@ -1360,15 +3218,20 @@ async def create_calendar_event(
 ):
     """Create a new calendar event"""
     try:
+        start_date, end_date = to_utc_naive(event_data.start_date), to_utc_naive(event_data.end_date)
         # Validate dates
-        if event_data.end_date <= event_data.start_date:
+        if end_date <= start_date:
             raise HTTPException(status_code=400, detail="End date must be after start date")
         
+        recurrence = event_data.recurrence.dict() if event_data.recurrence else None
+        if recurrence and recurrence["until"]:
+            recurrence["until"] = to_utc_naive(recurrence["until"])
+        
         event = CalendarEvent(
             title=event_data.title,
             description=event_data.description,
-            start_date=event_data.start_date,
-            end_date=event_data.end_date,
+            start_date=start_date,
+            end_date=end_date,
             all_day=event_data.all_day,
             color=event_data.color,
             created_by=current_user.id,
@@ -1376,10 +3239,17 @@ async def create_calendar_event(
             attendees=event_data.attendees,
             location=event_data.location,
             reminder_minutes=event_data.reminder_minutes,
-            category=event_data.category
+            category=event_data.category,
+            visibility=event_data.visibility,
+            recurrence=recurrence,
+            series_end=compute_series_end(start_date, end_date, recurrence)
         )
         
-        await db.calendar_events.insert_one(event.dict())
+        document = event.dict()
+        document.update(next_event_reminder(document, datetime.utcnow()))
+        await db.calendar_events.insert_one(document)
+        reminder_scheduler.schedule(event.id, document["next_reminder_at"])
+        await publish_calendar_change(document, "created")
         
         return event.dict()
         
@@ -1405,20 +3275,38 @@ async def update_calendar_event(
         if event["created_by"] != current_user.id and current_user.role != UserRole.ADMIN:
             raise HTTPException(status_code=403, detail="Not authorized to edit this event")
         
-        # Build update data
+        # Build update data; an explicit null recurrence ends the series
         update_data = {"updated_at": datetime.utcnow()}
         for field, value in event_data.dict(exclude_unset=True).items():
-            if value is not None:
+            if value is not None or field == "recurrence":
                 update_data[field] = value
+        for field in ("start_date", "end_date"):
+            if field in update_data:
+                update_data[field] = to_utc_naive(update_data[field])
+        if update_data.get("recurrence") and update_data["recurrence"]["until"]:
+            update_data["recurrence"]["until"] = to_utc_naive(update_data["recurrence"]["until"])
+        
+        # Validate the resulting dates and recompute where the series ends
+        start_date = update_data.get("start_date", event["start_date"])
+        end_date = update_data.get("end_date", event["end_date"])
+        if end_date <= start_date:
+            raise HTTPException(status_code=400, detail="End date must be after start date")
+        update_data["series_end"] = compute_series_end(
+            start_date, end_date, update_data.get("recurrence", event.get("recurrence"))
+        )
         
-        # Validate dates if both are being updated
-        if "start_date" in update_data and "end_date" in update_data:
-            if update_data["end_date"] <= update_data["start_date"]:
-                raise HTTPException(status_code=400, detail="End date must be after start date")
+        # Reminders restart from the next occurrence when the timing changes; an
+        # occurrence that was already reminded keeps its message id and is not sent again
+        timing_fields = {"start_date", "end_date", "recurrence", "reminder_minutes"}
+        if timing_fields & update_data.keys():
+            update_data.update(next_event_reminder({**event, **update_data}, datetime.utcnow()))
         
         await db.calendar_events.update_one({"id": event_id}, {"$set": update_data})
+        if "next_reminder_at" in update_data:
+            reminder_scheduler.schedule(event_id, update_data["next_reminder_at"])
         
         updated_event = await db.calendar_events.find_one({"id": event_id})
+        await publish_calendar_change(updated_event, "updated")
         return CalendarEvent(**updated_event).dict()
         
     except HTTPException:
@@ -1443,6 +3331,7 @@ async def delete_calendar_event(
             raise HTTPException(status_code=403, detail="Not authorized to delete this event")
         
         await db.calendar_events.delete_one({"id": event_id})
+        await publish_calendar_change(event, "deleted")
         
         return {"message": "Event deleted successfully"}
         
@@ -1529,17 +3418,22 @@ async def change_password(
     try:
         # Verify current password
         user = await db.users.find_one({"id": current_user.id})
-        if not user or not pwd_context.verify(password_data.current_password, user["password"]):
+        if not user or not await verify_password(password_data.current_password, user["password"]):
             raise HTTPException(status_code=400, detail="Current password is incorrect")
         
         # Hash new password
-        hashed_password = pwd_context.hash(password_data.new_password)
+        hashed_password = await hash_password(password_data.new_password)
         
-        # Update password
-        await db.users.update_one(
+        # Update password and revoke tokens issued with the old one
+        updated_user = await db.users.find_one_and_update(
             {"id": current_user.id},
-            {"$set": {"password": hashed_password, "updated_at": datetime.utcnow()}}
+            {
+                "$set": {"password": hashed_password, "updated_at": datetime.utcnow()},
+                "$inc": {"token_version": 1}
+            },
+            return_document=ReturnDocument.AFTER
         )
+        invalidate_auth_user(current_user.username)
         
         # Update settings to mark password change as completed
         await db.user_settings.update_one(
@@ -1547,7 +3441,13 @@ async def change_password(
             {"$set": {"password_change_required": False, "updated_at": datetime.utcnow()}}
         )
         
-        return {"message": "Password changed successfully"}
+        # Replacement token so the current session survives the revocation
+        access_token = create_access_token(
+            data={"sub": updated_user["username"], "ver": updated_user["token_version"]},
+            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        
+        return {"message": "Password changed successfully", "access_token": access_token, "token_type": "bearer"}
         
     except HTTPException:
         raise
@@ -1639,6 +3539,21 @@ async def get_system_info(
             "system_settings": {
                 "signup_enabled": signup_enabled
             },
+            "cache_stats": {
+                "auth_users": auth_user_cache.stats(),
+                "dashboard_stats": dashboard_stats_cache.stats(),
+                "user_names": user_display_name_cache.stats(),
+                "thumbnails": thumbnail_cache.stats(),
+                "text_previews": preview_snippet_cache.stats(),
+                "employee_directory": employee_directory.get_stats()
+            },
+            "worker_pools": {
+                "password_hashing": get_password_pool_stats(),
+                "file_reclaimer": await file_reclaimer.get_stats(),
+                "content_indexer": content_indexer.get_stats(),
+                "reminder_scheduler": reminder_scheduler.get_stats(),
+                "push": push_bus.get_stats()
+            },
             "system_status": {
                 "status": "healthy",
                 "uptime": "Available",
@@ -1697,9 +3612,336 @@ async def toggle_signup(
         print(f"Error toggling signup: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to toggle signup: {str(e)}")
 
+# File downloads with Range and conditional GET support
+def parse_byte_range(range_header: str, file_size: int) -> Optional[tuple]:
+    """Parse a single-range `bytes=` header into inclusive (start, end).
+    
+    Returns None when the header should be ignored (malformed or multi-range,
+    which are answered with the full file) and raises 416 when unsatisfiable.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else file_size - 1
+        else:
+            # Suffix range: the last N bytes
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise ValueError
+            start = max(file_size - suffix, 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+    
+    if start >= file_size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, min(end, file_size - 1)
+
+async def iter_file_range(path: str, start: int, length: int):
+    async with aiofiles.open(path, 'rb') as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(UPLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match names this ETag"""
+    candidates = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def attachment_disposition(filename: str) -> str:
+    quoted_filename = urllib.parse.quote(filename)
+    if quoted_filename != filename:
+        return f"attachment; filename*=utf-8''{quoted_filename}"
+    return f'attachment; filename="{filename}"'
+
+async def file_download_response(
+    request: Request,
+    path: str,
+    filename: str,
+    media_type: Optional[str],
+    checksum: Optional[str] = None,
+    cache_control: str = "private, no-cache"
+) -> Response:
+    """Serve a stored file with ETag/Last-Modified validation and byte ranges"""
+    stat_result = await aiofiles.os.stat(path)
+    file_size = stat_result.st_size
+    
+    # Content hash when known, otherwise size + mtime of the stored file
+    etag = f'"{checksum}"' if checksum else f'"{file_size:x}-{stat_result.st_mtime_ns:x}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control
+    }
+    media_type = media_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    
+    # Conditional GET: If-None-Match takes precedence over If-Modified-Since
+    if request.headers.get("if-none-match"):
+        if etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                since = None
+            if since is not None and int(stat_result.st_mtime) <= since:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = parse_byte_range(range_header, file_size)
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            return StreamingResponse(
+                iter_file_range(path, start, length),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{file_size}",
+                    "Content-Length": str(length),
+                    "Content-Disposition": attachment_disposition(filename)
+                }
+            )
+    
+    return FileResponse(
+        path=path,
+        filename=filename,
+        media_type=media_type,
+        headers=headers,
+        stat_result=stat_result
+    )
+
+# Thumbnail renditions
+# JPEG thumbnails of images and of the first page of PDFs, rendered on a thread
+# pool on upload or on first request. Renditions are keyed by blob checksum (or
+# path and mtime for legacy files) and size, and kept in THUMBNAIL_CACHE_DIR up
+# to THUMBNAIL_CACHE_MAX_MB, evicting the least recently served first.
+THUMBNAIL_CACHE_DIR = Path(os.environ.get("THUMBNAIL_CACHE_DIR", str(ROOT_DIR / "thumbnail_cache")))
+THUMBNAIL_CACHE_MAX_BYTES = int(os.environ.get("THUMBNAIL_CACHE_MAX_MB", "256")) * 1024 * 1024
+THUMBNAIL_SIZES = (128, 256, 512, 1024)
+THUMBNAIL_DEFAULT_SIZE = 256
+THUMBNAIL_IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "bmp", "webp"}
+
+def render_thumbnail(source_path: str, extension: str, size: int, target_path: str):
+    """Render a JPEG no larger than size x size pixels"""
+    if extension == "pdf":
+        document = pdfium.PdfDocument(source_path)
+        try:
+            page = document[0]
+            scale = size / max(page.get_size())
+            image = page.render(scale=scale).to_pil()
+        finally:
+            document.close()
+    else:
+        image = Image.open(source_path)
+        image.draft("RGB", (size, size))  # Fast JPEG downscale while decoding
+        image = ImageOps.exif_transpose(image)
+    image.thumbnail((size, size))
+    
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    
+    temp_path = f"{target_path}.{uuid.uuid4().hex}.tmp"
+    image.save(temp_path, "JPEG", quality=80, optimize=True)
+    os.replace(temp_path, target_path)
+
+class RenditionCache:
+    """Size-bounded LRU of rendered thumbnails on disk"""
+    
+    def __init__(self, directory: Path, max_bytes: int, workers: int = 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._prefetches: set = set()  # strong references to running prefetch tasks
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def can_render(self, file_name: str) -> bool:
+        extension = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
+        if extension == "pdf":
+            return pdfium is not None and Image is not None
+        return extension in THUMBNAIL_IMAGE_EXTENSIONS and Image is not None
+    
+    def _scan(self) -> List[tuple]:
+        """(name, size) of the cached renditions, least recently modified first"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".jpg")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        return [(entry.name, entry.stat().st_size) for entry in files]
+    
+    async def _load(self):
+        # Rebuild the LRU order from modification times after a restart
+        async with self._load_lock:
+            if self._loaded:
+                return
+            for name, size in await asyncio.get_running_loop().run_in_executor(self._executor, self._scan):
+                self._entries[name] = size
+                self._total_bytes += size
+            self._loaded = True
+    
+    @staticmethod
+    async def rendition_name(file_item: Dict[str, Any], size: int) -> str:
+        key = file_item.get("checksum")
+        if not key:
+            mtime = await aiofiles.os.path.getmtime(file_item["file_path"])
+            key = hashlib.sha256(f"{file_item['file_path']}:{mtime}".encode()).hexdigest()
+        return f"{key}-{size}.jpg"
+    
+    def _forget(self, name: str):
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._total_bytes -= size
+    
+    async def read(self, file_item: Dict[str, Any], size: int = THUMBNAIL_DEFAULT_SIZE) -> tuple:
+        """(name, bytes) of the rendition; a rendition evicted before it is read is rendered again"""
+        for attempt in range(2):
+            path = await self.get(file_item, size)
+            try:
+                async with aiofiles.open(path, "rb") as f:
+                    return path.name, await f.read()
+            except FileNotFoundError:
+                self._forget(path.name)
+        raise HTTPException(status_code=404, detail="Thumbnail is no longer available")
+    
+    async def get(self, file_item: Dict[str, Any], size: int = THUMBNAIL_DEFAULT_SIZE) -> Path:
+        """Path of the rendition, rendering it first if needed"""
+        if not self._loaded:
+            await self._load()
+        name = await self.rendition_name(file_item, size)
+        if name in self._entries:
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return self.directory / name
+        
+        # Concurrent requests for the same rendition share one render
+        future = self._inflight.get(name)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(self._render(file_item, size, name))
+            self._inflight[name] = future
+            future.add_done_callback(lambda _: self._inflight.pop(name, None))
+        return await asyncio.shield(future)
+    
+    async def _render(self, file_item: Dict[str, Any], size: int, name: str) -> Path:
+        target = self.directory / name
+        extension = file_item["name"].rsplit(".", 1)[-1].lower()
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, render_thumbnail, file_item["file_path"], extension, size, str(target)
+        )
+        rendition_size = (await aiofiles.os.stat(target)).st_size
+        self._entries[name] = rendition_size
+        self._total_bytes += rendition_size
+        await self._evict()
+        return target
+    
+    async def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                await aiofiles.os.remove(self.directory / name)
+            except FileNotFoundError:
+                pass
+    
+    def prefetch(self, file_item: Dict[str, Any]):
+        """Render the default size in the background right after an upload"""
+        if not self.can_render(file_item["name"]):
+            return
+        
+        async def render():
+            try:
+                await self.get(file_item)
+            except Exception as e:
+                logger.warning(f"Thumbnail prefetch failed for {file_item['name']}: {e}")
+        task = asyncio.create_task(render())
+        self._prefetches.add(task)
+        task.add_done_callback(self._prefetches.discard)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+thumbnail_cache = RenditionCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_CACHE_MAX_BYTES)
+
+@api_router.get("/file-manager/thumbnail/{file_id}")
+async def get_file_thumbnail(
+    file_id: str,
+    request: Request,
+    size: int = Query(THUMBNAIL_DEFAULT_SIZE, ge=16, le=1024),
+    current_user: User = Depends(get_current_user)
+):
+    """JPEG thumbnail of an image or of the first page of a PDF"""
+    file_item = await db.file_items.find_one({"id": file_id})
+    if not file_item:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    if not thumbnail_cache.can_render(file_item["name"]):
+        raise HTTPException(status_code=404, detail="No thumbnail available for this file type")
+    
+    if not await aiofiles.os.path.exists(file_item["file_path"]):
+        raise HTTPException(status_code=404, detail="Physical file not found")
+    
+    # Snap to the next standard size so the cache holds few variants per file
+    size = next((standard for standard in THUMBNAIL_SIZES if standard >= size), THUMBNAIL_SIZES[-1])
+    try:
+        # Read whole (renditions are small) so an eviction cannot unlink it mid-response
+        name, content = await thumbnail_cache.read(file_item, size)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error rendering thumbnail for {file_id}: {str(e)}")
+        raise HTTPException(status_code=422, detail="Could not render a thumbnail for this file")
+    
+    # Renditions of a given content never change, so browsers may reuse them for a day
+    etag = f'"{Path(name).stem}"'
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=86400"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    headers["Content-Disposition"] = attachment_disposition(f"{Path(file_item['name']).stem}.jpg")
+    return Response(content=content, media_type="image/jpeg", headers=headers)
+
 @api_router.get("/file-manager/download/{file_id}")
 async def download_file(
     file_id: str,
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Download a file"""
@@ -1710,21 +3952,28 @@ async def download_file(
     if not os.path.exists(file_item["file_path"]):
         raise HTTPException(status_code=404, detail="Physical file not found")
     
-    from fastapi.responses import FileResponse
-    return FileResponse(
+    return await file_download_response(
+        request,
         path=file_item["file_path"],
         filename=file_item["original_name"],
-        media_type=file_item["mime_type"]
+        media_type=file_item["mime_type"],
+        checksum=file_item.get("checksum")
     )
 
 @api_router.get("/documents/download/{file_path:path}")
 async def download_document_file(
     file_path: str,
+    request: Request,
+    document_id: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """Download a document file by file path"""
+    """Download a document file by file path.
+    
+    Identical uploads share one blob path, so the original name and MIME type
+    come from the document passed as document_id, or else from a document the
+    caller can see.
+    """
     # Decode the file path
-    import urllib.parse
     decoded_path = urllib.parse.unquote(file_path)
     
     # Ensure the file path is within the uploads directory for security
@@ -1748,47 +3997,532 @@ async def download_document_file(
     if not full_path.exists():
         raise HTTPException(status_code=404, detail=f"File not found: {decoded_path}")
     
-    # Get the original filename from the path
-    filename = full_path.name
+    # Look up the stored file entry for its original name, MIME type and checksum
+    stored_paths = list({str(full_path), str(UPLOADS_DIR / full_path.relative_to(uploads_resolved))})
+    query = {"$or": [
+        {"file_path": {"$in": stored_paths}},
+        {"metadata.files.file_path": {"$in": stored_paths}},
+        {"metadata.uploaded_files.file_path": {"$in": stored_paths}}
+    ]}
+    if document_id:
+        query["id"] = document_id
+    if current_user.role == UserRole.ADMIN:
+        scopes = [{"created_by": current_user.id}, {}]
+    else:
+        scopes = [{"$or": [{"created_by": current_user.id}, {"assigned_to": current_user.id}]}]
+    document = None
+    for scope in scopes:
+        document = await db.documents.find_one(
+            {"$and": [query, scope]} if scope else query,
+            {"_id": 0, "file_path": 1, "file_name": 1, "mime_type": 1, "metadata": 1}
+        )
+        if document:
+            break
     
-    # Try to get a more user-friendly name from document metadata if possible
-    # This is optional - we could search documents collection for this file
+    filename = full_path.name
+    media_type = None
+    checksum = None
+    if document:
+        for entry in document_stored_files(document):
+            if entry.get("file_path") in stored_paths:
+                filename = entry.get("original_name") or document.get("file_name") or filename
+                media_type = entry.get("mime_type") or document.get("mime_type")
+                checksum = entry.get("checksum")
+                break
     
-    from fastapi.responses import FileResponse
-    return FileResponse(
+    return await file_download_response(
+        request,
         path=str(full_path),
         filename=filename,
-        media_type='application/octet-stream'  # Generic type, browser will detect
+        media_type=media_type,
+        checksum=checksum
     )
 
+# File manager search
+# Folders and file items carry search_keys: every prefix (up to SEARCH_KEY_MAX_LENGTH
+# characters) of each word of their name, lowercased and accent-folded, so
+# "Réunion été" is found by "reu", "REUNION" or "ete". A query matches when each
+# of its words prefixes a word of the name; matches are then ranked in memory.
+SEARCH_KEY_MAX_LENGTH = 15
+SEARCH_CANDIDATE_LIMIT = 1000
+
+def fold_search_text(text: str) -> str:
+    """Lowercase and strip accents (é -> e, ç -> c, œ -> oe)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower().replace("œ", "oe").replace("æ", "ae"))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def search_words(text: str) -> List[str]:
+    return re.findall(r"[^\W_]+", fold_search_text(text or ""))
+
+def search_index_keys(*names: Optional[str]) -> List[str]:
+    keys = set()
+    for name in names:
+        for word in search_words(name):
+            keys.update(word[:length] for length in range(1, min(len(word), SEARCH_KEY_MAX_LENGTH) + 1))
+    return sorted(keys)
+
+def search_rank(query_words: List[str], *names: Optional[str]) -> Optional[tuple]:
+    """Sort key for a candidate (lower is better), or None if it does not match"""
+    best = None
+    for name in names:
+        if not name:
+            continue
+        words = search_words(name)
+        if not all(any(word.startswith(q) for word in words) for q in query_words):
+            continue
+        folded = " ".join(words)
+        query = " ".join(query_words)
+        if folded == query:
+            tier = 0
+        elif folded.startswith(query):
+            tier = 1
+        elif all(q in words for q in query_words):
+            tier = 2
+        else:
+            tier = 3
+        rank = (tier, len(folded), folded)
+        best = rank if best is None or rank < best else best
+    return best
+
 @api_router.get("/file-manager/search")
 async def search_files_and_folders(
     query: str = Query(..., min_length=1),
-    current_user: User = Depends(get_current_user)
+    folder_id: Optional[str] = Query(None, description="Only search inside this folder's subtree"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    user_names: UserNameLoader = Depends(get_user_name_loader)
 ):
-    """Search files and folders by name"""
-    # Search folders
-    folders = await db.folders.find({
-        "name": {"$regex": query, "$options": "i"}
-    }).to_list(50)
-    
-    # Search files
-    files = await db.file_items.find({
-        "$or": [
-            {"name": {"$regex": query, "$options": "i"}},
-            {"original_name": {"$regex": query, "$options": "i"}}
-        ]
-    }).to_list(50)
+    """Search files and folders by name, best matches first"""
+    query_words = search_words(query)
+    if not query_words:
+        return {"folders": [], "files": [], "total": 0, "has_more": False}
+    keys = sorted({word[:SEARCH_KEY_MAX_LENGTH] for word in query_words})
+    
+    folder_query = {"search_keys": {"$all": keys}}
+    file_query = {"search_keys": {"$all": keys}}
+    if folder_id:
+        subtree_ids = [folder_id] + await db.folders.distinct("id", {"ancestors": folder_id})
+        folder_query["ancestors"] = folder_id
+        file_query["folder_id"] = {"$in": subtree_ids}
+    
+    folders = await db.folders.find(folder_query, {"search_keys": 0}).to_list(SEARCH_CANDIDATE_LIMIT)
+    files = await db.file_items.find(file_query, {"search_keys": 0}).to_list(SEARCH_CANDIDATE_LIMIT)
+    
+    # Keys are truncated, so long query words are re-checked while ranking. Folders and
+    # files are ranked in one list (folders first on equal rank) and paged together.
+    ranked = sorted(
+        [((rank, 0), "folder", folder) for folder in folders
+         if (rank := search_rank(query_words, folder["name"])) is not None] +
+        [((rank, 1), "file", file) for file in files
+         if (rank := search_rank(query_words, file["name"], file.get("original_name"))) is not None],
+        key=lambda match: match[0]
+    )
+    page = ranked[offset:offset + limit]
+    page_folders = [item for _, kind, item in page if kind == "folder"]
+    page_files = [item for _, kind, item in page if kind == "file"]
     
     # Add creator names
-    for folder in folders:
-        user = await db.users.find_one({"id": folder["created_by"]})
-        folder["created_by_name"] = user["full_name"] if user else "Unknown"
+    await user_names.attach_creator_names(page_folders)
     
     return {
-        "folders": [Folder(**folder) for folder in folders],
-        "files": [FileItem(**file) for file in files]
+        "folders": [{**Folder(**folder).dict(), "created_by_name": folder["created_by_name"]} for folder in page_folders],
+        "files": [FileItem(**file) for file in page_files],
+        "total": len(ranked),
+        "has_more": offset + limit < len(ranked)
+    }
+
+# Full-text content search
+# Text extracted from stored files (document attachments and file manager items)
+# lives in content_index, one entry per (source, source_id, file_path), under a
+# French text index. Writes call content_indexer.submit(); worker tasks re-sync
+# each submitted source, extracting text on a thread pool and reusing the text
+# already extracted for the same blob checksum. reindex() picks up everything
+# changed since the last completed pass (content_index_state watermark).
+CONTENT_INDEX_WORKERS = max(1, int(os.environ.get("CONTENT_INDEX_WORKERS", "2")))
+CONTENT_INDEX_MAX_CHARS = 200_000
+CONTENT_INDEX_MAX_QUEUE = 10_000
+CONTENT_DOCX_MAX_XML_BYTES = 64 * 1024 * 1024  # decompressed markup read per .docx
+CONTENT_TEXT_EXTENSIONS = {"txt", "md", "csv", "json", "xml", "html", "htm", "log"}
+
+def detect_text_encoding(data: bytes, final: bool = True) -> str:
+    """UTF-8 (with or without BOM) when the bytes decode as such, else Windows-1252,
+    the usual encoding of French documents saved by older Windows tools"""
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(data, final)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8-sig" if data.startswith(codecs.BOM_UTF8) else "utf-8"
+
+def decode_text_bytes(data: bytes, final: bool = True) -> str:
+    """Decode text; with final=False, data is a prefix and a multi-byte sequence cut at its end is dropped"""
+    encoding = detect_text_encoding(data, final)
+    return codecs.getincrementaldecoder(encoding)(errors="replace").decode(data, final)
+
+def _extract_docx_text(path: str) -> str:
+    """Text of word/document.xml, streamed so a compressed bomb cannot exhaust memory"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parts, length, read, pending = [], 0, 0, ""
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as member:
+        while length < CONTENT_INDEX_MAX_CHARS and read < CONTENT_DOCX_MAX_XML_BYTES:
+            chunk = member.read(UPLOAD_CHUNK_SIZE)
+            read += len(chunk)
+            pending += decoder.decode(chunk, final=not chunk)
+            # Strip tags up to the last complete one; the remainder waits for the next chunk
+            cut = len(pending) if not chunk else pending.rfind(">") + 1
+            if cut == 0 and len(pending) > CONTENT_INDEX_MAX_CHARS:
+                break  # no markup at all, not a document body
+            xml, pending = pending[:cut], pending[cut:]
+            xml = re.sub(r"</w:p>|<w:br/>|<w:tab/>", "\n", xml)
+            text = html.unescape(re.sub(r"<[^>]+>", "", xml))
+            parts.append(text)
+            length += len(text)
+            if not chunk:
+                break
+    return "".join(parts)
+
+def _extract_pdf_text(path: str) -> str:
+    if PdfReader is None:
+        return ""
+    reader = PdfReader(path)
+    parts, length = [], 0
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        parts.append(text)
+        length += len(text)
+        if length >= CONTENT_INDEX_MAX_CHARS:
+            break
+    return "\n".join(parts)
+
+def extract_file_text(path: str, file_name: str) -> str:
+    """Plain text of a stored file, empty for formats without text"""
+    extension = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
+    if extension in CONTENT_TEXT_EXTENSIONS:
+        limit = CONTENT_INDEX_MAX_CHARS * 4
+        with open(path, "rb") as f:
+            data = f.read(limit + 1)
+        text = decode_text_bytes(data[:limit], final=len(data) <= limit)
+    elif extension == "docx":
+        text = _extract_docx_text(path)
+    elif extension == "pdf":
+        text = _extract_pdf_text(path)
+    else:
+        text = ""
+    return text[:CONTENT_INDEX_MAX_CHARS]
+
+async def load_content_source(source: str, source_id: str) -> Optional[Dict[str, Any]]:
+    """Stored files and access fields of an indexable record, None if it is gone"""
+    if source == "document":
+        document = await db.documents.find_one({"id": source_id})
+        if not document:
+            return None
+        files = [
+            {
+                "file_path": entry["file_path"],
+                "checksum": entry.get("checksum"),
+                "file_name": entry.get("original_name") or document.get("file_name") or Path(entry["file_path"]).name
+            }
+            for entry in document_stored_files(document) if entry.get("file_path")
+        ]
+        access = {"created_by": document.get("created_by"), "assigned_to": document.get("assigned_to")}
+        return {"files": files, "access": access}
+    
+    file_item = await db.file_items.find_one({"id": source_id})
+    if not file_item:
+        return None
+    files = [{"file_path": file_item["file_path"], "checksum": file_item.get("checksum"), "file_name": file_item["name"]}]
+    return {"files": files, "access": {"created_by": file_item.get("created_by"), "assigned_to": None}}
+
+class ContentIndexer:
+    """Keeps content_index in sync with the files of submitted documents and file items"""
+    
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: set = set()
+        self._tasks: List[asyncio.Task] = []
+        self._reindex_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "workers": workers,
+            "sources_synced": 0,
+            "files_extracted": 0,
+            "files_reused": 0,
+            "bytes_extracted": 0,
+            "chars_indexed": 0,
+            "errors": 0,
+            "extract_seconds": 0.0
+        }
+    
+    def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="content-index")
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.start_reindex()
+    
+    async def stop(self):
+        tasks = self._tasks + ([self._reindex_task] if self._reindex_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._reindex_task = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
+    def start_reindex(self, full: bool = False) -> bool:
+        """Run a reindex pass in the background; False if one is already running"""
+        if self._reindex_task and not self._reindex_task.done():
+            return False
+        self._reindex_task = asyncio.create_task(self.reindex(full=full))
+        self._reindex_task.add_done_callback(self._reindex_finished)
+        return True
+    
+    def _reindex_finished(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            self.stats["errors"] += 1
+            logger.error(f"Content reindex failed: {task.exception()}")
+    
+    def submit(self, source: str, source_id: str):
+        """Schedule a re-sync of one document or file item; duplicates are coalesced"""
+        if self._queue is None or (source, source_id) in self._pending:
+            return
+        self._pending.add((source, source_id))
+        self._queue.put_nowait((source, source_id))
+    
+    async def _worker(self):
+        while True:
+            source, source_id = await self._queue.get()
+            self._pending.discard((source, source_id))
+            try:
+                await self.sync_source(source, source_id)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Content indexing failed for {source} {source_id}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    async def sync_source(self, source: str, source_id: str):
+        record = await load_content_source(source, source_id)
+        if record is None:
+            await db.content_index.delete_many({"source": source, "source_id": source_id})
+            return
+        
+        existing = {
+            entry["file_path"]: entry
+            async for entry in db.content_index.find(
+                {"source": source, "source_id": source_id}, {"_id": 0, "file_path": 1, "checksum": 1}
+            )
+        }
+        wanted = {file["file_path"]: file for file in record["files"]}
+        stale = [path for path in existing if path not in wanted]
+        if stale:
+            await db.content_index.delete_many({"source": source, "source_id": source_id, "file_path": {"$in": stale}})
+        
+        for path, file in wanted.items():
+            if path in existing and existing[path].get("checksum") == file["checksum"]:
+                continue
+            text = await self._file_text(file)
+            await db.content_index.update_one(
+                {"source": source, "source_id": source_id, "file_path": path},
+                {"$set": {"checksum": file["checksum"], "text": text, "indexed_at": datetime.utcnow()}},
+                upsert=True
+            )
+        
+        # Names and access may change without the files changing
+        for path, file in wanted.items():
+            await db.content_index.update_one(
+                {"source": source, "source_id": source_id, "file_path": path},
+                {"$set": {"file_name": file["file_name"], **record["access"]}}
+            )
+        self.stats["sources_synced"] += 1
+    
+    async def _file_text(self, file: Dict[str, Any]) -> str:
+        if file["checksum"]:
+            indexed = await db.content_index.find_one(
+                {"checksum": file["checksum"], "text": {"$exists": True}}, {"_id": 0, "text": 1}
+            )
+            if indexed:
+                self.stats["files_reused"] += 1
+                return indexed["text"]
+        
+        if not await aiofiles.os.path.exists(file["file_path"]):
+            return ""
+        started = time.perf_counter()
+        try:
+            text = await asyncio.get_running_loop().run_in_executor(
+                self._executor, extract_file_text, file["file_path"], file["file_name"]
+            )
+        except Exception as e:
+            # Corrupt or unsupported content: index the name only
+            self.stats["errors"] += 1
+            logger.warning(f"Could not extract text from {file['file_name']}: {e}")
+            text = ""
+        self.stats["extract_seconds"] += time.perf_counter() - started
+        self.stats["files_extracted"] += 1
+        self.stats["bytes_extracted"] += await aiofiles.os.path.getsize(file["file_path"])
+        self.stats["chars_indexed"] += len(text)
+        return text
+    
+    async def reindex(self, full: bool = False) -> int:
+        """Submit every source changed since the last completed pass (all of them if full)"""
+        state = await db.content_index_state.find_one({"_id": "watermark"})
+        since = None if full or not state else state["indexed_until"]
+        scan_started = datetime.utcnow()
+        
+        submitted = 0
+        has_files = {"$or": [
+            {"file_path": {"$ne": None}},
+            {"metadata.files.0": {"$exists": True}},
+            {"metadata.uploaded_files.0": {"$exists": True}}
+        ]}
+        for source, collection, query in (("document", db.documents, has_files), ("file_item", db.file_items, {})):
+            if since:
+                query = {"$and": [query, {"updated_at": {"$gte": since}}]}
+            async for item in collection.find(query, {"_id": 0, "id": 1}):
+                while self._queue.qsize() >= CONTENT_INDEX_MAX_QUEUE:
+                    await asyncio.sleep(0.1)
+                self.submit(source, item["id"])
+                submitted += 1
+        
+        # Only move the watermark once everything submitted has been processed
+        await self._queue.join()
+        await db.content_index_state.update_one(
+            {"_id": "watermark"}, {"$set": {"indexed_until": scan_started}}, upsert=True
+        )
+        return submitted
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        seconds = stats.pop("extract_seconds")
+        stats["queued"] = self._queue.qsize() if self._queue else 0
+        stats["reindexing"] = bool(self._reindex_task and not self._reindex_task.done())
+        stats["files_per_second"] = round(stats["files_extracted"] / seconds, 1) if seconds else 0.0
+        stats["mb_per_second"] = round(stats["bytes_extracted"] / seconds / (1024 * 1024), 2) if seconds else 0.0
+        return stats
+
+content_indexer = ContentIndexer(CONTENT_INDEX_WORKERS)
+
+# Accent-insensitive patterns for locating query words in the original text
+SNIPPET_ACCENT_CLASSES = {
+    "a": "aàâäá", "c": "cç", "e": "eéèêë", "i": "iîïí", "o": "oôöó", "u": "uùûüú", "y": "yÿ", "n": "nñ"
+}
+
+def search_snippet(text: str, words: List[str], radius: int = 80) -> Dict[str, Any]:
+    """Excerpt around the first query word, with [start, end] offsets of every match"""
+    if not text:
+        return {"snippet": "", "highlights": []}
+    alternatives = [
+        "".join(f"[{SNIPPET_ACCENT_CLASSES[char]}]" if char in SNIPPET_ACCENT_CLASSES else re.escape(char) for char in word)
+        for word in words
+    ]
+    pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\w*", re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(0, match.start() - radius) if match else 0
+    end = min(len(text), (match.end() if match else 0) + radius)
+    
+    snippet = re.sub(r"\s+", " ", text[start:end]).strip()
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(text):
+        snippet += "…"
+    return {"snippet": snippet, "highlights": [[m.start(), m.end()] for m in pattern.finditer(snippet)]}
+
+@api_router.get("/search")
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """Search documents and file manager items by metadata and file contents"""
+    words = search_words(q)
+    if not words:
+        return {"results": [], "has_more": False}
+    fetch = offset + limit + 1
+    text_query = {"$text": {"$search": q}}
+    
+    # File manager items are shared; documents follow the listing permissions
+    content_query = dict(text_query)
+    document_query = dict(text_query)
+    if current_user.role != UserRole.ADMIN:
+        content_query["$or"] = [
+            {"source": "file_item"},
+            {"created_by": current_user.id},
+            {"assigned_to": current_user.id}
+        ]
+        document_query["$or"] = [{"created_by": current_user.id}, {"assigned_to": current_user.id}]
+    
+    score = {"score": {"$meta": "textScore"}}
+    content_hits = await db.content_index.find(
+        content_query, {"_id": 0, "source": 1, "source_id": 1, "file_name": 1, "text": 1, **score}
+    ).sort([("score", {"$meta": "textScore"})]).limit(fetch).to_list(fetch)
+    document_hits = await db.documents.find(
+        document_query, {"_id": 0, "id": 1, **score}
+    ).sort([("score", {"$meta": "textScore"})]).limit(fetch).to_list(fetch)
+    
+    # Best score per record; content matches carry the snippet
+    best: Dict[tuple, Dict[str, Any]] = {}
+    for hit in content_hits:
+        key = (hit["source"], hit["source_id"])
+        if key not in best or hit["score"] > best[key]["score"]:
+            best[key] = {"score": hit["score"], "file_name": hit.get("file_name"), "text": hit.get("text", "")}
+    for hit in document_hits:
+        key = ("document", hit["id"])
+        if key not in best:
+            best[key] = {"score": hit["score"], "file_name": None, "text": ""}
+        else:
+            best[key]["score"] += hit["score"]
+    ranked = sorted(best.items(), key=lambda item: item[1]["score"], reverse=True)
+    page = ranked[offset:offset + limit]
+    
+    document_ids = [source_id for (source, source_id), _ in page if source == "document"]
+    file_ids = [source_id for (source, source_id), _ in page if source == "file_item"]
+    documents = {
+        document["id"]: document
+        async for document in db.documents.find(
+            {"id": {"$in": document_ids}},
+            {"_id": 0, "id": 1, "title": 1, "description": 1, "reference": 1, "document_type": 1, "created_at": 1}
+        )
+    }
+    file_items = {
+        item["id"]: item
+        async for item in db.file_items.find(
+            {"id": {"$in": file_ids}}, {"_id": 0, "id": 1, "name": 1, "folder_id": 1, "created_at": 1}
+        )
     }
+    
+    results = []
+    for (source, source_id), hit in page:
+        record = documents.get(source_id) if source == "document" else file_items.get(source_id)
+        if not record:
+            continue
+        text = hit["text"] or (f"{record.get('title', '')} {record.get('description') or ''}" if source == "document" else "")
+        results.append({
+            "type": source,
+            "id": source_id,
+            "title": record.get("title") or record.get("name"),
+            "reference": record.get("reference"),
+            "document_type": record.get("document_type"),
+            "folder_id": record.get("folder_id"),
+            "file_name": hit["file_name"],
+            "created_at": record.get("created_at"),
+            "score": round(hit["score"], 3),
+            **search_snippet(text, words)
+        })
+    
+    return {"results": results, "has_more": len(ranked) > offset + limit}
+
+@api_router.post("/search/reindex")
+async def reindex_content(
+    full: bool = False,
+    admin_user: User = Depends(get_admin_user)
+):
+    """Queue every document and file item changed since the last pass (or all of them)"""
+    if not content_indexer.start_reindex(full=full):
+        raise HTTPException(status_code=409, detail="Reindexing is already in progress")
+    return {"message": "Reindexing started", "full": full}
 
 # Helper functions for folder operations
 async def get_folder_path(folder_id: Optional[str]) -> str:
@@ -1802,33 +4536,55 @@ async def get_folder_path(folder_id: Optional[str]) -> str:
     
     return folder["path"]
 
-async def update_subfolder_paths(parent_folder_id: str, new_parent_path: str):
-    """Recursively update paths of all subfolders"""
-    subfolders = await db.folders.find({"parent_id": parent_folder_id}).to_list(100)
+async def rename_folder_subtree(folder: Dict[str, Any], new_name: str, new_path: str, session=None):
+    """Rename a folder and rewrite the path prefix of all its descendants.
     
-    for subfolder in subfolders:
-        new_path = f"{new_parent_path}/{subfolder['name']}"
-        await db.folders.update_one(
-            {"id": subfolder["id"]},
-            {"$set": {"path": new_path, "updated_at": datetime.utcnow()}}
-        )
-        # Recursively update subfolders
-        await update_subfolder_paths(subfolder["id"], new_path)
+    Descendants are found through their ancestors array, and their paths are
+    rewritten server-side by one pipeline update, whatever the subtree size.
+    """
+    now = datetime.utcnow()
+    old_prefix_length = len(folder["path"])
+    
+    await db.folders.update_one(
+        {"id": folder["id"]},
+        {"$set": {"name": new_name, "path": new_path, "search_keys": search_index_keys(new_name), "updated_at": now}},
+        session=session
+    )
+    await db.folders.update_many(
+        {"ancestors": folder["id"]},
+        [{"$set": {
+            "path": {"$concat": [
+                new_path,
+                {"$substrCP": [
+                    "$path",
+                    old_prefix_length,
+                    {"$subtract": [{"$strLenCP": "$path"}, old_prefix_length]}
+                ]}
+            ]},
+            "updated_at": now
+        }}],
+        session=session
+    )
 
-async def delete_folder_contents(folder_id: str):
-    """Recursively delete all contents of a folder"""
-    # Delete all files in this folder
-    files = await db.file_items.find({"folder_id": folder_id}).to_list(100)
-    for file in files:
-        if os.path.exists(file["file_path"]):
-            os.remove(file["file_path"])
-    await db.file_items.delete_many({"folder_id": folder_id})
+async def delete_folder_subtree(folder_id: str, session=None) -> Dict[str, int]:
+    """Delete a folder with all its descendants and files, queueing the stored files for reclamation"""
+    descendants = await db.folders.distinct("id", {"ancestors": folder_id}, session=session)
+    folder_ids = [folder_id] + descendants
+    
+    files = await db.file_items.find(
+        {"folder_id": {"$in": folder_ids}},
+        {"_id": 0, "id": 1, "file_path": 1, "checksum": 1},
+        session=session
+    ).to_list(None)
+    await file_reclaimer.enqueue(files, session=session)
+    await db.content_index.delete_many(
+        {"source": "file_item", "source_id": {"$in": [file["id"] for file in files]}},
+        session=session
+    )
     
-    # Recursively delete subfolders
-    subfolders = await db.folders.find({"parent_id": folder_id}).to_list(100)
-    for subfolder in subfolders:
-        await delete_folder_contents(subfolder["id"])
-        await db.folders.delete_one({"id": subfolder["id"]})
+    files_result = await db.file_items.delete_many({"folder_id": {"$in": folder_ids}}, session=session)
+    folders_result = await db.folders.delete_many({"id": {"$in": folder_ids}}, session=session)
+    return {"deleted_folders": folders_result.deleted_count, "deleted_files": files_result.deleted_count}
 
 # Users Management Routes (Admin only)
 @api_router.get("/users", response_model=List[User])
@@ -1836,6 +4592,383 @@ async def get_users(admin_user: User = Depends(get_admin_user)):
     users = await db.users.find().to_list(100)
     return [User(**user) for user in users]
 
+# Database indexes and migrations
+# Every index the application relies on, per collection. ensure_indexes() applies
+# the registry idempotently at startup; manage_indexes.py reports drift.
+DOCUMENT_TEXT_FIELDS = (
+    "reference", "title", "description", "metadata.objet", "metadata.expediteur", "metadata.destinataire"
+)
+
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("username", 1)], name="username_unique", unique=True),
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("email", 1)], name="email")
+    ],
+    "documents": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        # Keyset listing per document type (GET /api/documents, DRI départ listing)
+        IndexModel([("document_type", 1), ("created_at", -1), ("id", -1)], name="type_created"),
+        IndexModel([("created_at", -1), ("id", -1)], name="created"),
+        IndexModel([("created_by", 1), ("created_at", -1)], name="created_by"),
+        IndexModel([("assigned_to", 1), ("created_at", -1)], name="assigned_to"),
+        IndexModel([("file_path", 1)], name="file_path", sparse=True),
+        # Reference collision check of the archive import
+        IndexModel([("reference", 1)], name="reference"),
+        IndexModel([("metadata.files.file_path", 1)], name="files_path", sparse=True),
+        IndexModel([("metadata.uploaded_files.file_path", 1)], name="uploaded_files_path", sparse=True),
+        # Idempotent upserts and resume checks of the legacy archive import
+        IndexModel(
+            [("metadata.legacy_id", 1), ("document_type", 1)],
+            name="legacy_id",
+            unique=True,
+            partialFilterExpression={"metadata.legacy_id": {"$exists": True}}
+        ),
+        # Backs the q= search of GET /api/documents; only the fields users search by,
+        # so file paths and checksums neither bloat the index nor produce hits
+        IndexModel(
+            [(field, "text") for field in DOCUMENT_TEXT_FIELDS],
+            name="documents_text",
+            default_language="french",
+            weights={"reference": 10, "title": 5}
+        )
+    ],
+    "document_counters": [
+        # One counter document per (type, year); required for the upsert in allocate_counter_block
+        IndexModel([("document_type", 1), ("year", 1)], name="type_year_unique", unique=True)
+    ],
+    "upload_blobs": [
+        IndexModel([("checksum", 1)], name="checksum_unique", unique=True)
+    ],
+    "messages": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        # Unread per conversation in the inbox, bulk mark-as-read of a thread
+        IndexModel([("recipient_id", 1), ("is_read", 1), ("conversation_id", 1)], name="recipient_unread_conversation"),
+        IndexModel([("conversation_id", 1), ("created_at", -1), ("id", -1)], name="conversation_created"),
+        IndexModel([("recipient_id", 1), ("created_at", -1)], name="recipient_created"),
+        IndexModel([("sender_id", 1), ("created_at", -1)], name="sender_created")
+    ],
+    "conversations": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("participants", 1), ("last_message_at", -1), ("id", -1)], name="participant_recent")
+    ],
+    "message_counters": [
+        IndexModel([("user_id", 1)], name="user_id_unique", unique=True)
+    ],
+    "folders": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("parent_id", 1), ("name", 1)], name="parent_name"),
+        IndexModel([("path", 1)], name="path"),
+        IndexModel([("ancestors", 1)], name="ancestors"),
+        IndexModel([("search_keys", 1)], name="search_keys")
+    ],
+    "file_items": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("folder_id", 1), ("name", 1)], name="folder_name"),
+        IndexModel([("search_keys", 1), ("folder_id", 1)], name="search_keys_folder")
+    ],
+    "calendar_events": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        # Window overlap per visibility branch (GET /api/calendar/events)
+        IndexModel([("visibility", 1), ("series_end", 1), ("start_date", 1)], name="visibility_window"),
+        IndexModel([("created_by", 1), ("series_end", 1), ("start_date", 1)], name="creator_window"),
+        IndexModel([("attendees", 1), ("series_end", 1), ("start_date", 1)], name="attendee_window"),
+        # Incremental loads of the reminder scheduler; events without a pending reminder are left out
+        IndexModel(
+            [("next_reminder_at", 1)],
+            name="next_reminder_at",
+            partialFilterExpression={"next_reminder_at": {"$type": "date"}}
+        )
+    ],
+    "file_reclaim_queue": [
+        IndexModel([("id", 1)], name="id_unique", unique=True),
+        IndexModel([("next_attempt_at", 1)], name="next_attempt_at")
+    ],
+    "content_index": [
+        IndexModel([("source", 1), ("source_id", 1), ("file_path", 1)], name="source_file_unique", unique=True),
+        IndexModel([("checksum", 1)], name="checksum", sparse=True),
+        IndexModel(
+            [("text", "text"), ("file_name", "text")],
+            name="content_text",
+            default_language="french",
+            weights={"file_name": 5, "text": 1}
+        )
+    ],
+    "employees": [
+        IndexModel([("matricule", 1)], name="matricule_unique", unique=True)
+    ],
+    "import_checkpoints": [
+        IndexModel([("id", 1)], name="id_unique", unique=True)
+    ],
+    "directory_versions": [
+        IndexModel([("name", 1)], name="name_unique", unique=True)
+    ],
+    "user_settings": [
+        IndexModel([("user_id", 1)], name="user_id_unique", unique=True)
+    ]
+}
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """Create any registry index that is missing; existing ones are left untouched.
+    
+    A failing index (e.g. duplicates blocking a unique index) is logged and
+    skipped so that one bad collection does not keep the API from starting.
+    """
+    created = {}
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        missing = [index for index in indexes if index.document["name"] not in existing]
+        for index in missing:
+            # Ignored by MongoDB 4.2+, where every build is non-blocking
+            index.document.setdefault("background", True)
+            try:
+                await collection.create_indexes([index])
+                created.setdefault(collection_name, []).append(index.document["name"])
+            except OperationFailure as e:
+                logger.error(f"Failed to create index {collection_name}.{index.document['name']}: {e}")
+    if created:
+        logger.info(f"Created indexes: {created}")
+    return created
+
+async def index_report() -> Dict[str, Any]:
+    """Compare live indexes with the registry and report usage from $indexStats"""
+    report = {}
+    for collection_name, indexes in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        usage = {}
+        async for stat in collection.aggregate([{"$indexStats": {}}]):
+            usage[stat["name"]] = {"ops": stat["accesses"]["ops"], "since": stat["accesses"]["since"]}
+        registered = {index.document["name"] for index in indexes}
+        report[collection_name] = {
+            "missing": sorted(registered - set(existing)),
+            "unregistered": sorted(set(existing) - registered - {"_id_"}),
+            "unused": sorted(name for name, stats in usage.items() if stats["ops"] == 0 and name != "_id_"),
+            "usage": usage
+        }
+    return report
+
+async def dedupe_user_settings():
+    """Keep the most recently updated settings document per user"""
+    duplicates = db.user_settings.aggregate([
+        {"$sort": {"updated_at": -1}},
+        {"$group": {"_id": "$user_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ])
+    async for group in duplicates:
+        await db.user_settings.delete_many({"_id": {"$in": group["ids"][1:]}})
+
+async def dedupe_document_counters():
+    """Keep the highest counter per (type, year); the pre-upsert allocator could create duplicates"""
+    duplicates = db.document_counters.aggregate([
+        {"$sort": {"counter": -1}},
+        {"$group": {"_id": {"document_type": "$document_type", "year": "$year"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ])
+    async for group in duplicates:
+        await db.document_counters.delete_many({"_id": {"$in": group["ids"][1:]}})
+
+async def drop_wildcard_documents_text():
+    """Drop the first documents_text index, built over every field, so ensure_indexes
+    recreates it over DOCUMENT_TEXT_FIELDS (a collection holds a single text index)"""
+    existing = await db.documents.index_information()
+    if "$**" in existing.get("documents_text", {}).get("weights", {}):
+        await db.documents.drop_index("documents_text")
+
+async def backfill_folder_ancestors(batch_size: int = 1000):
+    """Store the ancestor id chain on every folder reachable from a root folder"""
+    ancestry: Dict[str, List[str]] = {}
+    frontier = [None]
+    while frontier:
+        next_frontier = []
+        for offset in range(0, len(frontier), batch_size):
+            parent_ids = frontier[offset:offset + batch_size]
+            children = await db.folders.find(
+                {"parent_id": {"$in": parent_ids}},
+                {"_id": 0, "id": 1, "parent_id": 1}
+            ).to_list(None)
+            operations = []
+            for child in children:
+                if child["id"] in ancestry:
+                    continue
+                parent_id = child["parent_id"]
+                ancestry[child["id"]] = ancestry[parent_id] + [parent_id] if parent_id else []
+                operations.append(UpdateOne({"id": child["id"]}, {"$set": {"ancestors": ancestry[child["id"]]}}))
+                next_frontier.append(child["id"])
+            for start in range(0, len(operations), batch_size):
+                await db.folders.bulk_write(operations[start:start + batch_size], ordered=False)
+        frontier = next_frontier
+
+async def backfill_search_keys(batch_size: int = 1000):
+    """Compute search_keys for folders and file items created before the search index"""
+    for collection, name_fields in ((db.folders, ("name",)), (db.file_items, ("name", "original_name"))):
+        cursor = collection.find(
+            {"search_keys": {"$exists": False}},
+            {"_id": 0, "id": 1, **{field: 1 for field in name_fields}}
+        ).batch_size(batch_size)
+        operations = []
+        async for item in cursor:
+            keys = search_index_keys(*(item.get(field) for field in name_fields))
+            operations.append(UpdateOne({"id": item["id"]}, {"$set": {"search_keys": keys}}))
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+
+async def backfill_calendar_series():
+    """Give events created before recurrence support a series_end and a visibility"""
+    await db.calendar_events.update_many({"series_end": {"$exists": False}}, [{"$set": {"series_end": "$end_date"}}])
+    await db.calendar_events.update_many({"visibility": {"$exists": False}}, {"$set": {"visibility": "public"}})
+
+async def backfill_calendar_reminders(batch_size: int = 1000):
+    """Set the reminder watermark of events created before the reminder scheduler"""
+    now = datetime.utcnow()
+    cursor = db.calendar_events.find({"next_reminder_at": {"$exists": False}}, {"_id": 0}).batch_size(batch_size)
+    operations = []
+    async for event in cursor:
+        operations.append(UpdateOne({"id": event["id"]}, {"$set": next_event_reminder(event, now)}))
+        if len(operations) >= batch_size:
+            await db.calendar_events.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.calendar_events.bulk_write(operations, ordered=False)
+
+async def backfill_conversations(batch_size: int = 1000):
+    """Thread existing messages into conversations and count unread messages per user"""
+    cursor = db.messages.find(
+        {"conversation_id": {"$exists": False}},
+        {"_id": 0, "id": 1, "sender_id": 1, "recipient_id": 1, "document_id": 1}
+    ).batch_size(batch_size)
+    operations = []
+    async for message in cursor:
+        conversation_id = conversation_id_for(message["sender_id"], message["recipient_id"], message.get("document_id"))
+        operations.append(UpdateOne({"id": message["id"]}, {"$set": {"conversation_id": conversation_id}}))
+        if len(operations) >= batch_size:
+            await db.messages.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.messages.bulk_write(operations, ordered=False)
+    
+    operations = []
+    async for group in db.messages.aggregate([
+        {"$sort": {"created_at": -1}},
+        {"$group": {"_id": "$conversation_id", "latest": {"$first": "$$ROOT"}, "created_at": {"$min": "$created_at"}}}
+    ], allowDiskUse=True):
+        operations.append(conversation_upsert(group["latest"], group["created_at"]))
+        if len(operations) >= batch_size:
+            await db.conversations.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.conversations.bulk_write(operations, ordered=False)
+    
+    await db.message_counters.delete_many({})
+    counters = [
+        UpdateOne({"user_id": group["_id"]}, {"$set": {"unread": group["count"]}}, upsert=True)
+        async for group in db.messages.aggregate([
+            {"$match": {"is_read": False}},
+            {"$group": {"_id": "$recipient_id", "count": {"$sum": 1}}}
+        ])
+    ]
+    for offset in range(0, len(counters), batch_size):
+        await db.message_counters.bulk_write(counters[offset:offset + batch_size], ordered=False)
+
+# Ordered, append-only list of (version, name, coroutine function). Applied versions
+# are recorded in schema_migrations so each runs once; they run before indexes are
+# ensured, so a migration can clean up data that would block a new unique index.
+MIGRATIONS = [
+    (1, "dedupe_user_settings", dedupe_user_settings),
+    (2, "backfill_folder_ancestors", backfill_folder_ancestors),
+    (3, "backfill_search_keys", backfill_search_keys),
+    (4, "backfill_calendar_series", backfill_calendar_series),
+    (5, "backfill_calendar_reminders", backfill_calendar_reminders),
+    (6, "backfill_conversations", backfill_conversations),
+    (7, "dedupe_document_counters", dedupe_document_counters),
+    (8, "drop_wildcard_documents_text", drop_wildcard_documents_text)
+]
+
+# A worker running a migration refreshes heartbeat_at on its schema_migrations row;
+# a "running" row whose heartbeat is older than the lease belongs to a crashed worker
+# and is taken over, so migrations must be safe to re-run from the start.
+MIGRATION_LEASE_SECONDS = 60
+MIGRATION_HEARTBEAT_SECONDS = 15
+MIGRATION_POLL_SECONDS = 1
+
+async def _migration_heartbeat(version: int, owner: str):
+    while True:
+        await asyncio.sleep(MIGRATION_HEARTBEAT_SECONDS)
+        await db.schema_migrations.update_one(
+            {"version": version, "owner": owner, "status": "running"},
+            {"$set": {"heartbeat_at": to_mongo_precision(datetime.utcnow())}}
+        )
+
+async def _acquire_migration(version: int, name: str, owner: str) -> bool:
+    """Take the migration lease; False once another worker has applied it.
+    Waits while a live worker holds it, so later migrations never run ahead."""
+    while True:
+        now = to_mongo_precision(datetime.utcnow())
+        try:
+            await db.schema_migrations.insert_one({
+                "version": version, "name": name, "status": "running",
+                "owner": owner, "started_at": now, "heartbeat_at": now
+            })
+            return True
+        except DuplicateKeyError:
+            pass
+        row = await db.schema_migrations.find_one({"version": version})
+        if row is None:
+            continue  # the previous owner failed and released it
+        if row.get("status") == "applied":
+            return False
+        heartbeat = row.get("heartbeat_at") or row.get("started_at")
+        if heartbeat is None or heartbeat < now - timedelta(seconds=MIGRATION_LEASE_SECONDS):
+            result = await db.schema_migrations.update_one(
+                {"version": version, "status": "running", "owner": row.get("owner"), "heartbeat_at": row.get("heartbeat_at")},
+                {"$set": {"owner": owner, "started_at": now, "heartbeat_at": now}}
+            )
+            if result.modified_count:
+                logger.warning(f"Taking over stale migration {version} ({name}) from {row.get('owner')}")
+                return True
+            continue
+        await asyncio.sleep(MIGRATION_POLL_SECONDS)
+
+async def run_migrations() -> List[int]:
+    await db.schema_migrations.create_index("version", unique=True)
+    owner = str(uuid.uuid4())
+    applied = []
+    for version, name, migration in MIGRATIONS:
+        # The version document doubles as a lock against concurrent workers
+        if not await _acquire_migration(version, name, owner):
+            continue
+        heartbeat = asyncio.create_task(_migration_heartbeat(version, owner))
+        try:
+            await migration()
+        except Exception:
+            await db.schema_migrations.delete_one({"version": version, "owner": owner})
+            logger.exception(f"Migration {version} ({name}) failed")
+            raise
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+        await db.schema_migrations.update_one(
+            {"version": version, "owner": owner},
+            {"$set": {"status": "applied", "applied_at": datetime.utcnow()}}
+        )
+        logger.info(f"Applied migration {version} ({name})")
+        applied.append(version)
+    return applied
+
+@api_router.get("/settings/indexes")
+async def get_index_report(admin_user: User = Depends(get_admin_user)):
+    """Missing, unregistered and unused indexes per collection (admin only)"""
+    return await index_report()
+
+@api_router.post("/settings/indexes/apply")
+async def apply_indexes(admin_user: User = Depends(get_admin_user)):
+    """Create missing registry indexes (admin only)"""
+    return {"created": await ensure_indexes()}
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1848,6 +4981,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Content-Range", "ETag"],
 )
 
 # Configure logging
@@ -1857,6 +4991,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def prepare_database():
+    await run_migrations()
+    await ensure_indexes()
+    file_reclaimer.start()
+    content_indexer.start()
+    reminder_scheduler.start()
+    employee_directory.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await file_reclaimer.stop()
+    await content_indexer.stop()
+    await reminder_scheduler.stop()
+    await employee_directory.stop()
+    client.close()
+    _password_executor.shutdown(wait=False)
\ No newline at end of file
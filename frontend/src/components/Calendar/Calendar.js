@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useAuth } from '../../contexts/AuthContext';
+import { useLiveUpdates } from '../../contexts/LiveUpdates';
 import {
   CalendarIcon,
   ChevronLeftIcon,
@@ -37,7 +38,9 @@ const Calendar = () => {
     location: '',
     attendees: '',
     reminder_minutes: 15,
-    category: 'general'
+    category: 'general',
+    recurrence_frequency: '',
+    recurrence_until: ''
   });
 
   // Alert system
@@ -50,6 +53,8 @@ const Calendar = () => {
     fetchEvents();
   }, [currentDate, view]);
 
+  useLiveUpdates(['calendar.changed'], () => fetchEvents());
+
   const showAlert = (type, title, message) => {
     setAlert({ type, title, message });
     setTimeout(() => setAlert(null), 5000);
@@ -151,14 +156,17 @@ const Calendar = () => {
       setEventForm({
         title: event.title,
         description: event.description || '',
-        start_date: new Date(event.start_date).toISOString().slice(0, 16),
-        end_date: new Date(event.end_date).toISOString().slice(0, 16),
+        // Occurrences of a series are edited through the series' own dates
+        start_date: new Date(event.series_start_date || event.start_date).toISOString().slice(0, 16),
+        end_date: new Date(event.series_end_date || event.end_date).toISOString().slice(0, 16),
         all_day: event.all_day,
         color: event.color,
         location: event.location || '',
         attendees: event.attendees.join(', '),
         reminder_minutes: event.reminder_minutes,
-        category: event.category
+        category: event.category,
+        recurrence_frequency: event.recurrence?.frequency || '',
+        recurrence_until: event.recurrence?.until ? new Date(event.recurrence.until).toISOString().slice(0, 10) : ''
       });
     } else {
       setEditingEvent(null);
@@ -176,7 +184,9 @@ const Calendar = () => {
         location: '',
         attendees: '',
         reminder_minutes: 15,
-        category: 'general'
+        category: 'general',
+        recurrence_frequency: '',
+        recurrence_until: ''
       });
     }
     setShowEventModal(true);
@@ -195,7 +205,9 @@ const Calendar = () => {
       location: '',
       attendees: '',
       reminder_minutes: 15,
-      category: 'general'
+      category: 'general',
+      recurrence_frequency: '',
+      recurrence_until: ''
     });
   };
 
@@ -218,7 +230,12 @@ const Calendar = () => {
         location: eventForm.location.trim() || null,
         attendees: eventForm.attendees ? eventForm.attendees.split(',').map(a => a.trim()).filter(a => a) : [],
         reminder_minutes: parseInt(eventForm.reminder_minutes),
-        category: eventForm.category
+        category: eventForm.category,
+        recurrence: eventForm.recurrence_frequency ? {
+          ...(editingEvent?.recurrence || {}),
+          frequency: eventForm.recurrence_frequency,
+          until: eventForm.recurrence_until ? new Date(`${eventForm.recurrence_until}T23:59:59`).toISOString() : null
+        } : null
       };
 
       if (editingEvent) {
@@ -316,7 +333,7 @@ const Calendar = () => {
             <div className="space-y-1">
               {dayEvents.slice(0, 3).map((event, index) => (
                 <div
-                  key={event.id}
+                  key={`${event.id}-${event.start_date}`}
                   className={`text-xs p-1 rounded truncate cursor-pointer hover:opacity-80 group relative`}
                   style={{ backgroundColor: event.color + '20', color: event.color, borderLeft: `3px solid ${event.color}` }}
                   onClick={(e) => {
@@ -418,7 +435,7 @@ const Calendar = () => {
                   >
                     {dayEvents.map(event => (
                       <div
-                        key={event.id}
+                        key={`${event.id}-${event.start_date}`}
                         className="text-xs p-1 mb-1 rounded truncate cursor-pointer hover:opacity-80 group relative"
                         style={{ backgroundColor: event.color + '20', color: event.color, borderLeft: `2px solid ${event.color}` }}
                         onClick={(e) => {
@@ -481,7 +498,7 @@ const Calendar = () => {
             <div className="space-y-3">
               {dayEvents.map(event => (
                 <div
-                  key={event.id}
+                  key={`${event.id}-${event.start_date}`}
                   className="p-4 rounded-lg border-l-4 hover:shadow-md transition-shadow cursor-pointer"
                   style={{ borderColor: event.color, backgroundColor: event.color + '10' }}
                   onClick={() => openEventModal(null, event)}
@@ -567,7 +584,7 @@ const Calendar = () => {
                   >
                     {hourEvents.map(event => (
                       <div
-                        key={event.id}
+                        key={`${event.id}-${event.start_date}`}
                         className="text-sm p-2 mb-1 rounded cursor-pointer hover:opacity-80 group relative"
                         style={{ backgroundColor: event.color + '20', color: event.color, borderLeft: `3px solid ${event.color}` }}
                         onClick={(e) => {
@@ -912,6 +929,38 @@ const Calendar = () => {
                 </div>
               </div>
 
+              <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
+                <div>
+                  <label className="block text-sm font-medium text-gray-700 mb-2">
+                    Répétition
+                  </label>
+                  <select
+                    value={eventForm.recurrence_frequency}
+                    onChange={(e) => setEventForm({...eventForm, recurrence_frequency: e.target.value})}
+                    className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
+                  >
+                    <option value="">Aucune</option>
+                    <option value="daily">Tous les jours</option>
+                    <option value="weekly">Toutes les semaines</option>
+                    <option value="monthly">Tous les mois</option>
+                  </select>
+                </div>
+
+                {eventForm.recurrence_frequency && (
+                  <div>
+                    <label className="block text-sm font-medium text-gray-700 mb-2">
+                      Jusqu'au
+                    </label>
+                    <input
+                      type="date"
+                      value={eventForm.recurrence_until}
+                      onChange={(e) => setEventForm({...eventForm, recurrence_until: e.target.value})}
+                      className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
+                    />
+                  </div>
+                )}
+              </div>
+
               <div className="flex justify-end space-x-3 pt-4 border-t">
                 <button
                   type="button"
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../../contexts/AuthContext';
+import { useLiveUpdates } from '../../contexts/LiveUpdates';
 import axios from 'axios';
 import {
   PaperAirplaneIcon,
@@ -25,6 +26,14 @@ const Dashboard = () => {
     fetchDashboardData();
   }, []);
 
+  useLiveUpdates(['counters', 'document.updated'], (event) => {
+    if (event.type === 'counters') {
+      setStats(prev => prev && { ...prev, unread_messages: event.data.unread_messages });
+    } else {
+      fetchDashboardData();
+    }
+  });
+
   const fetchDashboardData = async () => {
     try {
       const [statsResponse, documentsResponse] = await Promise.all([
@@ -27,22 +27,31 @@ const CourrierArriveeList = () => {
   const [viewingDocument, setViewingDocument] = useState(null);
   const [showViewModal, setShowViewModal] = useState(false);
 
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
   useEffect(() => {
-    fetchDocuments();
-  }, []);
+    // Search runs server-side; debounce while the user is typing
+    const timer = setTimeout(() => fetchDocuments(), searchTerm ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
-  const fetchDocuments = async () => {
+  const fetchDocuments = async (cursor = null) => {
     try {
-      setLoading(true);
-      const response = await axios.get(`/documents`, {
-        params: { document_type: 'incoming_mail' }
-      });
-      setDocuments(response.data);
+      if (cursor) setLoadingMore(true);
+      const params = { document_type: 'incoming_mail', limit: 50 };
+      if (searchTerm.trim()) params.q = searchTerm.trim();
+      if (cursor) params.cursor = cursor;
+
+      const response = await axios.get('/documents', { params });
+      setDocuments(previous => cursor ? [...previous, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching courrier arrivee documents:', error);
       setError('Erreur lors du chargement des documents');
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -113,7 +122,7 @@ const CourrierArriveeList = () => {
     }
   };
 
-  const downloadFile = async (filePath, originalName) => {
+  const downloadFile = async (filePath, originalName, documentId) => {
     try {
       console.log('Downloading file:', originalName);
       console.log('File path:', filePath);
@@ -127,6 +136,7 @@ const CourrierArriveeList = () => {
       console.log('Using relative path:', relativePath);
       
       const response = await axios.get(`/documents/download/${encodeURIComponent(relativePath)}`, {
+        params: { document_id: documentId },
         responseType: 'blob'
       });
       
@@ -147,17 +157,6 @@ const CourrierArriveeList = () => {
     }
   };
 
-  const filteredDocuments = documents.filter(doc => {
-    const searchLower = searchTerm.toLowerCase();
-    return (
-      doc.title?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.expediteur?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.destinataire?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.objet?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.reference_expediteur?.toLowerCase().includes(searchLower)
-    );
-  });
-
   if (loading) {
     return (
       <div className="flex justify-center items-center h-64">
@@ -260,7 +259,7 @@ const CourrierArriveeList = () => {
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-green-100">
-              {filteredDocuments.length === 0 ? (
+              {documents.length === 0 ? (
                 <tr>
                   <td colSpan="9" className="px-6 py-16 text-center">
                     <div className="flex flex-col items-center justify-center space-y-4">
@@ -284,7 +283,7 @@ const CourrierArriveeList = () => {
                   </td>
                 </tr>
               ) : (
-                filteredDocuments.map((doc, index) => (
+                documents.map((doc, index) => (
                   <tr key={doc.id} className={`hover:bg-green-50 transition-all duration-200 ${index % 2 === 0 ? 'bg-white' : 'bg-green-50/50'}`}>
                     <td className="px-6 py-4 whitespace-nowrap">
                       <div className="text-sm font-semibold text-green-700 flex items-center">
@@ -331,7 +330,7 @@ const CourrierArriveeList = () => {
                           {doc.metadata.files.map((file, fileIndex) => (
                             <button
                               key={fileIndex}
-                              onClick={() => downloadFile(file.file_path, file.original_name)}
+                              onClick={() => downloadFile(file.file_path, file.original_name, doc.id)}
                               className="flex items-center space-x-1 text-xs bg-blue-100 text-blue-800 px-2 py-1 rounded-full hover:bg-blue-200 transition-colors"
                               title={`Télécharger ${file.original_name}`}
                             >
@@ -342,7 +341,7 @@ const CourrierArriveeList = () => {
                         </div>
                       ) : doc.file_name ? (
                         <button
-                          onClick={() => downloadFile(doc.file_path, doc.file_name)}
+                          onClick={() => downloadFile(doc.file_path, doc.file_name, doc.id)}
                           className="flex items-center space-x-1 text-xs bg-blue-100 text-blue-800 px-2 py-1 rounded-full hover:bg-blue-200 transition-colors"
                           title={`Télécharger ${doc.file_name}`}
                         >
@@ -384,6 +383,17 @@ const CourrierArriveeList = () => {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="flex justify-center py-4">
+            <button
+              onClick={() => fetchDocuments(nextCursor)}
+              disabled={loadingMore}
+              className="px-4 py-2 bg-white border border-gray-300 text-gray-700 rounded-lg hover:bg-gray-50 transition-colors disabled:opacity-50"
+            >
+              {loadingMore ? 'Chargement...' : 'Charger plus'}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Floating Action Button */}
@@ -14,20 +14,30 @@ const CourrierDepartList = () => {
   const [viewingDocument, setViewingDocument] = useState(null);
   const [showViewModal, setShowViewModal] = useState(false);
 
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
   useEffect(() => {
-    fetchDocuments();
-  }, []);
+    // Search runs server-side; debounce while the user is typing
+    const timer = setTimeout(() => fetchDocuments(), searchTerm ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
-  const fetchDocuments = async () => {
+  const fetchDocuments = async (cursor = null) => {
     try {
-      const response = await axios.get('/documents', {
-        params: { document_type: 'outgoing_mail' }
-      });
-      setDocuments(response.data);
+      if (cursor) setLoadingMore(true);
+      const params = { document_type: 'outgoing_mail', limit: 50 };
+      if (searchTerm.trim()) params.q = searchTerm.trim();
+      if (cursor) params.cursor = cursor;
+
+      const response = await axios.get('/documents', { params });
+      setDocuments(previous => cursor ? [...previous, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Failed to fetch documents:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -79,16 +89,6 @@ const CourrierDepartList = () => {
     return new Date(dateString).toLocaleDateString('fr-FR');
   };
 
-  const filteredDocuments = documents.filter(doc => {
-    const searchLower = searchTerm.toLowerCase();
-    return (
-      doc.title?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.expediteur?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.destinataire?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.objet?.toLowerCase().includes(searchLower)
-    );
-  });
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -148,6 +148,7 @@ const CourrierDepartList = () => {
             <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-blue-600"></div>
           </div>
         ) : (
+          <>
           <div className="overflow-x-auto">
             <table className="min-w-full divide-y divide-gray-200">
               <thead className="bg-blue-100/80">
@@ -176,7 +177,7 @@ const CourrierDepartList = () => {
                 </tr>
               </thead>
               <tbody className="bg-white divide-y divide-gray-200">
-                {filteredDocuments.map((document) => (
+                {documents.map((document) => (
                   <tr key={document.id} className="hover:bg-gray-50 transition-colors duration-200">
                     <td className="px-6 py-4 whitespace-nowrap">
                       <div className="text-sm font-semibold text-blue-700 flex items-center">
@@ -245,6 +246,18 @@ const CourrierDepartList = () => {
               </tbody>
             </table>
           </div>
+          {nextCursor && (
+            <div className="flex justify-center py-4">
+              <button
+                onClick={() => fetchDocuments(nextCursor)}
+                disabled={loadingMore}
+                className="px-4 py-2 bg-white border border-gray-300 text-gray-700 rounded-lg hover:bg-gray-50 transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? 'Chargement...' : 'Charger plus'}
+              </button>
+            </div>
+          )}
+          </>
         )}
       </div>
 
@@ -40,6 +40,7 @@ const CourrierDepartViewModal = ({ document, isOpen, onClose }) => {
       console.log('Using relative path:', relativePath);
       
       const response = await axios.get(`/documents/download/${encodeURIComponent(relativePath)}`, {
+        params: { document_id: document?.id },
         responseType: 'blob'
       });
       
@@ -100,6 +101,7 @@ const CourrierDepartViewModal = ({ document, isOpen, onClose }) => {
       console.log('Using relative path for preview:', relativePath);
       
       const response = await axios.get(`/documents/download/${encodeURIComponent(relativePath)}`, {
+        params: { document_id: document?.id },
         responseType: 'blob'
       });
       
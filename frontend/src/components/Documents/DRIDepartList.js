@@ -112,7 +112,7 @@ const DRIDepartList = () => {
     }
   };
 
-  const downloadFile = async (filePath, originalName) => {
+  const downloadFile = async (filePath, originalName, documentId) => {
     try {
       console.log('Downloading file:', originalName);
       console.log('File path:', filePath);
@@ -126,6 +126,7 @@ const DRIDepartList = () => {
       console.log('Using relative path:', relativePath);
       
       const response = await axios.get(`/documents/download/${encodeURIComponent(relativePath)}`, {
+        params: { document_id: documentId },
         responseType: 'blob'
       });
       
@@ -302,7 +303,7 @@ const DRIDepartList = () => {
                           {document.metadata.files.map((file, fileIndex) => (
                             <button
                               key={fileIndex}
-                              onClick={() => downloadFile(file.file_path, file.original_name)}
+                              onClick={() => downloadFile(file.file_path, file.original_name, document.id)}
                               className="flex items-center space-x-1 text-xs bg-blue-100 text-blue-800 px-2 py-1 rounded-full hover:bg-blue-200 transition-colors"
                               title={`Télécharger ${file.original_name}`}
                             >
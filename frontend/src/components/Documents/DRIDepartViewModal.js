@@ -40,6 +40,7 @@ const DRIDepartViewModal = ({ document, isOpen, onClose }) => {
       console.log('Using relative path:', relativePath);
       
       const response = await axios.get(`/documents/download/${encodeURIComponent(relativePath)}`, {
+        params: { document_id: document?.id },
         responseType: 'blob'
       });
       
@@ -80,6 +81,7 @@ const DRIDepartViewModal = ({ document, isOpen, onClose }) => {
       
       // Use the same endpoint pattern as download function
       const response = await axios.get(`/documents/download/${encodeURIComponent(relativePath)}`, {
+        params: { document_id: document?.id },
         responseType: 'blob'
       });
       
@@ -20,23 +20,32 @@ const DocumentList = ({ documentType, title, icon: IconComponent, color }) => {
   const [loading, setLoading] = useState(true);
   const [searchTerm, setSearchTerm] = useState('');
   const [statusFilter, setStatusFilter] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
-    fetchDocuments();
-  }, [documentType]);
+    // Search runs server-side; debounce while the user is typing
+    const timer = setTimeout(() => fetchDocuments(), searchTerm ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [documentType, statusFilter, searchTerm]);
 
-  const fetchDocuments = async () => {
+  const fetchDocuments = async (cursor = null) => {
     try {
-      const params = {};
+      if (cursor) setLoadingMore(true);
+      const params = { limit: 50 };
       if (documentType) params.document_type = documentType;
       if (statusFilter) params.status = statusFilter;
+      if (searchTerm.trim()) params.q = searchTerm.trim();
+      if (cursor) params.cursor = cursor;
 
       const response = await axios.get('/documents', { params });
-      setDocuments(response.data);
+      setDocuments(previous => cursor ? [...previous, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Failed to fetch documents:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -74,11 +83,6 @@ const DocumentList = ({ documentType, title, icon: IconComponent, color }) => {
     return icons[type] || DocumentIcon;
   };
 
-  const filteredDocuments = documents.filter(doc =>
-    doc.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    doc.description?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -146,7 +150,7 @@ const DocumentList = ({ documentType, title, icon: IconComponent, color }) => {
 
       {/* Documents Grid */}
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-        {filteredDocuments.map((document) => {
+        {documents.map((document) => {
           const TypeIcon = getDocumentTypeIcon(document.document_type);
           return (
             <div key={document.id} className="bg-white rounded-xl p-6 shadow-lg hover:shadow-xl transition-shadow">
@@ -230,7 +234,19 @@ const DocumentList = ({ documentType, title, icon: IconComponent, color }) => {
         })}
       </div>
 
-      {filteredDocuments.length === 0 && (
+      {nextCursor && (
+        <div className="flex justify-center">
+          <button
+            onClick={() => fetchDocuments(nextCursor)}
+            disabled={loadingMore}
+            className="px-4 py-2 bg-white border border-gray-300 text-gray-700 rounded-lg hover:bg-gray-50 transition-colors disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
+
+      {documents.length === 0 && (
         <div className="text-center py-12">
           <DocumentIcon className="w-16 h-16 text-gray-300 mx-auto mb-4" />
           <h3 className="text-lg font-medium text-gray-900 mb-2">No documents found</h3>
@@ -29,6 +29,7 @@ const OMApprovalForm = ({ onClose, onSave }) => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [employeeLoading, setEmployeeLoading] = useState(false);
+  const [suggestions, setSuggestions] = useState([]);
 
   // Remove the useEffect that pre-fills user information
   // useEffect(() => {
@@ -46,10 +47,8 @@ const OMApprovalForm = ({ onClose, onSave }) => {
     });
     setError('');
     
-    // If matricule changed, fetch employee data
-    if (name === 'matricule' && value.trim() !== '') {
-      fetchEmployeeData(value.trim());
-    } else if (name === 'matricule' && value.trim() === '') {
+    // Employee data is looked up by the typeahead effect below
+    if (name === 'matricule' && value.trim() === '') {
       // Clear auto-populated fields if matricule is empty (but keep itineraire)
       setFormData(prev => ({
         ...prev,
@@ -61,24 +60,41 @@ const OMApprovalForm = ({ onClose, onSave }) => {
     }
   };
 
-  const fetchEmployeeData = async (matricule) => {
-    setEmployeeLoading(true);
-    try {
-      const response = await axios.get(`/employees/${matricule}`);
-      const employeeData = response.data;
-      
-      // Auto-populate form fields with employee data (excluding itineraire)
-      setFormData(prev => ({
-        ...prev,
-        fullName: employeeData.fullName,
-        jobTitle: employeeData.jobTitle,
-        division: employeeData.division
-        // itineraire is not auto-populated - user fills it manually
-      }));
-    } catch (error) {
-      console.error('Error fetching employee data:', error);
-      if (error.response?.status === 404) {
-        // Clear fields if employee not found (excluding itineraire)
+  const applyEmployee = (employeeData) => {
+    // Auto-populate form fields with employee data (excluding itineraire)
+    setFormData(prev => ({
+      ...prev,
+      matricule: employeeData.matricule,
+      fullName: employeeData.fullName,
+      jobTitle: employeeData.jobTitle,
+      division: employeeData.division
+      // itineraire is not auto-populated - user fills it manually
+    }));
+    setSuggestions([]);
+  };
+
+  // Search the employee directory while the matricule (or a name) is typed,
+  // filling the form as soon as the input matches a matricule exactly
+  useEffect(() => {
+    const query = formData.matricule.trim();
+    if (query === '') {
+      setSuggestions([]);
+      setEmployeeLoading(false);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      setEmployeeLoading(true);
+      try {
+        const response = await axios.get('/employees', { params: { q: query, limit: 8 } });
+        if (cancelled) return;
+        const matches = response.data.employees;
+        const exact = matches.find(employee => employee.matricule.toUpperCase() === query.toUpperCase());
+        if (exact) {
+          applyEmployee(exact);
+          return;
+        }
+        // Clear fields until an employee is picked (excluding itineraire)
         setFormData(prev => ({
           ...prev,
           fullName: '',
@@ -86,14 +102,20 @@ const OMApprovalForm = ({ onClose, onSave }) => {
           division: ''
           // itineraire remains as user entered
         }));
-        setError('Employé non trouvé pour ce matricule');
-      } else {
-        setError('Erreur lors de la récupération des données employé');
+        setSuggestions(matches);
+        setError(matches.length === 0 ? 'Employé non trouvé pour ce matricule' : '');
+      } catch (error) {
+        console.error('Error fetching employee data:', error);
+        if (!cancelled) setError('Erreur lors de la récupération des données employé');
+      } finally {
+        if (!cancelled) setEmployeeLoading(false);
       }
-    } finally {
-      setEmployeeLoading(false);
-    }
-  };
+    }, 200);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [formData.matricule]);
 
   const validateForm = () => {
     const requiredFields = ['matricule', 'jobTitle', 'division', 'itineraire', 'dateDepart', 'dateRetour', 'transport', 'objet'];
@@ -595,13 +617,32 @@ const OMApprovalForm = ({ onClose, onSave }) => {
                 onChange={handleChange}
                 required
                 className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-purple-500 focus:border-transparent"
-                placeholder="Saisir le matricule"
+                placeholder="Saisir le matricule ou le nom"
+                autoComplete="off"
               />
               {employeeLoading && (
                 <div className="absolute right-3 top-1/2 transform -translate-y-1/2">
                   <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-purple-600"></div>
                 </div>
               )}
+              {suggestions.length > 0 && (
+                <ul className="absolute z-10 mt-1 w-full bg-white border border-gray-200 rounded-lg shadow-lg max-h-64 overflow-y-auto">
+                  {suggestions.map(employee => (
+                    <li key={employee.matricule}>
+                      <button
+                        type="button"
+                        onClick={() => applyEmployee(employee)}
+                        className="w-full text-left px-4 py-2 hover:bg-purple-50"
+                      >
+                        <div className="text-sm font-medium text-gray-900">
+                          {employee.fullName} <span className="text-gray-500">({employee.matricule})</span>
+                        </div>
+                        <div className="text-xs text-gray-500">{employee.jobTitle}</div>
+                      </button>
+                    </li>
+                  ))}
+                </ul>
+              )}
             </div>
           </div>
           <div className="space-y-2">
@@ -19,20 +19,30 @@ const OMApprovalList = () => {
   const [showForm, setShowForm] = useState(false);
   const [editingDocument, setEditingDocument] = useState(null);
 
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
   useEffect(() => {
-    fetchDocuments();
-  }, []);
+    // Search runs server-side; debounce while the user is typing
+    const timer = setTimeout(() => fetchDocuments(), searchTerm ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
-  const fetchDocuments = async () => {
+  const fetchDocuments = async (cursor = null) => {
     try {
-      const response = await axios.get('/documents', {
-        params: { document_type: 'om_approval' }
-      });
-      setDocuments(response.data);
+      if (cursor) setLoadingMore(true);
+      const params = { document_type: 'om_approval', limit: 50 };
+      if (searchTerm.trim()) params.q = searchTerm.trim();
+      if (cursor) params.cursor = cursor;
+
+      const response = await axios.get('/documents', { params });
+      setDocuments(previous => cursor ? [...previous, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Failed to fetch documents:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -451,17 +461,6 @@ const OMApprovalList = () => {
     return new Date(dateString).toLocaleDateString('fr-FR');
   };
 
-  const filteredDocuments = documents.filter(doc => {
-    const searchLower = searchTerm.toLowerCase();
-    return (
-      doc.title?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.fullName?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.matricule?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.itineraire?.toLowerCase().includes(searchLower) ||
-      doc.metadata?.objet?.toLowerCase().includes(searchLower)
-    );
-  });
-
   if (loading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -559,7 +558,7 @@ const OMApprovalList = () => {
               </tr>
             </thead>
             <tbody className="bg-white divide-y divide-gray-200">
-              {filteredDocuments.map((doc) => (
+              {documents.map((doc) => (
                 <tr key={doc.id} className="hover:bg-gray-50">
                   <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">
                     {doc.reference || `OM-${new Date(doc.created_at).getFullYear()}-${String(doc.id).padStart(3, '0')}`}
@@ -629,8 +628,19 @@ const OMApprovalList = () => {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="flex justify-center py-4">
+            <button
+              onClick={() => fetchDocuments(nextCursor)}
+              disabled={loadingMore}
+              className="px-4 py-2 bg-white border border-gray-300 text-gray-700 rounded-lg hover:bg-gray-50 transition-colors disabled:opacity-50"
+            >
+              {loadingMore ? 'Chargement...' : 'Charger plus'}
+            </button>
+          </div>
+        )}
 
-        {filteredDocuments.length === 0 && (
+        {documents.length === 0 && (
           <div className="text-center py-12">
             <DocumentCheckIcon className="w-16 h-16 text-gray-300 mx-auto mb-4" />
             <h3 className="text-lg font-medium text-gray-900 mb-2">Aucun ordre de mission</h3>
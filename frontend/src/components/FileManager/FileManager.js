@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useAuth } from '../../contexts/AuthContext';
+import FileThumbnail, { hasThumbnail } from './FileThumbnail';
 import {
   FolderIcon,
   DocumentIcon,
@@ -621,7 +622,15 @@ const FileManager = () => {
                       <div key={file.id} className="group bg-gradient-to-br from-gray-50 to-gray-100 border border-gray-200 rounded-xl p-5 hover:shadow-lg transition-all duration-200 hover:scale-105">
                         <div className="flex items-start space-x-3 mb-4">
                           <div className="bg-white p-2 rounded-lg shadow-sm">
-                            {getFileIcon(file.name)}
+                            {hasThumbnail(file.name) ? (
+                              <FileThumbnail
+                                fileId={file.id}
+                                size={128}
+                                alt={file.name}
+                                className="w-12 h-12 object-cover rounded"
+                                fallback={getFileIcon(file.name)}
+                              />
+                            ) : getFileIcon(file.name)}
                           </div>
                           <div className="flex-1 min-w-0">
                             <h4 className="font-medium text-gray-900 truncate text-sm mb-1">
@@ -845,11 +854,20 @@ const FileManager = () => {
               
               {previewData.preview_type === 'image' && (
                 <div className="flex items-center justify-center h-full">
-                  <img
-                    src={`${backendUrl}${previewData.file_url}`}
-                    alt={previewData.name}
-                    className="max-w-full max-h-full object-contain rounded-lg shadow-lg"
-                  />
+                  {previewData.thumbnail_url ? (
+                    <FileThumbnail
+                      fileId={previewFile.id}
+                      size={1024}
+                      alt={previewData.name}
+                      className="max-w-full max-h-full object-contain rounded-lg shadow-lg"
+                    />
+                  ) : (
+                    <img
+                      src={`${backendUrl}${previewData.file_url}`}
+                      alt={previewData.name}
+                      className="max-w-full max-h-full object-contain rounded-lg shadow-lg"
+                    />
+                  )}
                 </div>
               )}
               
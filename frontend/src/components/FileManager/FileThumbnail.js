@@ -0,0 +1,49 @@
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
+
+const backendUrl = process.env.REACT_APP_BACKEND_URL || '';
+
+// Extensions the backend renders thumbnails for (images and the first page of PDFs)
+const THUMBNAIL_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 'pdf'];
+
+export const hasThumbnail = (fileName) =>
+  THUMBNAIL_EXTENSIONS.includes((fileName || '').split('.').pop().toLowerCase());
+
+// The thumbnail route requires the bearer token, which a plain <img src> cannot
+// send: fetch the JPEG through axios and display it from an object URL.
+const FileThumbnail = ({ fileId, size = 256, alt, className, fallback = null }) => {
+  const [imageUrl, setImageUrl] = useState(null);
+  const [failed, setFailed] = useState(false);
+
+  useEffect(() => {
+    let objectUrl = null;
+    let cancelled = false;
+    setImageUrl(null);
+    setFailed(false);
+
+    axios.get(`${backendUrl}/api/file-manager/thumbnail/${fileId}`, {
+      params: { size },
+      responseType: 'blob'
+    })
+      .then((response) => {
+        if (cancelled) return;
+        objectUrl = URL.createObjectURL(response.data);
+        setImageUrl(objectUrl);
+      })
+      .catch(() => {
+        if (!cancelled) setFailed(true);
+      });
+
+    return () => {
+      cancelled = true;
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+    };
+  }, [fileId, size]);
+
+  if (failed || !imageUrl) {
+    return fallback;
+  }
+  return <img src={imageUrl} alt={alt} className={className} />;
+};
+
+export default FileThumbnail;
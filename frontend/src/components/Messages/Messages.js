@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../../contexts/AuthContext';
+import { useLiveUpdates } from '../../contexts/LiveUpdates';
 import axios from 'axios';
 import {
   PlusIcon,
@@ -11,7 +12,11 @@ import {
 
 const Messages = () => {
   const { user } = useAuth();
-  const [messages, setMessages] = useState([]);
+  const [conversations, setConversations] = useState([]);
+  const [conversationsCursor, setConversationsCursor] = useState(null);
+  const [activeConversation, setActiveConversation] = useState(null);
+  const [threadMessages, setThreadMessages] = useState([]);
+  const [threadCursor, setThreadCursor] = useState(null);
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
   const [showNewMessage, setShowNewMessage] = useState(false);
@@ -22,23 +27,41 @@ const Messages = () => {
   });
 
   useEffect(() => {
-    fetchMessages();
+    fetchConversations();
     if (user?.role === 'admin') {
       fetchUsers();
     }
   }, [user]);
 
-  const fetchMessages = async () => {
+  useLiveUpdates(['message.created', 'conversation.read'], (event) => {
+    fetchConversations();
+    if (activeConversation && (event.type === 'resync' || event.data.conversation_id === activeConversation.id)) {
+      fetchThread(activeConversation);
+    }
+  });
+
+  const fetchConversations = async (cursor = null) => {
     try {
-      const response = await axios.get('/messages');
-      setMessages(response.data);
+      const response = await axios.get('/messages/conversations', { params: cursor ? { cursor } : {} });
+      setConversations(prev => cursor ? [...prev, ...response.data.conversations] : response.data.conversations);
+      setConversationsCursor(response.data.next_cursor);
     } catch (error) {
-      console.error('Failed to fetch messages:', error);
+      console.error('Failed to fetch conversations:', error);
     } finally {
       setLoading(false);
     }
   };
 
+  const fetchThread = async (conversation, cursor = null) => {
+    try {
+      const response = await axios.get(`/messages/conversations/${conversation.id}`, { params: cursor ? { cursor } : {} });
+      setThreadMessages(prev => cursor ? [...prev, ...response.data.messages] : response.data.messages);
+      setThreadCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Failed to fetch conversation:', error);
+    }
+  };
+
   const fetchUsers = async () => {
     try {
       const response = await axios.get('/users');
@@ -54,27 +77,39 @@ const Messages = () => {
       await axios.post('/messages', newMessage);
       setNewMessage({ subject: '', content: '', recipient_id: '' });
       setShowNewMessage(false);
-      fetchMessages();
+      fetchConversations();
+      if (activeConversation) {
+        fetchThread(activeConversation);
+      }
     } catch (error) {
       console.error('Failed to send message:', error);
       alert('Failed to send message');
     }
   };
 
-  const markAsRead = async (messageId) => {
-    try {
-      await axios.put(`/messages/${messageId}/read`);
-      setMessages(messages.map(msg => 
-        msg.id === messageId ? { ...msg, is_read: true } : msg
-      ));
-    } catch (error) {
-      console.error('Failed to mark message as read:', error);
+  const openConversation = async (conversation) => {
+    if (activeConversation?.id === conversation.id) {
+      setActiveConversation(null);
+      return;
+    }
+    setActiveConversation(conversation);
+    setThreadMessages([]);
+    fetchThread(conversation);
+    if (conversation.unread > 0) {
+      try {
+        await axios.put(`/messages/conversations/${conversation.id}/read`);
+        setConversations(conversations.map(c =>
+          c.id === conversation.id ? { ...c, unread: 0 } : c
+        ));
+      } catch (error) {
+        console.error('Failed to mark conversation as read:', error);
+      }
     }
   };
 
-  const getMessageClass = (message) => {
+  const getConversationClass = (conversation) => {
     const baseClass = "p-4 rounded-lg border cursor-pointer transition-colors hover:bg-gray-50";
-    if (message.recipient_id === user.id && !message.is_read) {
+    if (conversation.unread > 0) {
       return `${baseClass} border-purple-200 bg-purple-50`;
     }
     return `${baseClass} border-gray-200 bg-white`;
@@ -184,10 +219,10 @@ const Messages = () => {
         </div>
       )}
 
-      {/* Messages List */}
+      {/* Conversations List */}
       <div className="bg-white rounded-xl shadow-lg">
         <div className="p-6">
-          {messages.length === 0 ? (
+          {conversations.length === 0 ? (
             <div className="text-center py-12">
               <ChatBubbleLeftIcon className="w-16 h-16 text-gray-300 mx-auto mb-4" />
               <h3 className="text-lg font-medium text-gray-900 mb-2">No messages yet</h3>
@@ -195,54 +230,80 @@ const Messages = () => {
             </div>
           ) : (
             <div className="space-y-4">
-              {messages.map((message) => (
-                <div
-                  key={message.id}
-                  className={getMessageClass(message)}
-                  onClick={() => {
-                    if (message.recipient_id === user.id && !message.is_read) {
-                      markAsRead(message.id);
-                    }
-                  }}
-                >
-                  <div className="flex items-start justify-between">
-                    <div className="flex-1 min-w-0">
-                      <div className="flex items-center space-x-2 mb-1">
-                        <UserIcon className="w-4 h-4 text-gray-400" />
-                        <span className="text-sm font-medium text-gray-900">
-                          {message.sender_id === user.id ? 'You' : 'User'}
-                        </span>
-                        {message.recipient_id === user.id && !message.is_read && (
-                          <span className="px-2 py-1 bg-purple-600 text-white text-xs rounded-full">
-                            New
+              {conversations.map((conversation) => (
+                <div key={conversation.id}>
+                  <div
+                    className={getConversationClass(conversation)}
+                    onClick={() => openConversation(conversation)}
+                  >
+                    <div className="flex items-start justify-between">
+                      <div className="flex-1 min-w-0">
+                        <div className="flex items-center space-x-2 mb-1">
+                          <UserIcon className="w-4 h-4 text-gray-400" />
+                          <span className="text-sm font-medium text-gray-900">
+                            {conversation.counterpart_name}
                           </span>
-                        )}
-                      </div>
-                      
-                      <h4 className="text-base font-medium text-gray-900 mb-2">
-                        {message.subject}
-                      </h4>
-                      
-                      <p className="text-gray-600 text-sm line-clamp-2 mb-2">
-                        {message.content}
-                      </p>
-                      
-                      <div className="flex items-center text-xs text-gray-500">
-                        <ClockIcon className="w-3 h-3 mr-1" />
-                        {new Date(message.created_at).toLocaleString()}
+                          {conversation.unread > 0 && (
+                            <span className="px-2 py-1 bg-purple-600 text-white text-xs rounded-full">
+                              {conversation.unread} New
+                            </span>
+                          )}
+                        </div>
+
+                        <h4 className="text-base font-medium text-gray-900 mb-2">
+                          {conversation.last_message.subject}
+                        </h4>
+
+                        <p className="text-gray-600 text-sm line-clamp-2 mb-2">
+                          {conversation.last_message.sender_id === user.id ? 'You: ' : ''}
+                          {conversation.last_message.snippet}
+                        </p>
+
+                        <div className="flex items-center text-xs text-gray-500">
+                          <ClockIcon className="w-3 h-3 mr-1" />
+                          {new Date(conversation.last_message_at).toLocaleString()}
+                        </div>
                       </div>
                     </div>
-                    
-                    <div className="ml-4">
-                      {message.sender_id === user.id ? (
-                        <span className="text-xs text-gray-500">Sent</span>
-                      ) : (
-                        <span className="text-xs text-gray-500">Received</span>
+                  </div>
+
+                  {activeConversation?.id === conversation.id && (
+                    <div className="mt-2 ml-6 space-y-3">
+                      {threadMessages.map((message) => (
+                        <div key={message.id} className="p-3 rounded-lg border border-gray-200 bg-gray-50">
+                          <div className="flex items-center justify-between mb-1">
+                            <span className="text-sm font-medium text-gray-900">{message.subject}</span>
+                            <span className="text-xs text-gray-500">
+                              {message.sender_id === user.id ? 'Sent' : 'Received'}
+                            </span>
+                          </div>
+                          <p className="text-gray-600 text-sm whitespace-pre-line mb-1">{message.content}</p>
+                          <div className="flex items-center text-xs text-gray-500">
+                            <ClockIcon className="w-3 h-3 mr-1" />
+                            {new Date(message.created_at).toLocaleString()}
+                          </div>
+                        </div>
+                      ))}
+                      {threadCursor && (
+                        <button
+                          onClick={() => fetchThread(conversation, threadCursor)}
+                          className="text-sm text-purple-600 hover:text-purple-700"
+                        >
+                          Load older messages
+                        </button>
                       )}
                     </div>
-                  </div>
+                  )}
                 </div>
               ))}
+              {conversationsCursor && (
+                <button
+                  onClick={() => fetchConversations(conversationsCursor)}
+                  className="w-full py-2 text-sm text-purple-600 hover:text-purple-700"
+                >
+                  Load more conversations
+                </button>
+              )}
             </div>
           )}
         </div>
@@ -162,11 +162,16 @@ const Settings = () => {
     }
 
     try {
-      await axios.post(`${backendUrl}/api/settings/change-password`, {
+      const response = await axios.post(`${backendUrl}/api/settings/change-password`, {
         current_password: passwordForm.current_password,
         new_password: passwordForm.new_password
       });
       
+      // Tokens issued before the change are revoked; keep the session on the new one
+      if (response.data.access_token) {
+        localStorage.setItem('authToken', response.data.access_token);
+      }
+      
       setShowPasswordModal(false);
       setPasswordForm({
         current_password: '',
@@ -0,0 +1,90 @@
+import { useEffect, useRef } from 'react';
+
+// One push connection per tab, shared by every component listening for updates.
+// WebSocket first; after repeated failures to open one (e.g. behind a proxy that
+// blocks upgrades) the tab falls back to server-sent events.
+const BACKEND_URL = (process.env.REACT_APP_BACKEND_URL || window.location.origin).replace(/\/$/, '');
+const WEBSOCKET_ATTEMPTS = 3;
+
+const listeners = new Set();
+let socket = null;
+let eventSource = null;
+let reconnectTimer = null;
+let failedAttempts = 0;
+
+const dispatch = (raw) => {
+  const event = JSON.parse(raw);
+  if (event.type === 'heartbeat') {
+    return;
+  }
+  listeners.forEach(listener => listener(event));
+};
+
+const connect = () => {
+  const token = localStorage.getItem('authToken');
+  if (!token || listeners.size === 0 || socket || eventSource) {
+    return;
+  }
+
+  if (window.WebSocket && failedAttempts < WEBSOCKET_ATTEMPTS) {
+    let opened = false;
+    socket = new WebSocket(`${BACKEND_URL.replace(/^http/, 'ws')}/api/ws?token=${encodeURIComponent(token)}`);
+    socket.onopen = () => {
+      opened = true;
+      failedAttempts = 0;
+    };
+    socket.onmessage = (message) => dispatch(message.data);
+    socket.onclose = () => {
+      socket = null;
+      failedAttempts = opened ? 0 : failedAttempts + 1;
+      // Whatever happened while disconnected is unknown: listeners refetch
+      if (opened) {
+        listeners.forEach(listener => listener({ type: 'resync' }));
+      }
+      if (listeners.size > 0) {
+        reconnectTimer = setTimeout(connect, Math.min(30000, 1000 * 2 ** failedAttempts));
+      }
+    };
+  } else {
+    // EventSource reconnects by itself
+    eventSource = new EventSource(`${BACKEND_URL}/api/events/stream?token=${encodeURIComponent(token)}`);
+    eventSource.onmessage = (message) => dispatch(message.data);
+  }
+};
+
+const disconnect = () => {
+  clearTimeout(reconnectTimer);
+  if (socket) {
+    socket.onclose = null;
+    socket.close();
+    socket = null;
+  }
+  if (eventSource) {
+    eventSource.close();
+    eventSource = null;
+  }
+};
+
+// Calls `handler` for pushed events of the given types, and for "resync" when
+// events may have been missed
+export const useLiveUpdates = (types, handler) => {
+  const handlerRef = useRef(handler);
+  handlerRef.current = handler;
+  const typesKey = types.join(',');
+
+  useEffect(() => {
+    const listener = (event) => {
+      if (event.type === 'resync' || typesKey.split(',').includes(event.type)) {
+        handlerRef.current(event);
+      }
+    };
+    listeners.add(listener);
+    connect();
+    return () => {
+      listeners.delete(listener);
+      if (listeners.size === 0) {
+        disconnect();
+      }
+    };
+  }, [typesKey]);
+};
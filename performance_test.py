@@ -0,0 +1,1158 @@
+#!/usr/bin/env python3
+"""
+EPSys Backend Performance Benchmarks
+Load and concurrency benchmarks for the backend API. Each benchmark logs its
+measurements and a pass/fail result for its correctness assertion.
+
+Run against a local backend:
+    BACKEND_URL=http://localhost:8001/api python performance_test.py
+"""
+
+import requests
+import hashlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuration
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:8001/api")
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017")
+DB_NAME = os.environ.get("DB_NAME", "epsys_database")
+HEADERS = {"Content-Type": "application/json"}
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "64"))
+
+class TestResults:
+    def __init__(self):
+        self.passed = 0
+        self.failed = 0
+        self.errors = []
+
+    def log_success(self, test_name):
+        print(f"✅ {test_name}")
+        self.passed += 1
+
+    def log_failure(self, test_name, error):
+        print(f"❌ {test_name}: {error}")
+        self.failed += 1
+        self.errors.append(f"{test_name}: {error}")
+
+    def summary(self):
+        total = self.passed + self.failed
+        print(f"\n{'='*60}")
+        print(f"BENCHMARK SUMMARY: {self.passed}/{total} checks passed")
+        if self.errors:
+            print(f"\nFAILURES:")
+            for error in self.errors:
+                print(f"  - {error}")
+        print(f"{'='*60}")
+
+# Global test state
+results = TestResults()
+session = requests.Session()
+auth_token = None
+
+def make_request(method, endpoint, data=None, headers=None, files=None, token=None, params=None):
+    """Helper function to make HTTP requests"""
+    url = f"{BACKEND_URL}{endpoint}"
+    request_headers = HEADERS.copy()
+
+    if token:
+        request_headers["Authorization"] = f"Bearer {token}"
+
+    if headers:
+        request_headers.update(headers)
+
+    # Remove Content-Type for file uploads
+    if files:
+        request_headers.pop("Content-Type", None)
+
+    try:
+        if method == "GET":
+            return session.get(url, headers=request_headers, params=params, timeout=60)
+        elif method == "POST":
+            if files:
+                return session.post(url, files=files, data=data, headers=request_headers, timeout=60)
+            return session.post(url, json=data, headers=request_headers, timeout=60)
+        elif method == "PUT":
+            return session.put(url, json=data, headers=request_headers, timeout=60)
+        elif method == "DELETE":
+            return session.delete(url, headers=request_headers, timeout=60)
+        raise ValueError(f"Unsupported method: {method}")
+    except requests.exceptions.RequestException as e:
+        print(f"Request failed: {method} {url} - {str(e)}")
+        return None
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def get_benchmark_db():
+    """Direct database handle for seeding large datasets"""
+    from pymongo import MongoClient
+    return MongoClient(MONGO_URL)[DB_NAME]
+
+def seed_documents(db, count, batch_size=10000, **fields):
+    """Insert `count` benchmark documents tagged for cleanup, spread over several years"""
+    types = ["outgoing_mail", "incoming_mail", "om_approval", "dri_deport", "general"]
+    statuses = ["draft", "pending", "approved", "rejected", "completed"]
+    run_id = str(uuid.uuid4())
+    start = datetime(2019, 1, 1)
+    for offset in range(0, count, batch_size):
+        db.documents.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "reference": f"BENCH-{offset + i:07d}",
+                "title": f"Benchmark document {offset + i}",
+                "description": None,
+                "document_type": types[(offset + i) % len(types)],
+                "status": statuses[(offset + i) % len(statuses)],
+                "created_by": fields.get("created_by", "benchmark"),
+                "assigned_to": None,
+                "tags": [],
+                "metadata": {"benchmark_run": run_id},
+                "created_at": start + timedelta(minutes=offset + i),
+                "updated_at": start + timedelta(minutes=offset + i),
+                **{k: v for k, v in fields.items() if k != "created_by"}
+            }
+            for i in range(min(batch_size, count - offset))
+        ])
+    return run_id
+
+def cleanup_documents(db, run_id):
+    db.documents.delete_many({"metadata.benchmark_run": run_id})
+
+def seed_folder_tree(db, root, count, fanout=10, batch_size=10000):
+    """Insert `count` folders below `root`, breadth-first with `fanout` children per folder"""
+    pending = [root]
+    batch = []
+    created = 0
+    while created < count:
+        parent = pending.pop(0)
+        for i in range(min(fanout, count - created)):
+            folder = {
+                "id": str(uuid.uuid4()),
+                "name": f"bench-{created:06d}",
+                "parent_id": parent["id"],
+                "path": f"{parent['path']}/bench-{created:06d}",
+                "ancestors": parent.get("ancestors", []) + [parent["id"]],
+                "created_by": root["created_by"],
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }
+            pending.append(folder)
+            batch.append(folder)
+            created += 1
+        if len(batch) >= batch_size:
+            db.folders.insert_many(batch)
+            batch = []
+    if batch:
+        db.folders.insert_many(batch)
+
+def setup_benchmark_user():
+    """Register and log in an admin user for the benchmarks"""
+    global auth_token
+    suffix = str(uuid.uuid4())[:8]
+    user_data = {
+        "username": f"bench_{suffix}",
+        "email": f"bench_{suffix}@epsys.com",
+        "password": "BenchPass123!",
+        "full_name": "Benchmark Runner",
+        "role": "admin"
+    }
+    response = make_request("POST", "/register", user_data)
+    if not response or response.status_code != 200:
+        results.log_failure("Benchmark user registration", response.text if response else "Connection failed")
+        return False
+
+    response = make_request("POST", "/login", {"username": user_data["username"], "password": user_data["password"]})
+    if not response or response.status_code != 200:
+        results.log_failure("Benchmark user login", response.text if response else "Connection failed")
+        return False
+
+    auth_token = response.json()["access_token"]
+    results.log_success("Benchmark user setup")
+    return True
+
+def bench_reference_allocation(total=int(os.environ.get("BENCH_REFERENCE_CREATES", "2000"))):
+    """Fire parallel document creates and check every reference is unique"""
+    print(f"\n🔢 Benchmarking reference allocation ({total} creates, {CONCURRENCY} workers)...")
+
+    def create(i):
+        response = make_request("POST", "/documents", {
+            "title": f"Benchmark courrier {i}",
+            "document_type": "outgoing_mail"
+        }, token=auth_token)
+        return response.json()["reference"] if response and response.status_code == 200 else None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        references = list(pool.map(create, range(total)))
+    elapsed = time.perf_counter() - started
+
+    failed = references.count(None)
+    duplicates = [ref for ref, count in Counter(r for r in references if r).items() if count > 1]
+    print(f"   {total - failed} documents in {elapsed:.2f}s = {(total - failed) / elapsed:.1f} allocations/s")
+
+    if failed:
+        results.log_failure("Reference allocation", f"{failed} creates failed")
+    elif duplicates:
+        results.log_failure("Reference allocation", f"{len(duplicates)} duplicate references, e.g. {duplicates[:5]}")
+    else:
+        results.log_success("Reference allocation produced no duplicates")
+
+def bench_download_revalidation(opens=int(os.environ.get("BENCH_MODAL_OPENS", "20"))):
+    """Compare bytes transferred for repeated viewer opens of the same scan"""
+    print(f"\n📄 Benchmarking repeated file downloads ({opens} modal opens)...")
+
+    scan = os.urandom(4 * 1024 * 1024)
+    response = make_request("POST", "/file-manager/upload", files=[
+        ("files", ("bench_scan.pdf", scan, "application/pdf"))
+    ], token=auth_token)
+    if not response or response.status_code != 200:
+        results.log_failure("Download benchmark upload", response.text if response else "Connection failed")
+        return
+    file_id = response.json()["files"][0]["id"]
+    endpoint = f"/file-manager/download/{file_id}"
+
+    # Without validators every open downloads the whole file
+    plain_bytes = 0
+    for _ in range(opens):
+        response = make_request("GET", endpoint, token=auth_token)
+        plain_bytes += len(response.content)
+
+    # With the ETag the first open downloads, later opens revalidate
+    response = make_request("GET", endpoint, token=auth_token)
+    etag = response.headers.get("ETag")
+    conditional_bytes = len(response.content)
+    not_modified = 0
+    for _ in range(opens - 1):
+        response = make_request("GET", endpoint, headers={"If-None-Match": etag}, token=auth_token)
+        conditional_bytes += len(response.content)
+        not_modified += response.status_code == 304
+
+    # Incremental viewing only pulls the first page worth of bytes
+    response = make_request("GET", endpoint, headers={"Range": "bytes=0-65535"}, token=auth_token)
+
+    print(f"   Unconditional: {plain_bytes / 1024 / 1024:.1f} MB, conditional: {conditional_bytes / 1024 / 1024:.1f} MB")
+    if not_modified != opens - 1:
+        results.log_failure("Conditional download", f"only {not_modified}/{opens - 1} revalidations returned 304")
+    else:
+        results.log_success("Conditional download revalidates with 304")
+
+    if response.status_code == 206 and response.content == scan[:65536]:
+        results.log_success("Range download returns 206 partial content")
+    else:
+        results.log_failure("Range download", f"Status: {response.status_code}, {len(response.content)} bytes")
+
+def bench_blob_refcounts(uploads=int(os.environ.get("BENCH_BLOB_UPLOADS", "8"))):
+    """Concurrent uploads of identical bytes share one blob that outlives all but the last delete"""
+    print(f"\n🧬 Benchmarking {uploads} concurrent uploads of the same file...")
+
+    db = get_benchmark_db()
+    content = os.urandom(256 * 1024)
+
+    def upload(i):
+        return make_request("POST", "/file-manager/upload", files=[
+            ("files", (f"bench_shared_{i}.bin", content, "application/octet-stream"))
+        ], token=auth_token)
+
+    with ThreadPoolExecutor(max_workers=uploads) as pool:
+        responses = list(pool.map(upload, range(uploads)))
+    failed = [r.status_code if r else "connection failed" for r in responses if not r or r.status_code != 200]
+    if failed:
+        results.log_failure("Concurrent identical uploads", f"statuses {failed}")
+        return
+    file_ids = [r.json()["files"][0]["id"] for r in responses]
+    checksum = db.file_items.find_one({"id": file_ids[0]})["checksum"]
+
+    # Delete all copies but one; the survivor must still download intact
+    for file_id in file_ids[:-1]:
+        make_request("DELETE", f"/file-manager/files/{file_id}", token=auth_token)
+    time.sleep(2)
+    blob = db.upload_blobs.find_one({"checksum": checksum}) or {}
+    response = make_request("GET", f"/file-manager/download/{file_ids[-1]}", token=auth_token)
+    if response and response.status_code == 200 and response.content == content and blob.get("refcount") == 1:
+        results.log_success("Shared blob survives deleting the other copies")
+    else:
+        results.log_failure(
+            "Blob refcounts",
+            f"download {response.status_code if response else 'failed'}, refcount {blob.get('refcount')}"
+        )
+
+    make_request("DELETE", f"/file-manager/files/{file_ids[-1]}", token=auth_token)
+    deadline = time.time() + 30
+    while time.time() < deadline and db.upload_blobs.find_one({"checksum": checksum}):
+        time.sleep(0.5)
+    if db.upload_blobs.find_one({"checksum": checksum}) is None:
+        results.log_success("Blob is reclaimed after its last reference is deleted")
+    else:
+        results.log_failure("Blob reclamation", "blob row still present after the last delete")
+
+def bench_failed_upload_release():
+    """A request whose second file is oversized must not keep a reference on the first"""
+    print("\n🧹 Checking references taken before a rejected upload are released...")
+
+    db = get_benchmark_db()
+    content = os.urandom(64 * 1024)
+    checksum = hashlib.sha256(content).hexdigest()
+    oversized = b"\0" * (10 * 1024 * 1024 + 1)
+
+    response = make_request("POST", "/documents/dri-depart", data={
+        "date": "2024-01-15",
+        "expediteur": "Bench",
+        "expediteur_reference": "BENCH/REJECTED",
+        "expediteur_date": "2024-01-15",
+        "destinataire": "Bench",
+        "objet": "Rejected upload"
+    }, files=[
+        ("files", ("bench_first.bin", content, "application/octet-stream")),
+        ("files", ("bench_oversized.bin", oversized, "application/octet-stream"))
+    ], token=auth_token)
+    if not response or response.status_code != 400:
+        results.log_failure("Oversized upload", f"expected 400, got {response.status_code if response else 'no response'}")
+        return
+
+    deadline = time.time() + 30
+    while time.time() < deadline and db.upload_blobs.find_one({"checksum": checksum}):
+        time.sleep(0.5)
+    blob = db.upload_blobs.find_one({"checksum": checksum})
+    if blob is None:
+        results.log_success("Files stored before a rejected upload are released")
+    else:
+        results.log_failure("Rejected upload", f"blob of the first file kept with refcount {blob.get('refcount')}")
+
+def bench_login_burst(logins=int(os.environ.get("BENCH_LOGIN_BURST", "200"))):
+    """Check unrelated endpoints stay responsive while a login burst is hashing"""
+    print(f"\n🔐 Benchmarking latency during a {logins}-login burst...")
+
+    def timed_get(_):
+        started = time.perf_counter()
+        make_request("GET", "/me", token=auth_token)
+        return (time.perf_counter() - started) * 1000
+
+    def probe(count):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            return list(pool.map(timed_get, range(count)))
+
+    baseline = probe(200)
+
+    suffix = str(uuid.uuid4())[:8]
+    credentials = {"username": f"burst_{suffix}", "password": "BurstPass123!"}
+    make_request("POST", "/register", {
+        **credentials,
+        "email": f"burst_{suffix}@epsys.com",
+        "full_name": "Burst User"
+    })
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as burst_pool:
+        burst = [burst_pool.submit(make_request, "POST", "/login", credentials) for _ in range(logins)]
+        during = probe(200)
+        ok_logins = sum(1 for f in burst if f.result() is not None and f.result().status_code == 200)
+
+    baseline_p99 = percentile(baseline, 99)
+    during_p99 = percentile(during, 99)
+    print(f"   /api/me p99: {baseline_p99:.1f} ms idle, {during_p99:.1f} ms during burst ({ok_logins}/{logins} logins ok)")
+
+    # "Flat" allows for scheduling noise, not for the event loop being held by bcrypt
+    allowed = max(baseline_p99 * 3, baseline_p99 + 50)
+    if during_p99 <= allowed:
+        results.log_success("Unrelated endpoint p99 stays flat during login burst")
+    else:
+        results.log_failure("Login burst latency", f"p99 {during_p99:.1f} ms exceeds {allowed:.1f} ms")
+
+def bench_dashboard_stats(documents=int(os.environ.get("BENCH_DASHBOARD_DOCUMENTS", "100000"))):
+    """Dashboard statistics latency over a large documents collection"""
+    print(f"\n📊 Benchmarking dashboard statistics at {documents} documents...")
+
+    db = get_benchmark_db()
+    run_id = seed_documents(db, documents)
+    try:
+        timings = []
+        for _ in range(20):
+            started = time.perf_counter()
+            response = make_request("GET", "/dashboard/stats", token=auth_token)
+            timings.append((time.perf_counter() - started) * 1000)
+            if not response or response.status_code != 200:
+                results.log_failure("Dashboard statistics", response.text if response else "Connection failed")
+                return
+
+        stats = response.json()
+        print(f"   First (uncached) request: {timings[0]:.1f} ms, cached p50: {percentile(timings[1:], 50):.1f} ms")
+        if stats["total_documents"] >= documents:
+            results.log_success("Dashboard statistics cover the seeded documents")
+        else:
+            results.log_failure("Dashboard statistics", f"total_documents {stats['total_documents']} < {documents}")
+    finally:
+        cleanup_documents(db, run_id)
+
+def bench_dri_keyset_pagination(documents=int(os.environ.get("BENCH_DRI_DOCUMENTS", "500000")), deep_page=1000):
+    """Page-1 vs deep-page latency of the DRI départ listing, offset vs cursor"""
+    print(f"\n📚 Benchmarking DRI départ pagination at {documents} documents (page {deep_page})...")
+
+    db = get_benchmark_db()
+    run_id = seed_documents(db, documents, document_type="dri_deport")
+    try:
+        def timed_page(params):
+            started = time.perf_counter()
+            response = make_request("GET", "/documents/dri-depart", params={"limit": 10, **params}, token=auth_token)
+            return (time.perf_counter() - started) * 1000, response.json()
+
+        offset_first, _ = timed_page({"page": 1, "total_mode": "none"})
+        offset_deep, _ = timed_page({"page": deep_page, "total_mode": "none"})
+
+        # Walk the cursor chain to the deep page, timing the first and last hops
+        cursor_timings = []
+        cursor = None
+        for _ in range(deep_page):
+            elapsed, body = timed_page({"total_mode": "none", **({"cursor": cursor} if cursor else {})})
+            cursor_timings.append(elapsed)
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+
+        print(f"   Offset paging: page 1 {offset_first:.1f} ms, page {deep_page} {offset_deep:.1f} ms")
+        print(f"   Cursor paging: page 1 {cursor_timings[0]:.1f} ms, page {len(cursor_timings)} {cursor_timings[-1]:.1f} ms")
+
+        # Compare medians of the first and last ten hops to smooth out noise
+        head = percentile(cursor_timings[:10], 50)
+        tail = percentile(cursor_timings[-10:], 50)
+        if tail <= max(head * 2, head + 10):
+            results.log_success("Cursor paging latency is independent of page depth")
+        else:
+            results.log_failure("Cursor paging", f"deep pages {tail:.1f} ms vs first pages {head:.1f} ms")
+    finally:
+        cleanup_documents(db, run_id)
+
+def bench_index_bootstrap(documents=int(os.environ.get("BENCH_INDEX_DOCUMENTS", "200000"))):
+    """Per-endpoint latency without and with the registry indexes"""
+    print(f"\n🗂️ Benchmarking endpoint latency before/after index bootstrap ({documents} documents)...")
+
+    endpoints = [
+        ("/documents", {"document_type": "incoming_mail", "limit": 50}),
+        ("/documents/dri-depart", {"limit": 10}),
+        ("/messages", None),
+        ("/file-manager/folders", None)
+    ]
+
+    def measure():
+        timings = {}
+        for endpoint, params in endpoints:
+            samples = []
+            for _ in range(10):
+                started = time.perf_counter()
+                make_request("GET", endpoint, params=params, token=auth_token)
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[endpoint] = percentile(samples, 50)
+        return timings
+
+    db = get_benchmark_db()
+    run_id = seed_documents(db, documents)
+    try:
+        # Only non-unique indexes are dropped so constraints stay enforced meanwhile
+        for collection_name in ("documents", "messages", "folders", "file_items"):
+            for name, info in db[collection_name].index_information().items():
+                if name != "_id_" and not info.get("unique"):
+                    db[collection_name].drop_index(name)
+
+        before = measure()
+        response = make_request("POST", "/settings/indexes/apply", token=auth_token)
+        if not response or response.status_code != 200:
+            results.log_failure("Index bootstrap", response.text if response else "Connection failed")
+            return
+        after = measure()
+
+        for endpoint, _ in endpoints:
+            print(f"   {endpoint}: {before[endpoint]:.1f} ms -> {after[endpoint]:.1f} ms")
+        results.log_success(f"Index bootstrap created {sum(len(v) for v in response.json()['created'].values())} indexes")
+    finally:
+        cleanup_documents(db, run_id)
+
+def bench_folder_subtree_rename(folders=int(os.environ.get("BENCH_FOLDER_TREE", "10000"))):
+    """Latency of renaming the root of a large folder tree"""
+    print(f"\n📁 Benchmarking subtree rename on a {folders}-folder tree...")
+
+    response = make_request("POST", "/file-manager/folders", {"name": f"bench-tree-{uuid.uuid4().hex[:8]}"}, token=auth_token)
+    if not response or response.status_code != 200:
+        results.log_failure("Folder tree setup", response.text if response else "Connection failed")
+        return
+    root = response.json()
+
+    db = get_benchmark_db()
+    seed_folder_tree(db, root, folders)
+    try:
+        new_name = f"{root['name']}-renamed"
+        started = time.perf_counter()
+        response = make_request("PUT", f"/file-manager/folders/{root['id']}", {"name": new_name}, token=auth_token)
+        elapsed = (time.perf_counter() - started) * 1000
+        if not response or response.status_code != 200:
+            results.log_failure("Subtree rename", response.text if response else "Connection failed")
+            return
+        print(f"   Rename of {folders + 1} folders: {elapsed:.1f} ms")
+
+        stale = db.folders.count_documents({"ancestors": root["id"], "path": {"$not": {"$regex": f"^/{new_name}/"}}})
+        if stale == 0:
+            results.log_success("Subtree rename rewrote every descendant path")
+        else:
+            results.log_failure("Subtree rename", f"{stale} descendants kept the old path")
+    finally:
+        db.folders.delete_many({"$or": [{"id": root["id"]}, {"ancestors": root["id"]}]})
+
+def bench_folder_subtree_delete(folders=int(os.environ.get("BENCH_FOLDER_TREE", "10000")), files_per_folder=2):
+    """Response time of deleting a large folder tree and background reclamation time"""
+    print(f"\n🗑️ Benchmarking subtree delete on a {folders}-folder tree ({files_per_folder} files per folder)...")
+
+    response = make_request("POST", "/file-manager/folders", {"name": f"bench-tree-{uuid.uuid4().hex[:8]}"}, token=auth_token)
+    if not response or response.status_code != 200:
+        results.log_failure("Folder tree setup", response.text if response else "Connection failed")
+        return
+    root = response.json()
+
+    db = get_benchmark_db()
+    seed_folder_tree(db, root, folders)
+    # Files live in a scratch directory; the reclaimer treats paths missing on the server host as removed
+    scratch = tempfile.mkdtemp(prefix="epsys-bench-")
+    folder_ids = [root["id"]] + db.folders.distinct("id", {"ancestors": root["id"]})
+    file_items = []
+    for folder_id in folder_ids:
+        for i in range(files_per_folder):
+            path = os.path.join(scratch, f"{uuid.uuid4().hex}.txt")
+            with open(path, "w") as handle:
+                handle.write("benchmark")
+            file_items.append({
+                "id": str(uuid.uuid4()),
+                "name": f"file-{i}.txt",
+                "original_name": f"file-{i}.txt",
+                "folder_id": folder_id,
+                "file_path": path,
+                "file_size": 9,
+                "mime_type": "text/plain",
+                "created_by": root["created_by"],
+                "uploaded_by_name": "Benchmark Runner",
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            })
+    db.file_items.insert_many(file_items)
+
+    try:
+        started = time.perf_counter()
+        response = make_request("DELETE", f"/file-manager/folders/{root['id']}", token=auth_token)
+        elapsed = (time.perf_counter() - started) * 1000
+        if not response or response.status_code != 200:
+            results.log_failure("Subtree delete", response.text if response else "Connection failed")
+            return
+        print(f"   DELETE of {len(folder_ids)} folders / {len(file_items)} files: {elapsed:.1f} ms")
+
+        paths = [item["file_path"] for item in file_items]
+        deadline = time.time() + 300
+        while db.file_reclaim_queue.count_documents({"file_path": {"$in": paths}}) and time.time() < deadline:
+            time.sleep(0.5)
+        print(f"   Background reclamation drained after {time.perf_counter() - started:.1f} s")
+
+        leftovers = db.folders.count_documents({"ancestors": root["id"]}) + db.file_items.count_documents({"folder_id": {"$in": folder_ids}})
+        if leftovers == 0:
+            results.log_success("Subtree delete removed every folder and file record")
+        else:
+            results.log_failure("Subtree delete", f"{leftovers} records left behind")
+    finally:
+        db.folders.delete_many({"$or": [{"id": root["id"]}, {"ancestors": root["id"]}]})
+        db.file_items.delete_many({"folder_id": {"$in": folder_ids}})
+
+def bench_file_search(files=int(os.environ.get("BENCH_SEARCH_FILES", "1000000")), folders=1000):
+    """File manager search latency at scale, regex scan baseline vs search_keys index"""
+    print(f"\n🔎 Benchmarking file manager search over {files} files...")
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+    from server import search_index_keys
+
+    response = make_request("POST", "/file-manager/folders", {"name": f"bench-search-{uuid.uuid4().hex[:8]}"}, token=auth_token)
+    if not response or response.status_code != 200:
+        results.log_failure("Search tree setup", response.text if response else "Connection failed")
+        return
+    root = response.json()
+
+    db = get_benchmark_db()
+    seed_folder_tree(db, root, folders)
+    folder_ids = [root["id"]] + db.folders.distinct("id", {"ancestors": root["id"]})
+    words = ["Rapport", "Réunion", "Procès-verbal", "Facture", "Contrat", "Budget", "Été", "Hiver",
+             "Maintenance", "Sécurité", "Forage", "Puits", "Équipe", "Planning", "Inventaire", "Achats"]
+    batch = []
+    for i in range(files):
+        name = f"{words[i % len(words)]} {words[(i // len(words)) % len(words)]} {i:07d}.pdf"
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "name": name,
+            "original_name": name,
+            "file_path": f"/nonexistent/{i}",
+            "folder_id": folder_ids[i % len(folder_ids)],
+            "file_size": 0,
+            "mime_type": "application/pdf",
+            "created_by": root["created_by"],
+            "uploaded_by_name": "Benchmark Runner",
+            "search_keys": search_index_keys(name),
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        })
+        if len(batch) == 10000:
+            db.file_items.insert_many(batch)
+            batch = []
+    if batch:
+        db.file_items.insert_many(batch)
+
+    queries = ["reunion", "proces verbal", "securite", "equipe plan", "0012345", "fact"]
+    try:
+        regex_timings, indexed_timings, scoped_timings = [], [], []
+        for query in queries:
+            started = time.perf_counter()
+            list(db.file_items.find({"name": {"$regex": query, "$options": "i"}}).limit(50))
+            regex_timings.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            response = make_request("GET", "/file-manager/search", params={"query": query}, token=auth_token)
+            indexed_timings.append((time.perf_counter() - started) * 1000)
+            if not response or response.status_code != 200:
+                results.log_failure("File search", response.text if response else "Connection failed")
+                return
+
+            started = time.perf_counter()
+            make_request("GET", "/file-manager/search", params={"query": query, "folder_id": folder_ids[1]}, token=auth_token)
+            scoped_timings.append((time.perf_counter() - started) * 1000)
+
+        print(f"   Regex scan (direct, no ranking): p50 {percentile(regex_timings, 50):.1f} ms, max {max(regex_timings):.1f} ms")
+        print(f"   Indexed search:                  p50 {percentile(indexed_timings, 50):.1f} ms, max {max(indexed_timings):.1f} ms")
+        print(f"   Indexed search, subtree scope:   p50 {percentile(scoped_timings, 50):.1f} ms, max {max(scoped_timings):.1f} ms")
+
+        top = make_request("GET", "/file-manager/search", params={"query": "Réunion Été"}, token=auth_token).json()["files"]
+        if top and top[0]["name"].startswith("Réunion Été"):
+            results.log_success("File search ranks accent-folded prefix matches first")
+        else:
+            results.log_failure("File search ranking", f"top result {top[0]['name'] if top else None}")
+    finally:
+        db.file_items.delete_many({"folder_id": {"$in": folder_ids}})
+        db.folders.delete_many({"id": {"$in": folder_ids}})
+
+def bench_content_indexing(files=int(os.environ.get("BENCH_INDEXED_FILES", "500"))):
+    """Background text extraction throughput and content search latency"""
+    print(f"\n📝 Benchmarking content indexing of {files} uploaded text files...")
+
+    def indexer_stats():
+        return make_request("GET", "/settings/system-info", token=auth_token).json()["worker_pools"]["content_indexer"]
+
+    words = ["forage", "puits", "maintenance", "sécurité", "réunion", "budget", "inventaire", "contrat"]
+    before = indexer_stats()
+    file_ids = []
+    started = time.perf_counter()
+    for offset in range(0, files, 50):
+        batch = [
+            ("files", (f"bench-content-{i}.txt", (" ".join(words[(i + j) % len(words)] for j in range(2000)) + f" marqueur{i}").encode("utf-8"), "text/plain"))
+            for i in range(offset, min(offset + 50, files))
+        ]
+        response = make_request("POST", "/file-manager/upload", files=batch, token=auth_token)
+        if not response or response.status_code != 200:
+            results.log_failure("Content indexing upload", response.text if response else "Connection failed")
+            return
+        file_ids += [item["id"] for item in response.json()["files"]]
+
+    # Wait for the workers to drain
+    deadline = time.time() + 300
+    stats = indexer_stats()
+    while stats["files_extracted"] + stats["files_reused"] - before["files_extracted"] - before["files_reused"] < files and time.time() < deadline:
+        time.sleep(0.5)
+        stats = indexer_stats()
+    elapsed = time.perf_counter() - started
+    print(f"   Indexed {files} files in {elapsed:.1f} s ({files / elapsed:.1f} files/s end to end, extractor {stats['mb_per_second']} MB/s)")
+
+    try:
+        timings = []
+        for i in range(0, files, max(1, files // 20)):
+            started = time.perf_counter()
+            response = make_request("GET", "/search", params={"q": f"marqueur{i}"}, token=auth_token)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"   /search latency: p50 {percentile(timings, 50):.1f} ms, p95 {percentile(timings, 95):.1f} ms")
+
+        hits = response.json()["results"]
+        if hits and hits[0]["type"] == "file_item" and hits[0]["highlights"]:
+            results.log_success("Content search finds words inside uploaded files")
+        else:
+            results.log_failure("Content search", f"unexpected results {hits[:1]}")
+    finally:
+        for file_id in file_ids:
+            make_request("DELETE", f"/file-manager/files/{file_id}", token=auth_token)
+
+def bench_text_preview(previews=int(os.environ.get("BENCH_PREVIEWS", "50"))):
+    """Preview latency of a large CSV; only its first characters are read and decoded"""
+    print(f"\n📃 Benchmarking text preview of a large CSV ({previews} previews)...")
+
+    row = "matricule;nom;prénom;fonction;unité\n".encode("cp1252")
+    csv = row * (9 * 1024 * 1024 // len(row))
+    response = make_request("POST", "/file-manager/upload", files=[("files", ("bench_export.csv", csv, "text/csv"))], token=auth_token)
+    if not response or response.status_code != 200:
+        results.log_failure("Preview benchmark upload", response.text if response else "Connection failed")
+        return
+    file_id = response.json()["files"][0]["id"]
+
+    try:
+        timings = []
+        for _ in range(previews):
+            started = time.perf_counter()
+            response = make_request("GET", f"/file-manager/preview/{file_id}", token=auth_token)
+            timings.append((time.perf_counter() - started) * 1000)
+        body = response.json()
+        print(f"   {len(csv) / (1024 * 1024):.1f} MB CSV: first preview {timings[0]:.1f} ms, p50 {percentile(timings, 50):.1f} ms")
+
+        if body["encoding"] == "cp1252" and "prénom" in body["content"] and len(body["content"]) < 11000:
+            results.log_success("Preview decodes Windows-1252 and stays bounded")
+        else:
+            results.log_failure("Text preview", f"encoding {body.get('encoding')}, {len(body.get('content', ''))} characters")
+    finally:
+        make_request("DELETE", f"/file-manager/files/{file_id}", token=auth_token)
+
+def bench_calendar_window(events=int(os.environ.get("BENCH_CALENDAR_EVENTS", "100000")), series=50):
+    """Month-window latency over years of events plus daily series expanded on read"""
+    print(f"\n📅 Benchmarking calendar window queries over {events} events and {series} daily series...")
+
+    db = get_benchmark_db()
+    run_id = str(uuid.uuid4())
+    start = datetime(2020, 1, 1, 8)
+    for offset in range(0, events, 10000):
+        batch = []
+        for i in range(offset, min(offset + 10000, events)):
+            event_start = start + timedelta(hours=i)
+            batch.append({
+                "id": str(uuid.uuid4()), "title": f"bench-calendar-{run_id}", "start_date": event_start,
+                "end_date": event_start + timedelta(minutes=30), "series_end": event_start + timedelta(minutes=30),
+                "created_by": "benchmark", "created_by_name": "Benchmark", "attendees": [], "visibility": "public",
+                "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()
+            })
+        db.calendar_events.insert_many(batch)
+
+    series_ids = []
+    try:
+        for i in range(series):
+            response = make_request("POST", "/calendar/events", {
+                "title": f"bench-calendar-{run_id}",
+                "start_date": (start + timedelta(minutes=i)).isoformat(),
+                "end_date": (start + timedelta(minutes=i + 30)).isoformat(),
+                "recurrence": {"frequency": "daily"}
+            }, token=auth_token)
+            if not response or response.status_code != 200:
+                results.log_failure("Recurring event creation", response.text if response else "Connection failed")
+                return
+            series_ids.append(response.json()["id"])
+
+        window = {"start_date": "2024-03-01T00:00:00", "end_date": "2024-03-31T23:59:59", "limit": 500}
+        timings = []
+        seen = []
+        for _ in range(20):
+            seen = []
+            cursor = None
+            started = time.perf_counter()
+            while True:
+                response = make_request("GET", "/calendar/events", params={**window, **({"cursor": cursor} if cursor else {})}, token=auth_token)
+                body = response.json()
+                seen += [(event["id"], event["start_date"]) for event in body["events"] if event["title"] == f"bench-calendar-{run_id}"]
+                cursor = body["next_cursor"]
+                if not cursor:
+                    break
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"   March 2024, all pages: p50 {percentile(timings, 50):.1f} ms, p95 {percentile(timings, 95):.1f} ms")
+
+        occurrences = Counter(event_id for event_id, _ in seen if event_id in set(series_ids))
+        if len(seen) == len(set(seen)) and all(occurrences[event_id] == 31 for event_id in series_ids):
+            results.log_success("Calendar window expands each daily series once per day across pages")
+        else:
+            results.log_failure("Calendar window", f"{len(seen)} rows, occurrences per series {set(occurrences.values())}")
+
+        response = make_request("GET", "/calendar/events", token=auth_token)
+        if response is not None and response.status_code == 422:
+            results.log_success("Calendar listing requires a date window")
+        else:
+            results.log_failure("Calendar window requirement", f"status {response.status_code if response is not None else None}")
+    finally:
+        db.calendar_events.delete_many({"title": f"bench-calendar-{run_id}"})
+
+def bench_calendar_reminders(events=int(os.environ.get("BENCH_REMINDER_EVENTS", "2000"))):
+    """Delivery lag of calendar reminders due within the same minute, each delivered once"""
+    print(f"\n⏰ Benchmarking delivery of {events} calendar reminders...")
+
+    db = get_benchmark_db()
+    run_id = str(uuid.uuid4())
+    base = datetime.utcnow() + timedelta(minutes=1, seconds=20)
+    event_ids = []
+    try:
+        def create(i):
+            start = base + timedelta(seconds=i % 30)
+            return make_request("POST", "/calendar/events", {
+                "title": f"bench-reminder-{run_id}",
+                "start_date": start.isoformat(),
+                "end_date": (start + timedelta(minutes=30)).isoformat(),
+                "reminder_minutes": 1
+            }, token=auth_token)
+
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+            for response in pool.map(create, range(events)):
+                if not response or response.status_code != 200:
+                    results.log_failure("Reminder event creation", response.text if response else "Connection failed")
+                    return
+                event_ids.append(response.json()["id"])
+
+        # Wait for the last reminders, then give the scheduler a moment to catch duplicates
+        deadline = time.time() + 180
+        while time.time() < deadline:
+            delivered = db.messages.count_documents({"subject": f"Rappel : bench-reminder-{run_id}"})
+            if delivered >= events:
+                break
+            time.sleep(1)
+        time.sleep(5)
+
+        messages = list(db.messages.find({"subject": f"Rappel : bench-reminder-{run_id}"}, {"id": 1, "created_at": 1}))
+        starts = {event["id"]: event["start_date"] for event in db.calendar_events.find({"id": {"$in": event_ids}}, {"id": 1, "start_date": 1})}
+        lags = [
+            (message["created_at"] - (starts[message["id"].split(":")[1]] - timedelta(minutes=1))).total_seconds() * 1000
+            for message in messages
+        ]
+        print(f"   {len(messages)} reminders delivered: lag p50 {percentile(lags, 50):.0f} ms, p95 {percentile(lags, 95):.0f} ms")
+
+        per_event = Counter(message["id"].split(":")[1] for message in messages)
+        if len(per_event) == events and set(per_event.values()) == {1}:
+            results.log_success("Each reminder is delivered exactly once")
+        else:
+            results.log_failure("Calendar reminders", f"{len(per_event)}/{events} events reminded, counts {set(per_event.values())}")
+    finally:
+        db.calendar_events.delete_many({"title": f"bench-reminder-{run_id}"})
+        db.messages.delete_many({"subject": f"Rappel : bench-reminder-{run_id}"})
+
+def bench_message_inbox(messages=int(os.environ.get("BENCH_INBOX_MESSAGES", "2000")), threads=20):
+    """Inbox and thread latency; unread counters follow delivery and bulk mark-as-read"""
+    print(f"\n💬 Benchmarking the message inbox with {messages} messages in {threads} threads...")
+
+    me = make_request("GET", "/me", token=auth_token).json()["id"]
+    run_id = str(uuid.uuid4())
+    unread_before = make_request("GET", "/dashboard/stats", token=auth_token).json()["unread_messages"]
+
+    def send(i):
+        return make_request("POST", "/messages", {
+            "subject": f"bench-inbox-{run_id}", "content": f"message {i}",
+            "recipient_id": me, "document_id": f"{run_id}-{i % threads}"
+        }, token=auth_token)
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        sent = list(pool.map(send, range(messages)))
+    if any(not response or response.status_code != 200 for response in sent):
+        results.log_failure("Inbox message delivery", "some messages failed")
+        return
+    conversation_ids = {response.json()["conversation_id"] for response in sent}
+
+    timings = {"inbox": [], "thread": [], "stats": []}
+    for _ in range(20):
+        for name, endpoint in (("inbox", "/messages/conversations"), ("thread", f"/messages/conversations/{next(iter(conversation_ids))}"), ("stats", "/dashboard/stats")):
+            started = time.perf_counter()
+            make_request("GET", endpoint, token=auth_token)
+            timings[name].append((time.perf_counter() - started) * 1000)
+    for name, values in timings.items():
+        print(f"   {name}: p50 {percentile(values, 50):.1f} ms, p95 {percentile(values, 95):.1f} ms")
+
+    unread_after = make_request("GET", "/dashboard/stats", token=auth_token).json()["unread_messages"]
+    marked = make_request("PUT", f"/messages/conversations/{next(iter(conversation_ids))}/read", token=auth_token).json()["marked_read"]
+    unread_final = make_request("GET", "/dashboard/stats", token=auth_token).json()["unread_messages"]
+    if len(conversation_ids) == threads and unread_after - unread_before == messages and unread_after - unread_final == marked == messages // threads:
+        results.log_success("Unread counters follow delivery and thread mark-as-read")
+    else:
+        results.log_failure("Message inbox", f"{len(conversation_ids)} threads, unread {unread_before} -> {unread_after} -> {unread_final}, marked {marked}")
+
+def bench_push_connections(connections=int(os.environ.get("BENCH_PUSH_CONNECTIONS", "2000")), rounds=5):
+    """Open many push WebSockets on one worker and time the fan-out of each new message"""
+    print(f"\n📡 Benchmarking push fan-out to {connections} WebSocket connections...")
+    try:
+        import asyncio
+        import websockets
+    except ImportError:
+        results.log_failure("Push benchmark", "the websockets package is required")
+        return
+
+    me = make_request("GET", "/me", token=auth_token).json()["id"]
+    ws_url = BACKEND_URL.replace("http", "ws", 1) + f"/ws?token={auth_token}"
+
+    async def run():
+        sockets = []
+        started = time.perf_counter()
+        for offset in range(0, connections, 100):
+            sockets += await asyncio.gather(*(websockets.connect(ws_url, max_queue=None) for _ in range(min(100, connections - offset))))
+        print(f"   Opened {len(sockets)} connections in {time.perf_counter() - started:.1f} s")
+        loop = asyncio.get_running_loop()
+        push_stats = (await loop.run_in_executor(None, lambda: make_request("GET", "/settings/system-info", token=auth_token))).json()["worker_pools"]["push"]
+
+        async def wait_for(socket, subject):
+            while True:
+                event = json.loads(await socket.recv())
+                if event["type"] == "message.created" and event["data"]["subject"] == subject:
+                    return time.perf_counter()
+
+        fan_out = []
+        try:
+            for i in range(rounds):
+                subject = f"bench-push-{uuid.uuid4()}"
+                waiters = [asyncio.ensure_future(wait_for(socket, subject)) for socket in sockets]
+                sent_at = time.perf_counter()
+                await loop.run_in_executor(None, lambda: make_request("POST", "/messages", {"subject": subject, "content": "push", "recipient_id": me}, token=auth_token))
+                received = await asyncio.wait_for(asyncio.gather(*waiters), timeout=60)
+                fan_out.append(((max(received) - sent_at) * 1000, percentile([(t - sent_at) * 1000 for t in received], 50)))
+        finally:
+            await asyncio.gather(*(socket.close() for socket in sockets), return_exceptions=True)
+        return push_stats, fan_out
+
+    try:
+        push_stats, fan_out = asyncio.run(run())
+    except Exception as e:
+        results.log_failure("Push fan-out", str(e))
+        return
+    for slowest, median in fan_out:
+        print(f"   Message delivered to all connections in {slowest:.0f} ms (median connection {median:.0f} ms)")
+
+    if push_stats["connections"] >= connections and len(fan_out) == rounds:
+        results.log_success(f"Push channel serves {connections} concurrent connections")
+    else:
+        results.log_failure("Push connections", f"server reports {push_stats['connections']} connections")
+
+def bench_employee_typeahead(employees=int(os.environ.get("BENCH_DIRECTORY_EMPLOYEES", "20000")), queries=500):
+    """Typeahead latency over the in-memory employee directory; exact matricules rank first"""
+    print(f"\n🔎 Benchmarking employee typeahead over {employees} employees...")
+
+    db = get_benchmark_db()
+    run_id = uuid.uuid4().hex[:6].upper()
+    first_names = ["AMINE", "NADIA", "OMAR", "SAMIRA", "YACINE", "LEILA", "KARIM", "HOUDA"]
+    titles = ["TECHNICIEN PRODUCTION N5", "ING RESERVOIR N1", "SUPERVISEUR OPERATIONS N 1", "CHEF SECTION MESURES N1"]
+    try:
+        db.employees.insert_many([{
+            "id": str(uuid.uuid4()),
+            "matricule": f"{run_id}{i:06d}",
+            "full_name": f"BENCH{run_id}{i % 500}",
+            "full_name1": first_names[i % len(first_names)],
+            "job_title": titles[i % len(titles)],
+            "division": "ENP",
+            "itineraire": "INAS - TOUS LES CHAMPS INAS",
+            "service": "PUITS",
+            "created_at": datetime.utcnow()
+        } for i in range(employees)], ordered=False)
+        db.directory_versions.update_one({"name": "employees"}, {"$inc": {"version": 1}}, upsert=True)
+
+        # The directory notices the new version on its next poll
+        probe = f"{run_id}{employees - 1:06d}"
+        deadline = time.time() + 90
+        while time.time() < deadline:
+            response = make_request("GET", "/employees", token=auth_token, params={"q": probe})
+            if response and response.status_code == 200 and response.json()["employees"]:
+                break
+            time.sleep(1)
+
+        samples = [
+            f"{run_id}{i * 37 % employees:06d}" if i % 3 == 0 else
+            f"bench{run_id.lower()}{i % 500} {first_names[i % len(first_names)][:3]}" if i % 3 == 1 else
+            first_names[i % len(first_names)][:2 + i % 3]
+            for i in range(queries)
+        ]
+
+        def search(query):
+            started = time.perf_counter()
+            response = make_request("GET", "/employees", token=auth_token, params={"q": query, "limit": 10})
+            return (time.perf_counter() - started) * 1000, query, response
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            timings = list(pool.map(search, samples))
+        latencies = [elapsed for elapsed, _, _ in timings]
+        print(f"   {queries} searches over HTTP: p50 {percentile(latencies, 50):.1f} ms, p95 {percentile(latencies, 95):.1f} ms")
+        stats = make_request("GET", "/settings/system-info", token=auth_token).json()["cache_stats"]["employee_directory"]
+        print(f"   In-process search: avg {stats['avg_search_ms']} ms over {stats['employees']} employees")
+
+        misranked = [
+            query for _, query, response in timings
+            if query.startswith(run_id)
+            and not (response and response.status_code == 200 and [e["matricule"] for e in response.json()["employees"][:1]] == [query])
+        ]
+        lookup = make_request("GET", f"/employees/{probe.lower()}", token=auth_token)
+        if not misranked and lookup and lookup.status_code == 200:
+            results.log_success("Typeahead ranks exact matricules first")
+        else:
+            results.log_failure("Employee typeahead", f"{len(misranked)} misranked matricules, lookup {lookup.status_code if lookup else 'failed'}")
+    finally:
+        db.employees.delete_many({"matricule": {"$regex": f"^{run_id}"}})
+        db.directory_versions.update_one({"name": "employees"}, {"$inc": {"version": 1}}, upsert=True)
+
+def bench_employee_import(rows=int(os.environ.get("BENCH_IMPORT_EMPLOYEES", "100000")), bad_rows=50):
+    """Throughput of the roster import; a re-import reports updates and rejected rows"""
+    print(f"\n📥 Benchmarking an employee import of {rows} rows...")
+
+    db = get_benchmark_db()
+    run_id = uuid.uuid4().hex[:6].upper()
+    header = "Matricule;Nom;Prénom;Fonction;Division;Itinéraire;Service\n"
+
+    def roster(path, job_title, rejected=0):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(header)
+            for i in range(rows):
+                f.write(f"{run_id}{i:07d};BENCH{run_id};AGENT{i};{job_title(i)};ENP;INAS - TOUS LES CHAMPS INAS;PUITS\n")
+            for i in range(rejected):
+                f.write(f";BENCH{run_id};SANS MATRICULE{i};X;ENP;INAS;PUITS\n")
+
+    def upload(path):
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            response = make_request("POST", "/employees/import", files={"file": ("roster.csv", f, "text/csv")}, token=auth_token)
+        return time.perf_counter() - started, response
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "roster.csv")
+        try:
+            roster(path, lambda i: "TECHNICIEN PRODUCTION N5")
+            elapsed, response = upload(path)
+            if not response or response.status_code != 200:
+                results.log_failure("Employee import", response.text if response else "Connection failed")
+                return
+            first = response.json()
+            print(f"   Initial import: {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+            # Half the roster changes job title; the rest re-imports unchanged
+            roster(path, lambda i: "ING RESERVOIR N1" if i % 2 else "TECHNICIEN PRODUCTION N5", rejected=bad_rows)
+            elapsed, response = upload(path)
+            second = response.json() if response and response.status_code == 200 else {}
+            print(f"   Re-import: {elapsed:.1f}s, {second.get('updated')} updated, {second.get('unchanged')} unchanged, {second.get('rejected')} rejected")
+
+            stored = db.employees.count_documents({"full_name": f"BENCH{run_id}"})
+            if (first["inserted"] == rows and stored == rows and second.get("updated") == rows // 2
+                    and second.get("unchanged") == rows - rows // 2 and second.get("rejected") == bad_rows):
+                results.log_success("Employee import reports inserted, updated and rejected rows")
+            else:
+                results.log_failure("Employee import", f"first {first}, second {second}, {stored} stored")
+        finally:
+            db.employees.delete_many({"full_name": f"BENCH{run_id}"})
+            db.directory_versions.update_one({"name": "employees"}, {"$inc": {"version": 1}}, upsert=True)
+
+def bench_archive_import(records=int(os.environ.get("BENCH_ARCHIVE_RECORDS", "50000")), interrupt_after=10):
+    """Legacy archive import throughput; an interrupted run resumes without duplicates"""
+    print(f"\n🗄️ Benchmarking a legacy archive import of {records} records...")
+
+    db = get_benchmark_db()
+    run_id = uuid.uuid4().hex[:8]
+    owner = make_request("GET", "/me", token=auth_token).json()["username"]
+    types = ["depart", "arrivee", "dri"]
+    prefixes = {"depart": "DEP", "arrivee": "ARR", "dri": "DRI"}
+    backend_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export = os.path.join(tmp, f"archive-{run_id}.jsonl")
+        attachments = os.path.join(tmp, "attachments")
+        os.makedirs(attachments)
+        for i in range(100):
+            with open(os.path.join(attachments, f"scan{i}.txt"), "w") as f:
+                f.write(f"bench archive {run_id} scan {i}\n" * 50)
+        with open(export, "w", encoding="utf-8") as f:
+            for i in range(records):
+                kind = types[i % 3]
+                record = {
+                    "legacy_id": f"{run_id}-{i}",
+                    "type": kind,
+                    "objet": f"Archive {run_id} courrier {i}",
+                    "expediteur": "DIRECTION",
+                    "destinataire": "DIVISION",
+                    "date": f"{1990 + i % 5}-0{1 + i % 9}-1{i % 10}",
+                    "attachments": [f"scan{i % 100}.txt"] if i % 10 == 0 else []
+                }
+                # Every fourth record keeps its legacy reference, in a year no live counter uses
+                if i % 4 == 0:
+                    record["reference"] = f"{prefixes[kind]}-{1990 + i % 5}-{i + 1:03d}"
+                f.write(json.dumps(record) + "\n")
+
+        command = [sys.executable, "import_archive.py", export, "--attachments", attachments, "--owner", owner]
+        try:
+            started = time.perf_counter()
+            process = subprocess.Popen(command, cwd=backend_dir, stdout=subprocess.DEVNULL)
+            try:
+                process.wait(timeout=interrupt_after)
+            except subprocess.TimeoutExpired:
+                process.send_signal(signal.SIGINT)
+                process.wait()
+            checkpoint = db.import_checkpoints.find_one({"id": f"archive-{run_id}"}) or {}
+            print(f"   Interrupted after {checkpoint.get('rows', 0)} rows")
+
+            subprocess.run(command, cwd=backend_dir, stdout=subprocess.DEVNULL, check=True)
+            elapsed = time.perf_counter() - started
+            print(f"   Imported {records} records in {elapsed:.1f}s ({records / elapsed:,.0f} records/s)")
+
+            query = {"metadata.legacy_id": {"$regex": f"^{run_id}-"}}
+            stored = db.documents.count_documents(query)
+            duplicates = list(db.documents.aggregate([
+                {"$match": query},
+                {"$group": {"_id": "$reference", "count": {"$sum": 1}}},
+                {"$match": {"count": {"$gt": 1}}},
+                {"$limit": 5}
+            ]))
+            kept = db.documents.count_documents({**query, "reference": "DEP-1990-001"})
+            with_files = db.documents.count_documents({**query, "file_path": {"$ne": None}})
+            if stored == records and not duplicates and kept == 1 and with_files == (records + 9) // 10:
+                results.log_success("Archive import resumes without duplicates and keeps legacy references")
+            else:
+                results.log_failure("Archive import", f"{stored}/{records} stored, duplicate references {duplicates}, {kept} kept, {with_files} with files")
+        finally:
+            checksums = db.documents.distinct("metadata.uploaded_files.checksum", {"metadata.legacy_id": {"$regex": f"^{run_id}-"}})
+            checksums += db.documents.distinct("metadata.files.checksum", {"metadata.legacy_id": {"$regex": f"^{run_id}-"}})
+            for blob in db.upload_blobs.find({"checksum": {"$in": checksums}}):
+                if os.path.exists(blob["file_path"]):
+                    os.remove(blob["file_path"])
+            db.upload_blobs.delete_many({"checksum": {"$in": checksums}})
+            db.documents.delete_many({"metadata.legacy_id": {"$regex": f"^{run_id}-"}})
+            db.import_checkpoints.delete_one({"id": f"archive-{run_id}"})
+            db.document_counters.delete_many({"year": {"$gte": 1990, "$lte": 1994}})
+
+def main():
+    print("🚀 Starting EPSys Backend Performance Benchmarks...")
+    print(f"Backend URL: {BACKEND_URL}")
+    print("="*60)
+
+    try:
+        if not setup_benchmark_user():
+            return
+
+        bench_reference_allocation()
+        bench_download_revalidation()
+        bench_blob_refcounts()
+        bench_failed_upload_release()
+        bench_login_burst()
+        bench_dashboard_stats()
+        bench_dri_keyset_pagination()
+        bench_index_bootstrap()
+        bench_folder_subtree_rename()
+        bench_folder_subtree_delete()
+        bench_file_search()
+        bench_content_indexing()
+        bench_text_preview()
+        bench_calendar_window()
+        bench_calendar_reminders()
+        bench_message_inbox()
+        bench_push_connections()
+        bench_employee_typeahead()
+        bench_employee_import()
+        bench_archive_import()
+
+    except KeyboardInterrupt:
+        print("\n\n⚠️ Benchmarks interrupted by user")
+    except Exception as e:
+        print(f"\n\n💥 Unexpected error during benchmarks: {str(e)}")
+        results.log_failure("Benchmark execution", str(e))
+
+    finally:
+        results.summary()
+
+if __name__ == "__main__":
+    main()
+    sys.exit(1 if results.failed else 0)